@@ -21,6 +21,10 @@ from app.database.models.pricing import PricingTier
 from app.database.models.review import ReviewAggregate
 from app.database.models.feature import Feature
 from app.database.models.integration import Integration
+from app.database.models.search_query_stat import SearchQueryStat
+from app.database.models.tool_similarity import ToolSimilarity
+from app.database.models.tool_usage import ToolUsageHourly, ToolUsageDaily
+from app.database.models.catalog_change import CatalogChange
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
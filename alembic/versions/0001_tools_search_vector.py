@@ -0,0 +1,59 @@
+"""add weighted search_vector to tools
+
+The first revision of this history, but not of the schema: it alters the
+tools table, so it requires the tables the application had before
+migrations were introduced (categories, tools, pricing_tiers, features,
+reviews_aggregate, integrations, users, api_keys and request_logs) to
+exist already. Databases created before that point are upgraded from
+here. A new database is created from the models instead, which already
+include every revision, and then stamped:
+
+    Base.metadata.create_all(engine)
+    alembic stamp head
+
+Revision ID: 0001_tools_search_vector
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0001_tools_search_vector"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.database.search_vector.SEARCH_VECTOR_EXPRESSION as of
+# this revision: a later change to the expression needs its own revision
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tagline, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # A stored generated column is computed for every existing row when it is
+    # added, so this also backfills the whole table.
+    op.add_column(
+        "tools",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_tools_search_vector",
+        "tools",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tools_search_vector", table_name="tools")
+    op.drop_column("tools", "search_vector")
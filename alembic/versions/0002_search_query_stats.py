@@ -0,0 +1,46 @@
+"""add search_query_stats
+
+Revision ID: 0002_search_query_stats
+Revises: 0001_tools_search_vector
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0002_search_query_stats"
+down_revision = "0001_tools_search_vector"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_query_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("window_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("window_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("query", sa.Text(), nullable=False),
+        sa.Column("filters", sa.Text(), nullable=False, server_default=""),
+        sa.Column("shape", sa.String(length=255), nullable=False),
+        sa.Column("request_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("zero_result_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("result_count_total", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("latency_total_ms", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("latency_max_ms", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("latency_histogram", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_search_query_stats_id", "search_query_stats", ["id"])
+    op.create_index("ix_search_query_stats_shape", "search_query_stats", ["shape"])
+    op.create_index("ix_search_query_stats_window_start", "search_query_stats", ["window_start"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_query_stats_window_start", table_name="search_query_stats")
+    op.drop_index("ix_search_query_stats_shape", table_name="search_query_stats")
+    op.drop_index("ix_search_query_stats_id", table_name="search_query_stats")
+    op.drop_table("search_query_stats")
@@ -0,0 +1,43 @@
+"""add tool_similarity
+
+Revision ID: 0003_tool_similarity
+Revises: 0002_search_query_stats
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003_tool_similarity"
+down_revision = "0002_search_query_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tool_similarity",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tool_id", sa.Integer(), sa.ForeignKey("tools.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("similar_tool_id", sa.Integer(), sa.ForeignKey("tools.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("feature_score", sa.Float(), nullable=False),
+        sa.Column("price_score", sa.Float(), nullable=False),
+        sa.Column("integration_score", sa.Float(), nullable=False),
+        sa.Column("rating_score", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_tool_similarity_id", "tool_similarity", ["id"])
+    op.create_index("ix_tool_similarity_tool_id_rank", "tool_similarity", ["tool_id", "rank"])
+    op.create_index("ix_tool_similarity_similar_tool_id", "tool_similarity", ["similar_tool_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tool_similarity_similar_tool_id", table_name="tool_similarity")
+    op.drop_index("ix_tool_similarity_tool_id_rank", table_name="tool_similarity")
+    op.drop_index("ix_tool_similarity_id", table_name="tool_similarity")
+    op.drop_table("tool_similarity")
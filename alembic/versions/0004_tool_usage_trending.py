@@ -0,0 +1,57 @@
+"""add decayed trending score and tool usage rollups
+
+Revision ID: 0004_tool_usage_trending
+Revises: 0003_tool_similarity
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004_tool_usage_trending"
+down_revision = "0003_tool_similarity"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tools", sa.Column("trending_score", sa.Float(), nullable=True))
+    op.create_index("ix_tools_trending_score", "tools", ["trending_score"])
+
+    op.create_table(
+        "tool_usage_hourly",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tool_id", sa.Integer(), sa.ForeignKey("tools.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("views", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("tool_id", "bucket_start", name="uq_tool_usage_hourly_tool_bucket"),
+    )
+    op.create_index("ix_tool_usage_hourly_id", "tool_usage_hourly", ["id"])
+    op.create_index("ix_tool_usage_hourly_bucket_start", "tool_usage_hourly", ["bucket_start"])
+
+    op.create_table(
+        "tool_usage_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tool_id", sa.Integer(), sa.ForeignKey("tools.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("views", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("tool_id", "day", name="uq_tool_usage_daily_tool_day"),
+    )
+    op.create_index("ix_tool_usage_daily_id", "tool_usage_daily", ["id"])
+    op.create_index("ix_tool_usage_daily_day", "tool_usage_daily", ["day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tool_usage_daily_day", table_name="tool_usage_daily")
+    op.drop_index("ix_tool_usage_daily_id", table_name="tool_usage_daily")
+    op.drop_table("tool_usage_daily")
+    op.drop_index("ix_tool_usage_hourly_bucket_start", table_name="tool_usage_hourly")
+    op.drop_index("ix_tool_usage_hourly_id", table_name="tool_usage_hourly")
+    op.drop_table("tool_usage_hourly")
+    op.drop_index("ix_tools_trending_score", table_name="tools")
+    op.drop_column("tools", "trending_score")
@@ -0,0 +1,35 @@
+"""add catalog_changes
+
+Revision ID: 0005_catalog_changes
+Revises: 0004_tool_usage_trending
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0005_catalog_changes"
+down_revision = "0004_tool_usage_trending"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "catalog_changes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tool_ids", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("category_ids", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_catalog_changes_id", "catalog_changes", ["id"])
+    op.create_index("ix_catalog_changes_created_at", "catalog_changes", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_catalog_changes_created_at", table_name="catalog_changes")
+    op.drop_index("ix_catalog_changes_id", table_name="catalog_changes")
+    op.drop_table("catalog_changes")
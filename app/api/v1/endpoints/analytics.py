@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.database.session import get_db
 from app.services.analytics_service import AnalyticsService
+from app.services.similarity_job import similarity_job
 
 router = APIRouter()
 
@@ -62,4 +63,41 @@ def get_integration_graph(
     """
     Get integration graph data.
     """
-    return AnalyticsService.get_integration_graph(db)
\ No newline at end of file
+    return AnalyticsService.get_integration_graph(db)
+
+@router.get("/search-report")
+def get_search_report(
+    period: str = "24h",
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get top queries, zero-result queries and latency per query shape.
+    """
+    valid_periods = ["24h", "7d", "30d"]
+    if period not in valid_periods:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
+        )
+    
+    return AnalyticsService.get_search_report(db, period=period, limit=limit)
+
+@router.post("/similarity/rebuild", status_code=status.HTTP_202_ACCEPTED)
+def rebuild_tool_similarity() -> Dict[str, Any]:
+    """
+    Start recomputing the whole tool_similarity table in the background.
+    """
+    if not similarity_job.start():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A similarity rebuild is already running, in this or another worker"
+        )
+    return similarity_job.status()
+
+@router.get("/similarity/status")
+def get_tool_similarity_status() -> Dict[str, Any]:
+    """
+    Get progress and timings of the current or last similarity rebuild.
+    """
+    return similarity_job.status()
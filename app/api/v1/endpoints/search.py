@@ -1,75 +1,199 @@
 # app/api/v1/endpoints/search.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional, Dict, Any
+import time
 from sqlalchemy.orm import Session
 
 from app.database.session import get_db
 from app.services.search_service import SearchService
 from app.schemas.tool import ToolList
+from app.schemas.search import BatchSearchRequest, BatchSearchResponse
+from app.core.config import settings
 
 router = APIRouter()
 
 @router.get("/tools", response_model=Dict[str, Any])
-async def search_tools(
-    q: str = Query(..., min_length=1, description="Search query string"),
+def search_tools(
+    q: str = Query(
+        ...,
+        min_length=1,
+        description='Search query, e.g. \'category:ci-cd price<20 feature:docker "exact phrase"\''
+    ),
     category: Optional[str] = None,
     price_min: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
     price_max: Optional[float] = Query(None, gt=0, description="Maximum price filter"),
     features: Optional[List[str]] = Query(None, description="List of required features"),
     sort_by: str = "relevance",
-    page: int = Query(1, ge=1, description="Page number"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
+    semantic: float = Query(0.0, ge=0, le=1, description="Weight of semantic similarity in relevance ranking"),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Search for tools with various filters and sorting options.
+    Search for tools with various filters and sorting options. Filters can
+    also be written into the query (category:, feature:, price<, price>,
+    price:min-max and "quoted phrases").
     """
     try:
-        # Calculate pagination
-        offset = (page - 1) * size
-        
-        # Perform search
+        # Perform search and fetch the page after the cursor
         results = SearchService.search_tools(
             db=db,
             query=q,
             category=category,
             price_min=price_min,
             price_max=price_max,
-            features=features
+            features=features,
+            sort_by=sort_by,
+            cursor=cursor,
+            limit=size,
+            semantic=semantic
         )
         
-        # Apply sorting
-        if sort_by == "price_asc":
-            results = results.order_by(PricingTier.monthly_price.asc())
-        elif sort_by == "price_desc":
-            results = results.order_by(PricingTier.monthly_price.desc())
-        elif sort_by == "rating":
-            results = results.outerjoin(ReviewAggregate).order_by(
-                desc(ReviewAggregate.avg_rating)
-            )
-        elif sort_by == "recent":
-            results = results.order_by(desc(Tool.created_at))
-        
-        # Apply pagination
-        total = results.count()
-        items = results.offset(offset).limit(size).all()
-        
         return {
-            "items": items,
-            "total": total,
-            "page": page,
+            "items": [tool.to_dict() for tool in results["items"]],
+            "total": results["total"],
             "size": size,
-            "pages": (total + size - 1) // size
+            "next_cursor": results["next_cursor"],
+            "did_you_mean": results["did_you_mean"],
+            "facets": SearchService.get_facets(results["matched_ids"])
         }
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while searching: {str(e)}"
         )
 
+@router.post("/batch", response_model=BatchSearchResponse)
+def batch_search_tools(
+    request: BatchSearchRequest,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Run several searches in one request. Each query takes the same options
+    as /tools; results come back in request order with per-query timing.
+    """
+    started = time.perf_counter()
+    try:
+        batch = SearchService.batch_search(db, [
+            {
+                "query": spec.q,
+                "category": spec.category,
+                "price_min": spec.price_min,
+                "price_max": spec.price_max,
+                "features": spec.features,
+                "sort_by": spec.sort_by,
+                "cursor": spec.cursor,
+                "limit": spec.size,
+                "semantic": spec.semantic
+            }
+            for spec in request.queries
+        ])
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while searching: {str(e)}"
+        )
+    
+    return {
+        "results": [
+            {
+                "items": [tool.to_dict() for tool in result.get("items", [])],
+                "total": result.get("total", 0),
+                "size": spec.size,
+                "next_cursor": result.get("next_cursor"),
+                "did_you_mean": result.get("did_you_mean"),
+                "error": result.get("error"),
+                "took_ms": result["took_ms"]
+            }
+            for spec, result in zip(request.queries, batch["results"])
+        ],
+        "fetch_ms": batch["fetch_ms"],
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+@router.get("/trending", response_model=List[Dict[str, Any]])
+def get_trending_tools(
+    period: str = Query("7d", description="24h, 7d or 30d for views in the window, hot for decayed views"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """
+    Get trending tools by views in the period, or by decayed views for "hot".
+    """
+    valid_periods = ["24h", "7d", "30d", "hot"]
+    if period not in valid_periods:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
+        )
+    return SearchService.get_trending_tools(db, period=period, limit=limit)
+
+@router.get("/recommendations/stack", response_model=List[Dict[str, Any]])
+def get_stack_recommendations(
+    tool_ids: List[int] = Query(
+        ...,
+        min_length=1,
+        max_length=settings.RECOMMENDATION_STACK_MAX_SEEDS,
+        description="IDs of the tools already in the stack"
+    ),
+    limit: int = Query(10, ge=1, le=50, description="Number of recommendations to return"),
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """
+    Recommend tools that fit a stack of seed tools, ranked against their
+    combined features, integrations and categories, with each
+    recommendation's similarity to every seed.
+    """
+    results = SearchService.get_stack_recommendations(db=db, tool_ids=tool_ids, limit=limit)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="None of the seed tools were found"
+        )
+    return results
+
+@router.get("/recommendations/graph", response_model=List[Dict[str, Any]])
+def get_graph_recommendations(
+    tool_ids: List[int] = Query(
+        ...,
+        min_length=1,
+        max_length=settings.RECOMMENDATION_STACK_MAX_SEEDS,
+        description="IDs of the tools to start from"
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Number of recommendations to return"),
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """
+    Recommend tools close to the given ones in the integration graph,
+    ranked by personalized PageRank.
+    """
+    results = SearchService.get_graph_recommendations(db=db, tool_ids=tool_ids, limit=limit)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="None of the seed tools were found"
+        )
+    return results
+
+@router.get("/recommendations/{tool_id}", response_model=List[Dict[str, Any]])
+def get_recommendations(
+    tool_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Number of recommendations to return"),
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """
+    Get tools similar to the given one, with the reasons they match.
+    """
+    return SearchService.get_recommendations(db=db, tool_id=tool_id, limit=limit)
+
 @router.get("/suggestions", response_model=List[str])
-async def get_search_suggestions(
+def get_search_suggestions(
     q: str = Query(..., min_length=1, max_length=100, description="Partial search query"),
     limit: int = Query(5, ge=1, le=10, description="Number of suggestions to return"),
     db: Session = Depends(get_db)
@@ -86,7 +210,7 @@ async def get_search_suggestions(
         )
 
 @router.get("/filters", response_model=Dict[str, Any])
-async def get_search_filters(
+def get_search_filters(
     q: Optional[str] = None,
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -100,3 +224,10 @@ async def get_search_filters(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while fetching filters: {str(e)}"
         )
+
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_search_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters and occupancy of the search result cache.
+    """
+    return SearchService.get_cache_stats()
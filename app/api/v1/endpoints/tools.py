@@ -2,11 +2,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from fastapi_pagination import Page, paginate, Params
 from pydantic import BaseModel, Field
+from app.core.config import settings
 from app.database.session import get_db
-from app.schemas.tool import Tool, ToolInDB, ToolCreate, ToolUpdate, ToolList
+from app.schemas.base import CursorPage
+from app.schemas.tool import Tool, ToolInDB, ToolCreate, ToolUpdate, ToolList, ToolAlternative
 from app.services.tool_service import ToolService
+from app.services.query_stats_buffer import query_stats_buffer
 from app.core.security import get_current_active_user
 from app.schemas.user import User
 
@@ -16,7 +18,7 @@ class ToolCompareRequest(BaseModel):
     tool_ids: List[int] = Field(..., min_length=2, max_length=5, description="List of tool IDs to compare")
 
 
-@router.get("/", response_model=Page[Tool])
+@router.get("/", response_model=CursorPage[Tool])
 def get_tools(
     db: Session = Depends(get_db),
     category: Optional[str] = None,
@@ -24,20 +26,24 @@ def get_tools(
     price_max: Optional[float] = None,
     features: Optional[List[str]] = Query(None),
     sort: str = "name",
-    params: Params = Depends()
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE)
 ):
     """
-    Get paginated list of tools with filtering and sorting options.
+    Get a page of tools with filtering and sorting options.
+    Pass next_cursor back as cursor to fetch the following page.
     """
-    tools = ToolService.get_tools(
+    tools, next_cursor = ToolService.get_tools(
         db,
         category=category,
         price_min=price_min,
         price_max=price_max,
         features=features,
-        sort=sort
+        sort=sort,
+        cursor=cursor,
+        limit=size
     )
-    return paginate(tools, params)
+    return {"items": tools, "next_cursor": next_cursor, "size": size}
 
 @router.get("/{tool_id}", response_model=ToolInDB)
 def get_tool(
@@ -53,9 +59,10 @@ def get_tool(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tool not found"
         )
+    query_stats_buffer.record(tool.id)
     return tool
 
-@router.get("/{tool_id}/alternatives", response_model=List[Tool])
+@router.get("/{tool_id}/alternatives", response_model=List[ToolAlternative])
 def get_tool_alternatives(
     tool_id: int,
     min_similarity: int = 50,
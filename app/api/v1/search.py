@@ -2,37 +2,55 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from fastapi_pagination import Page, paginate
 
 from app.database.session import get_db
+from app.schemas.base import SearchPage
 from app.schemas.tool import Tool
 from app.services.search_service import SearchService
 
 router = APIRouter()
 
-@router.get("/", response_model=Page[Tool])
+@router.get("/", response_model=SearchPage[Tool])
 def search_tools(
     q: str = Query(..., min_length=3, max_length=100),
     category: Optional[str] = None,
     price_min: Optional[float] = None,
     price_max: Optional[float] = None,
     features: Optional[List[str]] = Query(None),
-    page: int = 1,
-    limit: int = 20,
+    sort_by: str = "relevance",
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    semantic: float = Query(0.0, ge=0, le=1),
     db: Session = Depends(get_db)
 ):
     """
     Full-text search across tools.
     """
-    results = SearchService.search_tools(
-        db,
-        query=q,
-        category=category,
-        price_min=price_min,
-        price_max=price_max,
-        features=features
-    )
-    return paginate(results)
+    try:
+        results = SearchService.search_tools(
+            db,
+            query=q,
+            category=category,
+            price_min=price_min,
+            price_max=price_max,
+            features=features,
+            sort_by=sort_by,
+            cursor=cursor,
+            limit=limit,
+            semantic=semantic
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {
+        "items": results["items"],
+        "next_cursor": results["next_cursor"],
+        "size": limit,
+        "total": results["total"],
+        "did_you_mean": results["did_you_mean"]
+    }
 
 @router.get("/trending", response_model=List[dict])
 def get_trending_tools(
@@ -41,9 +59,9 @@ def get_trending_tools(
     db: Session = Depends(get_db)
 ):
     """
-    Get trending tools based on query count and rating.
+    Get trending tools by views in the period, or by decayed views for "hot".
     """
-    valid_periods = ["24h", "7d", "30d"]
+    valid_periods = ["24h", "7d", "30d", "hot"]
     if period not in valid_periods:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
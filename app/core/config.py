@@ -50,11 +50,78 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
     
+    # Catalog writes reach every worker's in-memory indexes through catalog_changes
+    CATALOG_REFRESH_POLL_SECONDS: float = 5.0
+    CATALOG_CHANGE_LOOKBACK_SECONDS: float = 300.0
+    CATALOG_CHANGE_RETENTION_HOURS: float = 24.0
+    
+    # Search result cache
+    SEARCH_CACHE_MAX_ENTRIES: int = 1024
+    SEARCH_CACHE_MAX_IDS: int = 2000000
+    SEARCH_CACHE_TTL_SECONDS: int = 300
+    
+    # Queries with fewer exact matches than this get spelling correction
+    SEARCH_FUZZY_MIN_RESULTS: int = 3
+    
+    # Semantic search: nearest neighbours blended into relevance ranking
+    SEMANTIC_SEARCH_CANDIDATES: int = 100
+    SEMANTIC_MIN_SIMILARITY: float = 0.3
+    SEARCH_BATCH_MAX_QUERIES: int = 50
+    
+    # Search analytics, aggregated in memory and flushed in batches
+    SEARCH_ANALYTICS_FLUSH_SECONDS: int = 60
+    SEARCH_ANALYTICS_MAX_KEYS: int = 10000
+    
+    # Tool view counters, buffered in memory and written in batches
+    QUERY_STATS_FLUSH_SECONDS: float = 5.0
+    QUERY_STATS_FLUSH_EVENTS: int = 1000
+    
+    # Trending: decayed view counts and hourly/daily usage buckets
+    TRENDING_HALF_LIFE_HOURS: float = 72.0
+    TOOL_USAGE_HOURLY_RETENTION_HOURS: int = 72
+    TOOL_USAGE_DAILY_RETENTION_DAYS: int = 90
+    TOOL_USAGE_ROLLUP_SECONDS: int = 3600
+    
+    # Per-worker heavy-hitter sketches merged into a shared trending snapshot
+    TRENDING_SKETCH_DIR: str = "/tmp/devtools-hub-trending"
+    TRENDING_SKETCH_WIDTH: int = 2048
+    TRENDING_SKETCH_DEPTH: int = 4
+    TRENDING_SKETCH_CAPACITY: int = 256
+    TRENDING_SNAPSHOT_SIZE: int = 100
+    TRENDING_SKETCH_PUBLISH_SECONDS: float = 10.0
+    
+    # Seeds a stack recommendation is scored against
+    RECOMMENDATION_STACK_MAX_SEEDS: int = 20
+    
+    # Personalized PageRank rankings cached per seed set
+    GRAPH_RECOMMENDATION_CACHE_SIZE: int = 1024
+    
+    # Similar tools per tool in the tool_similarity table (0 workers = one per CPU).
+    # Catalog writes rescore their categories; the whole table is rebuilt every interval
+    SIMILARITY_JOB_WORKERS: int = 0
+    SIMILARITY_TOP_N: int = 50
+    SIMILARITY_MIN_SCORE: float = 0.0
+    SIMILARITY_REBUILD_INTERVAL_SECONDS: int = 21600
+    
     # Rate Limiting
     RATE_LIMIT_PER_HOUR: int = 1000
     ANONYMOUS_RATE_LIMIT: int = 100
+    # Anonymous clients are limited per IPv4 address or IPv6 prefix; least recently seen are evicted
+    ANONYMOUS_RATE_LIMIT_MAX_CLIENTS: int = 65536
+    ANONYMOUS_IPV6_PREFIX_LENGTH: int = 64
+    # Per-key limiter state is kept in memory; usage counters reach api_keys in batches
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # "shared": one budget per key across the workers on a host (memory-mapped file); "memory": per worker
+    RATE_LIMIT_BACKEND: str = "shared"
+    RATE_LIMIT_SHARED_DIR: str = "/tmp/devtools-hub-ratelimit"
+    RATE_LIMIT_SYNC_SECONDS: float = 10.0
     
     # API Key Settings
+    API_KEY_CACHE_MAX_ENTRIES: int = 10000
+    API_KEY_CACHE_TTL_SECONDS: float = 60.0
+    # Unknown, inactive and expired keys
+    API_KEY_CACHE_MAX_NEGATIVE_ENTRIES: int = 10000
+    API_KEY_CACHE_NEGATIVE_TTL_SECONDS: float = 30.0
     API_KEY_PREFIX: str = "xano_sk_"
     API_KEY_LENGTH: int = 40
     
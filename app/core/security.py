@@ -10,7 +10,7 @@ from pydantic import BaseModel
 from app.core.config import settings
 from app.database.session import get_db
 from app.models.user import User
-from app.models.api_key import APIKey
+from app.services.api_key_cache import api_key_cache
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -52,30 +52,16 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        # For API key authentication, the token is the API key itself
-        api_key = token
-        
-        # Look up the API key in the database
-        api_key_record = db.query(APIKey).filter(
-            APIKey.api_key == api_key,
-            APIKey.is_active == True,
-            (APIKey.expires_at.is_(None) | (APIKey.expires_at > datetime.utcnow()))
-        ).first()
-        
-        if not api_key_record:
-            raise credentials_exception
-            
-        # Get the associated user
-        user = db.query(User).filter(User.id == api_key_record.user_id).first()
-        if not user:
-            raise credentials_exception
-            
-        return user
-        
-    except Exception as e:
+    # For API key authentication, the token is the API key itself; the
+    # key and its user come from the resolution cache, loaded in one query
+    # on a miss, off the event loop
+    api_key_record = await api_key_cache.resolve_async(token, db)
+    if not api_key_record:
         raise credentials_exception
 
+    # Attach a copy of the cached user to this session without a query
+    return db.merge(api_key_record.user, load=False)
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
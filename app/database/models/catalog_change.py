@@ -0,0 +1,22 @@
+# app/database/models/catalog_change.py
+from sqlalchemy import Column, Integer, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.database.base import BaseModel
+
+class CatalogChange(BaseModel):
+    """
+    Tools and categories touched by one flush of a catalog write, written
+    in the writer's transaction. Every worker polls these to refresh its
+    in-memory indexes (see app.services.catalog_sync).
+    """
+    __tablename__ = "catalog_changes"
+    
+    tool_ids = Column(ARRAY(Integer), nullable=False)
+    category_ids = Column(ARRAY(Integer), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_catalog_changes_created_at", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<CatalogChange(id={self.id}, tools={len(self.tool_ids or [])}, categories={len(self.category_ids or [])})>"
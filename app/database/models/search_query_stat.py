@@ -0,0 +1,31 @@
+# app/database/models/search_query_stat.py
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.database.base import BaseModel
+
+class SearchQueryStat(BaseModel):
+    """
+    Search traffic for one normalized query and filter set, aggregated in
+    memory over one flush window.
+    """
+    __tablename__ = "search_query_stats"
+    
+    window_start = Column(DateTime(timezone=True), nullable=False)
+    window_end = Column(DateTime(timezone=True), nullable=False)
+    query = Column(Text, nullable=False)
+    filters = Column(Text, nullable=False, default="")
+    shape = Column(String(255), nullable=False, index=True)
+    request_count = Column(Integer, nullable=False, default=0)
+    zero_result_count = Column(Integer, nullable=False, default=0)
+    result_count_total = Column(BigInteger, nullable=False, default=0)
+    latency_total_ms = Column(Float, nullable=False, default=0)
+    latency_max_ms = Column(Float, nullable=False, default=0)
+    # Counts per bucket of app.services.search_analytics.LATENCY_BUCKETS_MS
+    latency_histogram = Column(ARRAY(Integer), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_search_query_stats_window_start", "window_start"),
+    )
+    
+    def __repr__(self):
+        return f"<SearchQueryStat(query='{self.query}', shape='{self.shape}', requests={self.request_count})>"
@@ -1,10 +1,14 @@
 # app/database/models/tool.py
-from sqlalchemy import Column, String, Text, Date, Boolean, Integer, ForeignKey
+from sqlalchemy import Column, String, Text, Date, DateTime, Boolean, Integer, ForeignKey, Index, Float
 from sqlalchemy.orm import relationship
 from app.database.base import BaseModel
+from app.database.search_vector import search_vector_column
 
 class Tool(BaseModel):
     __tablename__ = "tools"
+    __table_args__ = (
+        Index("ix_tools_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     name = Column(String(255), unique=True, nullable=False, index=True)
     slug = Column(String(255), unique=True, nullable=False, index=True)
@@ -18,6 +22,12 @@ class Tool(BaseModel):
     is_active = Column(Boolean, default=True)
     query_count = Column(Integer, default=0)
     last_queried_at = Column(DateTime(timezone=True))
+    # Exponentially decayed view count in log space, relative to a fixed
+    # epoch (see app.services.usage_service); orders by current trend
+    trending_score = Column(Float, index=True)
+    
+    # Kept up to date by Postgres and served from a GIN index
+    search_vector = search_vector_column()
     
     # Relationships
     category = relationship("Category", back_populates="tools")
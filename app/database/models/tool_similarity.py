@@ -0,0 +1,31 @@
+# app/database/models/tool_similarity.py
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from app.database.base import BaseModel
+
+class ToolSimilarity(BaseModel):
+    """
+    Most similar tools per tool within its category, as scored by
+    app.services.similarity.similarity_score (0-100), with the score's
+    components on the same scale. Kept up to date by the similarity
+    rebuild job; the rows of a category are replaced together.
+    """
+    __tablename__ = "tool_similarity"
+    
+    tool_id = Column(Integer, ForeignKey("tools.id", ondelete="CASCADE"), nullable=False)
+    similar_tool_id = Column(Integer, ForeignKey("tools.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+    rank = Column(Integer, nullable=False)
+    feature_score = Column(Float, nullable=False)
+    price_score = Column(Float, nullable=False)
+    integration_score = Column(Float, nullable=False)
+    rating_score = Column(Float, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_tool_similarity_tool_id_rank", "tool_id", "rank"),
+        # Finds the tools listing a changed tool as a neighbour
+        Index("ix_tool_similarity_similar_tool_id", "similar_tool_id"),
+    )
+    
+    def __repr__(self):
+        return f"<ToolSimilarity(tool_id={self.tool_id}, similar_tool_id={self.similar_tool_id}, score={self.score})>"
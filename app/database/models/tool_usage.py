@@ -0,0 +1,38 @@
+# app/database/models/tool_usage.py
+from sqlalchemy import Column, Integer, BigInteger, Date, DateTime, ForeignKey, UniqueConstraint
+from app.database.base import BaseModel
+
+class ToolUsageHourly(BaseModel):
+    """
+    Views of one tool in one UTC hour, filled from the batched view counter
+    flushes. Rolled up into ToolUsageDaily and kept for a short retention.
+    """
+    __tablename__ = "tool_usage_hourly"
+    
+    tool_id = Column(Integer, ForeignKey("tools.id", ondelete="CASCADE"), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False, index=True)
+    views = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("tool_id", "bucket_start", name="uq_tool_usage_hourly_tool_bucket"),
+    )
+    
+    def __repr__(self):
+        return f"<ToolUsageHourly(tool_id={self.tool_id}, bucket_start={self.bucket_start}, views={self.views})>"
+
+class ToolUsageDaily(BaseModel):
+    """
+    Views of one tool in one UTC day, rolled up from ToolUsageHourly.
+    """
+    __tablename__ = "tool_usage_daily"
+    
+    tool_id = Column(Integer, ForeignKey("tools.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False, index=True)
+    views = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("tool_id", "day", name="uq_tool_usage_daily_tool_day"),
+    )
+    
+    def __repr__(self):
+        return f"<ToolUsageDaily(tool_id={self.tool_id}, day={self.day}, views={self.views})>"
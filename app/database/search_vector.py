@@ -0,0 +1,20 @@
+# app/database/search_vector.py
+from sqlalchemy import Column, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+# Weighted full-text document of a tool: name > tagline > description
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tagline, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def search_vector_column():
+    """
+    The tools.search_vector column, generated and stored by Postgres from
+    SEARCH_VECTOR_EXPRESSION (migration 0001). Deferred: it is only read
+    inside queries.
+    """
+    return deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
@@ -7,7 +7,21 @@ from fastapi_pagination import add_pagination
 from app.api.v1.api import api_router
 from app.core.config import settings
 from app.middleware.rate_limit import rate_limit_middleware
-from app.tasks.background import start_background_tasks
+from app.tasks.background import (
+    start_background_tasks,
+    flush_search_analytics_now,
+    flush_query_stats_now,
+    publish_trending_sketch_now,
+    flush_api_key_usage_now
+)
+from app.services.query_stats_buffer import query_stats_buffer
+from app.database.session import SessionLocal
+from app.services.catalog_sync import rebuild_indexes, catalog_refresher
+from app.services.semantic_index import semantic_index
+from app.services.similarity_job import similarity_job
+from app.services.recommendation_index import recommendation_index
+from app.services.trending_sketch import trending_sketch
+import app.services.search_index  # noqa: F401  registers the search index
 import logging
 
 # Configure logging
@@ -42,6 +56,43 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 # Add pagination support
 add_pagination(app)
 
+@app.on_event("startup")
+def build_catalog_indexes():
+    db = SessionLocal()
+    try:
+        rebuild_indexes(db)
+    except Exception:
+        logger.exception("Failed to build catalog indexes, search will fall back to SQL")
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def seed_trending_sketch():
+    db = SessionLocal()
+    try:
+        trending_sketch.seed(db)
+    except Exception:
+        logger.exception("Failed to seed trending sketch, hot trending will count views since startup")
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_tasks():
+    start_background_tasks(app)
+
+@app.on_event("shutdown")
+def flush_pending_stats():
+    flush_search_analytics_now()
+    # Release the flusher waiting on the next interval, then write what is left
+    query_stats_buffer.wake()
+    catalog_refresher.wake()
+    semantic_index.wake()
+    similarity_job.wake()
+    recommendation_index.wake()
+    flush_query_stats_now()
+    publish_trending_sketch_now()
+    flush_api_key_usage_now()
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     logger.info(f"Request: {request.method} {request.url}")
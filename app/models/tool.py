@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Date, Boolean, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.base import BaseModel
+from app.database.search_vector import search_vector_column
 
 class Tool(BaseModel):
     __tablename__ = "tools"
+    __table_args__ = (
+        Index("ix_tools_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -19,6 +23,11 @@ class Tool(BaseModel):
     is_active = Column(Boolean, default=True)
     query_count = Column(Integer, default=0)
     last_queried_at = Column(DateTime(timezone=True))
+    # Exponentially decayed view count in log space, relative to a fixed
+    # epoch (see app.services.usage_service); orders by current trend
+    trending_score = Column(Float, index=True)
+    # Kept up to date by Postgres and served from a GIN index
+    search_vector = search_vector_column()
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
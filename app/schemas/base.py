@@ -1,8 +1,10 @@
 # app/schemas/base.py
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Generic, TypeVar
 from datetime import datetime
 
+T = TypeVar("T")
+
 class BaseSchema(BaseModel):
     id: int
     created_at: datetime
@@ -13,4 +15,13 @@ class PaginatedResponse(BaseModel):
     total: int
     page: int
     size: int
-    pages: int
\ No newline at end of file
+    pages: int
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    size: int
+    total: Optional[int] = None
+
+class SearchPage(CursorPage[T], Generic[T]):
+    did_you_mean: Optional[str] = None
@@ -0,0 +1,33 @@
+# app/schemas/search.py
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+
+from app.core.config import settings
+
+class SearchQuerySpec(BaseModel):
+    q: str = Field(..., min_length=1, max_length=500)
+    category: Optional[str] = None
+    price_min: Optional[float] = Field(None, ge=0)
+    price_max: Optional[float] = Field(None, gt=0)
+    features: Optional[List[str]] = None
+    sort_by: str = "relevance"
+    cursor: Optional[str] = None
+    size: int = Field(10, ge=1, le=100)
+    semantic: float = Field(0.0, ge=0, le=1)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchQuerySpec] = Field(..., min_length=1, max_length=settings.SEARCH_BATCH_MAX_QUERIES)
+
+class BatchSearchResult(BaseModel):
+    items: List[Dict[str, Any]] = []
+    total: int = 0
+    size: int
+    next_cursor: Optional[str] = None
+    did_you_mean: Optional[str] = None
+    error: Optional[str] = None
+    took_ms: float
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchResult]
+    fetch_ms: float
+    took_ms: float
@@ -37,6 +37,15 @@ class Tool(ToolBase):
     avg_price: Optional[float] = None
     avg_rating: Optional[float] = None
 
+    class Config:
+        from_attributes = True
+
+class ToolAlternative(Tool):
+    similarity_score: float
+    feature_similarity: Optional[float] = None
+    integration_similarity: Optional[float] = None
+    match_basis: str
+
 class ToolDetail(ToolInDB):
     pricing_tiers: List[PricingTier] = []
     reviews: Optional[ReviewAggregate] = None
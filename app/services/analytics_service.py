@@ -9,6 +9,8 @@ from app.models.tool import Tool
 from app.models.category import Category
 from app.models.pricing import PricingTier
 from app.database.models.integration import Integration
+from app.database.models.search_query_stat import SearchQueryStat
+from app.services.search_analytics import histogram_percentile, LATENCY_BUCKETS_MS
 
 class AnalyticsService:
     @staticmethod
@@ -231,4 +233,106 @@ class AnalyticsService:
         return {
             "nodes": nodes,
             "edges": edges
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def get_search_report(
+        db: Session,
+        period: str = "24h",
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Top queries, zero-result queries and latency percentiles per query
+        shape over the period, from the persisted stats: searches still
+        pending in memory show up after the next flush
+        (SEARCH_ANALYTICS_FLUSH_SECONDS).
+        """
+        now = datetime.utcnow()
+        if period == "7d":
+            since = now - timedelta(days=7)
+        elif period == "30d":
+            since = now - timedelta(days=30)
+        else:  # 24h
+            since = now - timedelta(days=1)
+        
+        # Windows last one flush interval; window_start is the indexed column
+        in_period = SearchQueryStat.window_start >= since
+        
+        requests = func.sum(SearchQueryStat.request_count)
+        zero_results = func.sum(SearchQueryStat.zero_result_count)
+        results_total = func.sum(SearchQueryStat.result_count_total)
+        
+        top_queries = db.query(
+            SearchQueryStat.query,
+            SearchQueryStat.filters,
+            requests.label("requests"),
+            zero_results.label("zero_results"),
+            results_total.label("results_total")
+        ).filter(in_period).group_by(
+            SearchQueryStat.query,
+            SearchQueryStat.filters
+        ).order_by(requests.desc()).limit(limit).all()
+        
+        zero_result_queries = db.query(
+            SearchQueryStat.query,
+            SearchQueryStat.filters,
+            requests.label("requests"),
+            zero_results.label("zero_results")
+        ).filter(
+            in_period,
+            SearchQueryStat.zero_result_count > 0
+        ).group_by(
+            SearchQueryStat.query,
+            SearchQueryStat.filters
+        ).order_by(zero_results.desc()).limit(limit).all()
+        
+        # Histograms are summed bucket by bucket in SQL (arrays are 1-based)
+        bucket_sums = [
+            func.sum(SearchQueryStat.latency_histogram[i + 1])
+            for i in range(len(LATENCY_BUCKETS_MS) + 1)
+        ]
+        shapes = db.query(
+            SearchQueryStat.shape,
+            requests,
+            func.sum(SearchQueryStat.latency_total_ms),
+            func.max(SearchQueryStat.latency_max_ms),
+            *bucket_sums
+        ).filter(in_period).group_by(SearchQueryStat.shape).all()
+        
+        latency_by_shape = []
+        for shape, count, latency_total, latency_max, *histogram in shapes:
+            histogram = [int(c or 0) for c in histogram]
+            latency_by_shape.append({
+                "shape": shape,
+                "requests": int(count),
+                "avg_ms": round(latency_total / count, 2) if count else None,
+                "p50_ms": histogram_percentile(histogram, 0.5, latency_max),
+                "p95_ms": histogram_percentile(histogram, 0.95, latency_max),
+                "max_ms": round(latency_max, 2)
+            })
+        latency_by_shape.sort(key=lambda row: (-(row["p95_ms"] or 0), -row["requests"]))
+        
+        return {
+            "period": period,
+            "since": since.isoformat(),
+            "top_queries": [
+                {
+                    "query": row.query,
+                    "filters": row.filters,
+                    "requests": int(row.requests),
+                    "zero_results": int(row.zero_results),
+                    "avg_results": round(row.results_total / row.requests, 2) if row.requests else 0
+                }
+                for row in top_queries
+            ],
+            "zero_result_queries": [
+                {
+                    "query": row.query,
+                    "filters": row.filters,
+                    "requests": int(row.requests),
+                    "zero_results": int(row.zero_results)
+                }
+                for row in zero_result_queries
+            ],
+            "latency_by_shape": latency_by_shape[:limit]
+        }
@@ -0,0 +1,338 @@
+# app/services/api_key_cache.py
+from typing import Dict, Any, Optional, Iterable
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.models.api_key import APIKey
+from app.models.user import User, UserTier
+
+logger = logging.getLogger(__name__)
+
+_INVALIDATIONS = "api_key_cache_invalidations"
+
+
+class ResolvedAPIKey:
+    """What authenticating a request needs from an active API key and its owner"""
+
+    def __init__(
+        self,
+        api_key_id: int,
+        user_id: int,
+        tier: UserTier,
+        rate_limit: int,
+        requests_this_hour: Optional[int],
+        last_request_at: Optional[datetime],
+        expires_at: Optional[datetime],
+        user: User
+    ):
+        self.api_key_id = api_key_id
+        self.user_id = user_id
+        self.tier = tier
+        self.rate_limit = rate_limit
+        self.requests_this_hour = requests_this_hour
+        self.last_request_at = last_request_at
+        self.expires_at = expires_at
+        # Detached and never modified; attach a copy with Session.merge(user, load=False)
+        self.user = user
+
+
+class SharedGeneration:
+    """
+    One word in a memory-mapped file that every worker on the host reads.
+    Writing a fresh value tells the other workers their caches are stale.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < 8:
+                os.ftruncate(fd, 8)
+            self._map = mmap.mmap(fd, 8)
+        finally:
+            os.close(fd)
+
+    def read(self) -> int:
+        return struct.unpack_from("<Q", self._map, 0)[0]
+
+    def bump(self) -> None:
+        struct.pack_into("<Q", self._map, 0, time.time_ns())
+
+
+class APIKeyCache:
+    """
+    LRU + TTL cache resolving an API key string to its key record, owner
+    and tier in one query on a miss. Unknown, inactive and expired keys
+    are cached too (negatively, shorter, in their own LRU so a flood of
+    bad keys cannot evict good ones). An entry never outlives its key's
+    expires_at, and API key or user writes drop the affected entries once
+    their transaction commits, in this worker and, through the shared
+    generation, in the others on the host.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_negative_entries: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        shared_generation: Optional[SharedGeneration] = None
+    ):
+        self.max_entries = max_entries
+        self.max_negative_entries = max_negative_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._shared = shared_generation
+        self._shared_seen = shared_generation.read() if shared_generation else 0
+        self._lock = threading.Lock()
+        # api key -> (expires at, resolved key)
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        # api key -> expires at
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        # Bumped on every invalidation; a load that raced one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync_locked(self) -> None:
+        if self._shared is None:
+            return
+        shared = self._shared.read()
+        if shared != self._shared_seen:
+            self._shared_seen = shared
+            self._clear_locked()
+
+    def _clear_locked(self) -> None:
+        self._entries.clear()
+        self._negative.clear()
+        self._generation += 1
+        self.invalidations += 1
+
+    def _get_locked(self, api_key: str):
+        """(found, resolved) for a cached key; resolved is None for a cached miss"""
+        now = time.monotonic()
+        entry = self._entries.get(api_key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(api_key)
+                return True, entry[1]
+            del self._entries[api_key]
+        expires_at = self._negative.get(api_key)
+        if expires_at is not None:
+            if expires_at > now:
+                return True, None
+            del self._negative[api_key]
+        return False, None
+
+    def resolve(self, api_key: str, db: Optional[Session] = None) -> Optional[ResolvedAPIKey]:
+        """
+        The active, unexpired key for api_key, or None. On a miss it is
+        loaded with db, or with a short-lived session when db is None.
+        """
+        found, resolved, generation = self._lookup(api_key)
+        if found:
+            return resolved
+        return self._fill(api_key, db, generation)
+
+    async def resolve_async(self, api_key: str, db: Optional[Session] = None) -> Optional[ResolvedAPIKey]:
+        """
+        resolve for async callers: a hit is answered in the event loop, a
+        miss queries the database in the threadpool so it never blocks it.
+        """
+        found, resolved, generation = self._lookup(api_key)
+        if found:
+            return resolved
+        return await run_in_threadpool(self._fill, api_key, db, generation)
+
+    def _lookup(self, api_key: str):
+        """(found, resolved, generation to fill a miss at)"""
+        with self._lock:
+            self._sync_locked()
+            found, resolved = self._get_locked(api_key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found, resolved, self._generation
+
+    def _fill(self, api_key: str, db: Optional[Session], generation: int) -> Optional[ResolvedAPIKey]:
+        if db is None:
+            session = SessionLocal()
+            try:
+                resolved = self._load(session, api_key)
+            finally:
+                session.close()
+        else:
+            resolved = self._load(db, api_key)
+
+        with self._lock:
+            self._sync_locked()
+            if self._generation == generation:
+                self._store_locked(api_key, resolved)
+        return resolved
+
+    @staticmethod
+    def _load(db: Session, api_key: str) -> Optional[ResolvedAPIKey]:
+        row = db.query(APIKey, User).join(User, User.id == APIKey.user_id).filter(
+            APIKey.api_key == api_key,
+            APIKey.is_active == True,
+            (APIKey.expires_at.is_(None) | (APIKey.expires_at > datetime.utcnow()))
+        ).first()
+        if row is None:
+            return None
+        key, user = row
+        # The cached user must not expire with the caller's next commit
+        db.expunge(user)
+        return ResolvedAPIKey(
+            api_key_id=key.id,
+            user_id=key.user_id,
+            tier=key.tier,
+            rate_limit=key.rate_limit,
+            requests_this_hour=key.requests_this_hour,
+            last_request_at=key.last_request_at,
+            expires_at=key.expires_at,
+            user=user
+        )
+
+    def _store_locked(self, api_key: str, resolved: Optional[ResolvedAPIKey]) -> None:
+        now = time.monotonic()
+        if resolved is None:
+            self._negative[api_key] = now + self.negative_ttl_seconds
+            self._negative.move_to_end(api_key)
+            while len(self._negative) > self.max_negative_entries:
+                self._negative.popitem(last=False)
+            return
+        expires_at = now + self.ttl_seconds
+        if resolved.expires_at is not None:
+            expires_at = min(expires_at, now + (resolved.expires_at - datetime.utcnow()).total_seconds())
+        self._entries[api_key] = (expires_at, resolved)
+        self._entries.move_to_end(api_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, api_keys: Iterable[str] = (), user_ids: Iterable[int] = ()) -> None:
+        api_keys, user_ids = set(api_keys), set(user_ids)
+        with self._lock:
+            for api_key in api_keys:
+                self._entries.pop(api_key, None)
+                self._negative.pop(api_key, None)
+            if user_ids:
+                for api_key in [k for k, (_, r) in self._entries.items() if r.user_id in user_ids]:
+                    del self._entries[api_key]
+            self._generation += 1
+            self.invalidations += 1
+        if self._shared is not None:
+            self._shared.bump()
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._clear_locked()
+        if self._shared is not None:
+            self._shared.bump()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "negative_entries": len(self._negative),
+                "max_entries": self.max_entries,
+                "max_negative_entries": self.max_negative_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "negative_ttl_seconds": self.negative_ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations
+            }
+
+
+def _create_cache() -> APIKeyCache:
+    shared = None
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        path = os.path.join(settings.RATE_LIMIT_SHARED_DIR, "api-key-cache.generation")
+        try:
+            shared = SharedGeneration(path)
+        except OSError as e:
+            logger.warning(f"Shared API key cache generation unavailable at {path} ({e}), invalidating per worker")
+    return APIKeyCache(
+        max_entries=settings.API_KEY_CACHE_MAX_ENTRIES,
+        max_negative_entries=settings.API_KEY_CACHE_MAX_NEGATIVE_ENTRIES,
+        ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS,
+        negative_ttl_seconds=settings.API_KEY_CACHE_NEGATIVE_TTL_SECONDS,
+        shared_generation=shared
+    )
+
+
+api_key_cache = _create_cache()
+
+
+# Invalidation: writes are collected on the session and applied after
+# commit, so a concurrent miss cannot re-cache the old row afterwards.
+
+def _pending(session: Optional[Session]) -> Optional[Dict[str, Any]]:
+    if session is None:
+        return None
+    return session.info.setdefault(_INVALIDATIONS, {"api_keys": set(), "user_ids": set(), "all": False})
+
+
+@event.listens_for(APIKey, "after_insert")
+@event.listens_for(APIKey, "after_update")
+@event.listens_for(APIKey, "after_delete")
+def _api_key_written(mapper, connection, target: APIKey) -> None:
+    pending = _pending(object_session(target))
+    if pending is not None:
+        pending["api_keys"].add(target.api_key)
+        # A changed key string leaves the old one behind
+        pending["api_keys"].update(inspect(target).attrs.api_key.history.deleted or ())
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_written(mapper, connection, target: User) -> None:
+    pending = _pending(object_session(target))
+    if pending is not None:
+        pending["user_ids"].add(target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_written(orm_execute_state) -> None:
+    # Bulk UPDATE/DELETE bypass the mapper events; drop everything unless
+    # the statement says it only touches usage counters
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (APIKey, User):
+        return
+    if orm_execute_state.execution_options.get("preserves_api_key_cache"):
+        return
+    _pending(orm_execute_state.session)["all"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    pending = session.info.pop(_INVALIDATIONS, None)
+    if not pending:
+        return
+    if pending["all"]:
+        api_key_cache.invalidate_all()
+    elif pending["api_keys"] or pending["user_ids"]:
+        api_key_cache.invalidate(pending["api_keys"], pending["user_ids"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(_INVALIDATIONS, None)
@@ -0,0 +1,312 @@
+# app/services/catalog_sync.py
+from typing import List, Dict, Any, Optional, Iterable, Set
+from datetime import datetime, timedelta
+import itertools
+import logging
+import threading
+
+from sqlalchemy import event, inspect, func, insert, delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.database.models.catalog_change import CatalogChange
+from app.models.tool import Tool
+from app.models.category import Category
+from app.models.pricing import PricingTier
+from app.models.feature import Feature
+from app.models.review import ReviewAggregate
+from app.database.models.integration import Integration
+
+logger = logging.getLogger(__name__)
+
+# In-memory structures fed from the catalog. Each one implements
+# rebuild(documents), upsert(documents) and remove(tool_ids).
+_indexes: List[Any] = []
+# Caches of results read from those indexes, same interface; applied
+# after every index so they are cleared once the indexes agree
+_caches: List[Any] = []
+
+_CHANGED_KEY = "catalog_changed"
+
+# Usage counters bumped on every view; they must not trigger a re-index
+_STATS_COLUMNS = frozenset({"query_count", "last_queried_at", "trending_score", "updated_at"})
+
+
+def register_index(index, cache: bool = False):
+    """
+    Register an in-memory index to be built at startup and kept in sync
+    with catalog writes. A cache of results computed from the indexes is
+    registered with cache=True: whatever the import order, it is rebuilt
+    and refreshed after all of them, so a result computed while an index
+    is still applying a change is never kept.
+    """
+    (_caches if cache else _indexes).append(index)
+    return index
+
+
+def _registered() -> List[Any]:
+    return _indexes + _caches
+
+
+def load_tool_documents(db: Session, tool_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Load a flat document per active tool with everything the in-memory
+    indexes need, without touching ORM relationships.
+    """
+    query = db.query(
+        Tool.id,
+        Tool.name,
+        Tool.slug,
+        Tool.tagline,
+        Tool.description,
+        Tool.category_id,
+        Tool.query_count,
+        Category.name.label("category_name"),
+        Category.slug.label("category_slug")
+    ).outerjoin(
+        Category, Category.id == Tool.category_id
+    ).filter(Tool.is_active == True)
+
+    feature_query = db.query(Feature.tool_id, Feature.feature_name).filter(
+        Feature.is_available == True
+    )
+
+    price_query = db.query(PricingTier.tool_id, PricingTier.monthly_price).filter(
+        PricingTier.is_current == True,
+        PricingTier.monthly_price.isnot(None)
+    )
+
+    integration_query = db.query(Integration.tool_id, Integration.integrates_with)
+
+    rating_query = db.query(
+        ReviewAggregate.tool_id,
+        func.avg(ReviewAggregate.avg_rating)
+    ).group_by(ReviewAggregate.tool_id)
+
+    if tool_ids is not None:
+        tool_ids = list(tool_ids)
+        query = query.filter(Tool.id.in_(tool_ids))
+        feature_query = feature_query.filter(Feature.tool_id.in_(tool_ids))
+        price_query = price_query.filter(PricingTier.tool_id.in_(tool_ids))
+        integration_query = integration_query.filter(Integration.tool_id.in_(tool_ids))
+        rating_query = rating_query.filter(ReviewAggregate.tool_id.in_(tool_ids))
+
+    features: Dict[int, List[str]] = {}
+    for tool_id, feature_name in feature_query.all():
+        features.setdefault(tool_id, []).append(feature_name)
+
+    # Every current tier price: the price filter matches any of them
+    prices: Dict[int, List[float]] = {}
+    for tool_id, monthly_price in price_query.all():
+        prices.setdefault(tool_id, []).append(float(monthly_price))
+
+    integrations: Dict[int, List[int]] = {}
+    for tool_id, integrates_with in integration_query.all():
+        integrations.setdefault(tool_id, []).append(integrates_with)
+
+    ratings = {
+        tool_id: float(rating)
+        for tool_id, rating in rating_query.all()
+        if rating is not None
+    }
+
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "slug": row.slug,
+            "tagline": row.tagline,
+            "description": row.description,
+            "category_id": row.category_id,
+            "category_name": row.category_name,
+            "category_slug": row.category_slug,
+            "query_count": row.query_count or 0,
+            "features": features.get(row.id, []),
+            "prices": sorted(prices.get(row.id, [])),
+            "min_price": min(prices[row.id]) if row.id in prices else None,
+            "avg_price": sum(prices[row.id]) / len(prices[row.id]) if row.id in prices else None,
+            "integrations": integrations.get(row.id, []),
+            "rating": ratings.get(row.id)
+        }
+        for row in query.all()
+    ]
+
+
+def rebuild_indexes(db: Session) -> None:
+    """
+    Build every registered index from scratch.
+    """
+    documents = load_tool_documents(db)
+    for index in _registered():
+        index.rebuild(documents)
+    logger.info(f"Built {len(_indexes)} catalog indexes over {len(documents)} tools")
+
+
+def refresh_tools(
+    tool_ids: Set[int],
+    category_ids: Optional[Set[int]] = None,
+    db: Optional[Session] = None
+) -> None:
+    """
+    Re-read the given tools (and every tool in the given categories) and
+    push them into every registered index. Tools that were deleted or
+    deactivated are removed. Uses db if given, else a short-lived session.
+    """
+    if not _registered() or not (tool_ids or category_ids):
+        return
+
+    tool_ids = set(tool_ids or ())
+    session = db or SessionLocal()
+    try:
+        if category_ids:
+            tool_ids.update(
+                tool_id for tool_id, in session.query(Tool.id).filter(Tool.category_id.in_(list(category_ids)))
+            )
+        documents = load_tool_documents(session, tool_ids)
+    finally:
+        if db is None:
+            session.close()
+
+    removed = tool_ids - {doc["id"] for doc in documents}
+    for index in _registered():
+        try:
+            if documents:
+                index.upsert(documents)
+            if removed:
+                index.remove(removed)
+        except Exception:
+            logger.exception(f"Failed to refresh {type(index).__name__} for tools {sorted(tool_ids)}")
+
+
+class CatalogRefresher:
+    """
+    Applies catalog writes to the registered indexes off the request path.
+    A writer records the ids it touched in catalog_changes inside its own
+    transaction and, on commit, only wakes this worker's refresher. Every
+    worker polls catalog_changes every poll_seconds, so writes made in
+    other workers (or on other hosts) reach its indexes as well.
+
+    A row's created_at is its writing transaction's start, so rows are
+    re-read for lookback_seconds: a transaction committing up to that long
+    after it started is still picked up. Refreshing is idempotent and rows
+    already applied are skipped. Rows older than retention_hours are
+    deleted.
+    """
+
+    def __init__(self, poll_seconds: float = 5.0, lookback_seconds: float = 300.0, retention_hours: float = 24.0):
+        self.poll_seconds = poll_seconds
+        self.lookback = timedelta(seconds=lookback_seconds)
+        self.retention = timedelta(hours=retention_hours)
+        self._due = threading.Event()
+        self._lock = threading.Lock()
+        self._since: Optional[datetime] = None
+        # change id -> created_at, for rows still inside the lookback
+        self._applied: Dict[int, datetime] = {}
+        self._pruned_at: Optional[datetime] = None
+
+    def wait_until_due(self) -> None:
+        """Block until the poll interval passes or a local write commits"""
+        self._due.wait(self.poll_seconds)
+        self._due.clear()
+
+    def wake(self) -> None:
+        self._due.set()
+
+    def refresh(self, db: Session) -> int:
+        """
+        Apply catalog changes not yet seen by this worker. Returns the
+        number of change rows applied.
+        """
+        with self._lock:
+            # The database clock, which also stamped created_at
+            now = db.query(func.now()).scalar()
+            since = (self._since or now) - self.lookback
+            rows = db.query(
+                CatalogChange.id,
+                CatalogChange.tool_ids,
+                CatalogChange.category_ids,
+                CatalogChange.created_at
+            ).filter(
+                CatalogChange.created_at >= since
+            ).order_by(CatalogChange.id).all()
+
+            fresh = [row for row in rows if row.id not in self._applied]
+            if fresh:
+                tool_ids: Set[int] = set()
+                category_ids: Set[int] = set()
+                for row in fresh:
+                    tool_ids.update(row.tool_ids or ())
+                    category_ids.update(row.category_ids or ())
+                refresh_tools(tool_ids, category_ids, db)
+                for row in fresh:
+                    self._applied[row.id] = row.created_at
+
+            self._since = now
+            self._applied = {
+                change_id: created_at for change_id, created_at in self._applied.items()
+                if created_at >= now - self.lookback
+            }
+            if self._pruned_at is None or now - self._pruned_at > timedelta(hours=1):
+                db.execute(delete(CatalogChange).where(CatalogChange.created_at < now - self.retention))
+                self._pruned_at = now
+            db.commit()
+        if fresh:
+            logger.debug(f"Applied {len(fresh)} catalog changes")
+        return len(fresh)
+
+
+catalog_refresher = CatalogRefresher(
+    poll_seconds=settings.CATALOG_REFRESH_POLL_SECONDS,
+    lookback_seconds=settings.CATALOG_CHANGE_LOOKBACK_SECONDS,
+    retention_hours=settings.CATALOG_CHANGE_RETENTION_HOURS
+)
+
+
+def _only_stats_changed(obj) -> bool:
+    state = inspect(obj)
+    modified = {
+        attr.key for attr in state.attrs
+        if attr.history.has_changes()
+    }
+    return modified <= _STATS_COLUMNS
+
+
+def _track_catalog_writes(session: Session, flush_context) -> None:
+    changed: Set[int] = set()
+    changed_categories: Set[int] = set()
+    dirty = session.dirty
+    for obj in itertools.chain(session.new, dirty, session.deleted):
+        if isinstance(obj, Tool):
+            if obj in dirty and _only_stats_changed(obj):
+                continue
+            changed.add(obj.id)
+        elif isinstance(obj, (Feature, PricingTier, ReviewAggregate, Integration)):
+            changed.add(obj.tool_id)
+        elif isinstance(obj, Category):
+            changed_categories.add(obj.id)
+    changed.discard(None)
+    changed_categories.discard(None)
+    if not (changed or changed_categories):
+        return
+    # Same transaction as the write: the change is logged if and only if
+    # the write commits. The connection skips autoflush inside the flush.
+    session.connection().execute(insert(CatalogChange.__table__).values(
+        tool_ids=sorted(changed),
+        category_ids=sorted(changed_categories)
+    ))
+    session.info[_CHANGED_KEY] = True
+
+
+def _apply_catalog_writes(session: Session) -> None:
+    if session.info.pop(_CHANGED_KEY, None):
+        catalog_refresher.wake()
+
+
+def _discard_catalog_writes(session: Session, *args) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+event.listen(SessionLocal, "after_flush", _track_catalog_writes)
+event.listen(SessionLocal, "after_commit", _apply_catalog_writes)
+event.listen(SessionLocal, "after_rollback", _discard_catalog_writes)
@@ -0,0 +1,217 @@
+# app/services/facet_index.py
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Union
+import threading
+
+from app.services.catalog_sync import register_index
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+PRICE_BANDS = [
+    ("free", "Free", 0.0, 0.01),
+    ("under_10", "Under $10", 0.01, 10.0),
+    ("10_50", "$10 - $50", 10.0, 50.0),
+    ("50_100", "$50 - $100", 50.0, 100.0),
+    ("over_100", "$100+", 100.0, float("inf")),
+]
+
+PRICE_BAND_LABELS = {key: label for key, label, _, _ in PRICE_BANDS}
+
+FACETS = ("categories", "price_ranges", "features")
+
+Container = Union[int, set]
+
+
+def popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def bitmap_from_positions(positions: Iterable[int]) -> int:
+    """
+    Build an int bitmap in one allocation instead of OR-ing bit by bit,
+    which would copy the growing int once per position.
+    """
+    positions = list(positions)
+    if not positions:
+        return 0
+    buf = bytearray(max(positions) // 8 + 1)
+    for p in positions:
+        buf[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buf, "little")
+
+
+def price_band(price: Optional[float]) -> Optional[str]:
+    if price is None:
+        return None
+    for key, _, low, high in PRICE_BANDS:
+        if low <= price < high:
+            return key
+    return None
+
+
+class FacetIndex:
+    """
+    Facet counts over the catalog. Every tool gets a bit position and every
+    facet value keeps the positions of its tools, so counting a facet for a
+    result set is an AND plus a popcount.
+
+    Rare values are kept as plain position sets, since a Python int bitmap
+    costs max_position / 8 bytes no matter how few bits are set; a value is
+    promoted to an int bitmap once it holds more than 1/SPARSE_RATIO of
+    the positions.
+    """
+
+    SPARSE_RATIO = 512
+    MAX_FEATURE_VALUES = 25
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        self._positions: Dict[int, int] = {}
+        self._free_positions: List[int] = []
+        self._next_position = 0
+        # facet -> value key -> container of positions
+        self._values: Dict[str, Dict[str, Container]] = {facet: {} for facet in FACETS}
+        self._labels: Dict[str, Dict[str, str]] = {facet: {} for facet in FACETS}
+        # tool_id -> [(facet, value key)]
+        self._doc_values: Dict[int, List[Tuple[str, str]]] = {}
+        self._all_bits = 0
+
+    @staticmethod
+    def _document_values(doc: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        values = []
+        if doc.get("category_slug"):
+            values.append(("categories", doc["category_slug"], doc.get("category_name") or doc["category_slug"]))
+        # A tool counts in every band it has a current tier in, as the
+        # price filter matches any tier in range
+        bands = {price_band(price) for price in doc.get("prices") or ()}
+        for key, label, _, _ in PRICE_BANDS:
+            if key in bands:
+                values.append(("price_ranges", key, label))
+        seen = set()
+        for name in doc.get("features") or []:
+            key = name.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                values.append(("features", key, name.strip()))
+        return values
+
+    def _add_locked(self, doc: Dict[str, Any], promote: bool = True) -> None:
+        if self._free_positions:
+            position = self._free_positions.pop()
+        else:
+            position = self._next_position
+            self._next_position += 1
+        tool_id = doc["id"]
+        self._positions[tool_id] = position
+        if promote:
+            self._all_bits |= 1 << position
+
+        doc_values = []
+        sparse_limit = max(1, self._next_position // self.SPARSE_RATIO)
+        for facet, key, label in self._document_values(doc):
+            values = self._values[facet]
+            container = values.get(key)
+            if container is None:
+                container = values[key] = set()
+            if isinstance(container, set):
+                container.add(position)
+                if promote and len(container) > sparse_limit:
+                    values[key] = bitmap_from_positions(container)
+            else:
+                values[key] = container | (1 << position)
+            self._labels[facet].setdefault(key, label)
+            doc_values.append((facet, key))
+        self._doc_values[tool_id] = doc_values
+
+    def _promote_all_locked(self) -> None:
+        sparse_limit = max(1, self._next_position // self.SPARSE_RATIO)
+        self._all_bits = bitmap_from_positions(self._positions.values())
+        for values in self._values.values():
+            for key, container in values.items():
+                if isinstance(container, set) and len(container) > sparse_limit:
+                    values[key] = bitmap_from_positions(container)
+
+    def _remove_locked(self, tool_id: int) -> None:
+        position = self._positions.pop(tool_id, None)
+        if position is None:
+            return
+        mask = ~(1 << position)
+        self._all_bits &= mask
+        for facet, key in self._doc_values.pop(tool_id, ()):
+            values = self._values[facet]
+            container = values[key]
+            if isinstance(container, set):
+                container.discard(position)
+                empty = not container
+            else:
+                container &= mask
+                values[key] = container
+                empty = container == 0
+            if empty:
+                del values[key]
+                del self._labels[facet][key]
+        self._free_positions.append(position)
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            for doc in documents:
+                self._add_locked(doc, promote=False)
+            self._promote_all_locked()
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_locked(doc)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+
+    def counts(self, tool_ids: Optional[Iterable[int]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Count every facet value within the given tools (the whole catalog
+        when tool_ids is None) in a single pass over the facet bitmaps.
+        """
+        with self._lock:
+            if tool_ids is None:
+                result_bits = self._all_bits
+                result_positions = None
+            else:
+                result_positions = {
+                    self._positions[tool_id]
+                    for tool_id in tool_ids
+                    if tool_id in self._positions
+                }
+                result_bits = bitmap_from_positions(result_positions)
+
+            facets = {}
+            for facet in FACETS:
+                labels = self._labels[facet]
+                entries = []
+                for key, container in self._values[facet].items():
+                    if isinstance(container, set):
+                        if result_positions is None:
+                            count = len(container)
+                        else:
+                            count = len(container & result_positions)
+                    else:
+                        count = popcount(container & result_bits)
+                    if count:
+                        entries.append({"value": key, "label": labels[key], "count": count})
+                facets[facet] = entries
+
+        band_order = {key: i for i, (key, _, _, _) in enumerate(PRICE_BANDS)}
+        facets["price_ranges"].sort(key=lambda e: band_order[e["value"]])
+        facets["categories"].sort(key=lambda e: (-e["count"], e["label"]))
+        facets["features"].sort(key=lambda e: (-e["count"], e["label"]))
+        del facets["features"][self.MAX_FEATURE_VALUES:]
+        return facets
+
+
+facet_index = register_index(FacetIndex())
@@ -0,0 +1,165 @@
+# app/services/feature_index.py
+from typing import List, Dict, Any, Optional, Iterable
+import threading
+
+import numpy as np
+from sqlalchemy import func
+
+from app.services.catalog_sync import register_index
+
+
+class FeatureIndex:
+    """
+    Feature dictionary plus a bitset per tool. Every distinct feature name
+    (case-insensitive) gets a bit number, and each tool is a row of uint64
+    words in one matrix, so "has all of these features" is a vectorized AND
+    over the candidate rows instead of one join per feature.
+
+    Bit numbers are never reused, so the dictionary only grows until the
+    next rebuild.
+    """
+
+    INITIAL_ROWS = 1024
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        self._feature_ids: Dict[str, int] = {}
+        self._rows: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+        self._next_row = 0
+        self._bits = np.zeros((self.INITIAL_ROWS, 1), dtype=np.uint64)
+        self._row_tool_ids = np.full(self.INITIAL_ROWS, -1, dtype=np.int64)
+
+    @staticmethod
+    def normalize(feature_name: str) -> str:
+        return " ".join(feature_name.lower().split())
+
+    @staticmethod
+    def normalize_sql(column):
+        """normalize() as a SQL expression, for queries made without the index"""
+        return func.trim(func.regexp_replace(func.lower(column), r"\s+", " ", "g"))
+
+    def _feature_id_locked(self, key: str) -> int:
+        feature_id = self._feature_ids.get(key)
+        if feature_id is None:
+            feature_id = self._feature_ids[key] = len(self._feature_ids)
+            words = feature_id // 64 + 1
+            if words > self._bits.shape[1]:
+                grown = np.zeros((self._bits.shape[0], words * 2), dtype=np.uint64)
+                grown[:, :self._bits.shape[1]] = self._bits
+                self._bits = grown
+        return feature_id
+
+    def _row_locked(self, tool_id: int) -> int:
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = self._next_row
+            self._next_row += 1
+            if row >= self._bits.shape[0]:
+                capacity = self._bits.shape[0] * 2
+                grown = np.zeros((capacity, self._bits.shape[1]), dtype=np.uint64)
+                grown[:row] = self._bits[:row]
+                self._bits = grown
+                tool_ids = np.full(capacity, -1, dtype=np.int64)
+                tool_ids[:row] = self._row_tool_ids[:row]
+                self._row_tool_ids = tool_ids
+        self._rows[tool_id] = row
+        self._row_tool_ids[row] = tool_id
+        return row
+
+    def _add_locked(self, doc: Dict[str, Any]) -> None:
+        feature_ids = [
+            self._feature_id_locked(self.normalize(name))
+            for name in doc.get("features") or []
+            if name and name.strip()
+        ]
+        row = self._row_locked(doc["id"])
+        self._bits[row] = 0
+        for feature_id in feature_ids:
+            self._bits[row, feature_id // 64] |= np.uint64(1 << (feature_id % 64))
+
+    def _remove_locked(self, tool_id: int) -> None:
+        row = self._rows.pop(tool_id, None)
+        if row is None:
+            return
+        self._bits[row] = 0
+        self._row_tool_ids[row] = -1
+        self._free_rows.append(row)
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            for doc in documents:
+                self._add_locked(doc)
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_locked(doc)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+
+    def _mask_locked(self, feature_ids: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        for feature_id in feature_ids:
+            mask[feature_id // 64] |= np.uint64(1 << (feature_id % 64))
+        return mask
+
+    def tools_with_all(
+        self,
+        features: List[str],
+        candidate_ids: Optional[Iterable[int]] = None,
+        partial: bool = False
+    ) -> List[int]:
+        """
+        Return the tools (among candidate_ids, or the whole catalog) that
+        have every requested feature. With partial=True a requested feature
+        matches any feature name containing it, as the ILIKE search did.
+        """
+        keys = [self.normalize(feature) for feature in features if feature and feature.strip()]
+
+        with self._lock:
+            # One group of acceptable feature ids per requested feature
+            groups = []
+            for key in keys:
+                if partial:
+                    group = [fid for name, fid in self._feature_ids.items() if key in name]
+                else:
+                    group = [self._feature_ids[key]] if key in self._feature_ids else []
+                if not group:
+                    return []
+                groups.append(group)
+
+            if candidate_ids is None:
+                rows = np.flatnonzero(self._row_tool_ids[:self._next_row] >= 0)
+            else:
+                rows = np.fromiter(
+                    (self._rows[tool_id] for tool_id in candidate_ids if tool_id in self._rows),
+                    dtype=np.int64
+                )
+            if not groups or rows.size == 0:
+                return self._row_tool_ids[rows].tolist()
+
+            bits = self._bits[rows]
+            if all(len(group) == 1 for group in groups):
+                mask = self._mask_locked(group[0] for group in groups)
+                matches = ((bits & mask) == mask).all(axis=1)
+            else:
+                matches = np.ones(rows.size, dtype=bool)
+                for group in groups:
+                    matches &= (bits & self._mask_locked(group)).any(axis=1)
+
+            return self._row_tool_ids[rows[matches]].tolist()
+
+
+feature_index = register_index(FeatureIndex())
@@ -0,0 +1,178 @@
+# app/services/fuzzy_index.py
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple, Callable
+import threading
+
+from app.utils.search import tokenize
+from app.services.catalog_sync import register_index
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions), giving up with max_distance + 1 once it is exceeded.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """
+    Symmetric-delete spelling index over the words of tool names, taglines,
+    categories and features. Every vocabulary word is stored under each
+    variant obtained by deleting up to MAX_DISTANCE characters, so a typo
+    is matched by looking up its own deletes instead of scanning the
+    vocabulary.
+    """
+
+    MAX_DISTANCE = 2
+    MIN_WORD_LENGTH = 4
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        # word -> number of tools using it
+        self._word_counts: Dict[str, int] = {}
+        # deleted variant -> words it was derived from
+        self._deletes: Dict[str, Set[str]] = {}
+        self._doc_words: Dict[int, Set[str]] = {}
+
+    @classmethod
+    def max_distance_for(cls, word: str) -> int:
+        return 1 if len(word) <= 5 else cls.MAX_DISTANCE
+
+    @classmethod
+    def _variants(cls, word: str, max_distance: int) -> Set[str]:
+        variants = {word}
+        frontier = {word}
+        for _ in range(max_distance):
+            frontier = {
+                variant[:i] + variant[i + 1:]
+                for variant in frontier
+                if len(variant) > 1
+                for i in range(len(variant))
+            }
+            variants |= frontier
+        return variants
+
+    @staticmethod
+    def _document_words(doc: Dict[str, Any]) -> Set[str]:
+        texts = [doc.get("name"), doc.get("tagline"), doc.get("category_name")]
+        texts.extend(doc.get("features") or [])
+        return {
+            word
+            for text in texts if text
+            for word in tokenize(text)
+            if word.isalpha() and len(word) >= FuzzyIndex.MIN_WORD_LENGTH
+        }
+
+    def _add_locked(self, doc: Dict[str, Any]) -> None:
+        words = self._document_words(doc)
+        for word in words:
+            count = self._word_counts.get(word, 0)
+            if count == 0:
+                for variant in self._variants(word, self.MAX_DISTANCE):
+                    self._deletes.setdefault(variant, set()).add(word)
+            self._word_counts[word] = count + 1
+        self._doc_words[doc["id"]] = words
+
+    def _remove_locked(self, tool_id: int) -> None:
+        for word in self._doc_words.pop(tool_id, ()):
+            count = self._word_counts[word] - 1
+            if count > 0:
+                self._word_counts[word] = count
+                continue
+            del self._word_counts[word]
+            for variant in self._variants(word, self.MAX_DISTANCE):
+                words = self._deletes.get(variant)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self._deletes[variant]
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            for doc in documents:
+                self._add_locked(doc)
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_locked(doc)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+
+    def correct(self, word: str) -> Optional[str]:
+        """
+        Best vocabulary word within edit distance of `word` (closest first,
+        then most common), or None.
+        """
+        word = word.lower()
+        if len(word) < self.MIN_WORD_LENGTH or not word.isalpha():
+            return None
+        max_distance = self.max_distance_for(word)
+
+        with self._lock:
+            if word in self._word_counts:
+                return word
+            candidates: Set[str] = set()
+            for variant in self._variants(word, max_distance):
+                candidates |= self._deletes.get(variant, set())
+
+            best: Optional[Tuple[int, int, str]] = None
+            for candidate in candidates:
+                distance = edit_distance(word, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                rank = (distance, -self._word_counts[candidate], candidate)
+                if best is None or rank < best:
+                    best = rank
+        return best[2] if best else None
+
+    def correct_query(
+        self,
+        query: str,
+        is_known: Optional[Callable[[str], bool]] = None
+    ) -> Optional[str]:
+        """
+        Correct every word of a query that is not already known (per the
+        optional is_known callback, e.g. present in the search index).
+        Returns the corrected query, or None if nothing changed.
+        """
+        words = tokenize(query)
+        corrected = []
+        changed = False
+        for word in words:
+            replacement = None
+            if not (is_known and is_known(word)):
+                replacement = self.correct(word)
+            if replacement and replacement != word:
+                changed = True
+                corrected.append(replacement)
+            else:
+                corrected.append(word)
+        return " ".join(corrected) if changed else None
+
+
+fuzzy_index = register_index(FuzzyIndex())
@@ -0,0 +1,201 @@
+# app/services/integration_graph.py
+from typing import List, Dict, Any, Optional, Iterable, Tuple, FrozenSet
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.catalog_sync import register_index
+
+
+class IntegrationGraph:
+    """
+    The Integration table as a tool graph, scored with personalized
+    PageRank (random walk with restart) from one or more seed tools.
+
+    Edges are kept as (source, target) position arrays. Walks follow an
+    integration in either direction, so a tool that integrates with the
+    seed is as reachable as one the seed integrates with; a pair declared
+    from both sides counts twice. A catalog write only replaces the
+    changed tools' out-edges, and rankings are cached per seed set until
+    the edges change.
+    """
+
+    RESTART_PROBABILITY = 0.15
+    MAX_ITERATIONS = 100
+    TOLERANCE = 1e-8
+    # Tools kept per cached ranking; larger limits are computed uncached
+    CACHED_RESULTS = 100
+
+    def __init__(self, cache_size: int = 1024):
+        self._lock = threading.RLock()
+        self.cache_size = cache_size
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        # Tool ids get a fixed position the first time they are seen,
+        # as a source or as a target
+        self._position: Dict[int, int] = {}
+        self._ids: List[int] = []
+        self._active: List[bool] = []
+        self._names: Dict[int, str] = {}
+        self._targets: Dict[int, FrozenSet[int]] = {}
+        self._src = np.zeros(0, dtype=np.int64)
+        self._dst = np.zeros(0, dtype=np.int64)
+        self._walk: Optional[Tuple[np.ndarray, ...]] = None
+        self._rankings: "OrderedDict[FrozenSet[int], List[Tuple[int, float]]]" = OrderedDict()
+
+    def _position_for(self, tool_id: int) -> int:
+        position = self._position.get(tool_id)
+        if position is None:
+            position = self._position[tool_id] = len(self._ids)
+            self._ids.append(tool_id)
+            self._active.append(False)
+        return position
+
+    def _edges_changed_locked(self) -> None:
+        self._walk = None
+        self._rankings.clear()
+
+    def _set_edges_locked(self, changes: Dict[int, FrozenSet[int]]) -> None:
+        """Replace the out-edges of the given tools in one pass"""
+        positions = np.array([self._position_for(tool_id) for tool_id in changes], dtype=np.int64)
+        keep = ~np.isin(self._src, positions)
+        new_src = [
+            self._position[tool_id]
+            for tool_id, targets in changes.items()
+            for _ in targets
+        ]
+        new_dst = [
+            self._position_for(target)
+            for targets in changes.values()
+            for target in targets
+        ]
+        self._src = np.concatenate([self._src[keep], np.array(new_src, dtype=np.int64)])
+        self._dst = np.concatenate([self._dst[keep], np.array(new_dst, dtype=np.int64)])
+        for tool_id, targets in changes.items():
+            if targets:
+                self._targets[tool_id] = targets
+            else:
+                self._targets.pop(tool_id, None)
+
+    def _upsert_locked(self, documents: Iterable[Dict[str, Any]]) -> None:
+        changes: Dict[int, FrozenSet[int]] = {}
+        activated = False
+        for doc in documents:
+            tool_id = doc["id"]
+            position = self._position_for(tool_id)
+            self._names[tool_id] = doc.get("name")
+            if not self._active[position]:
+                self._active[position] = activated = True
+            targets = frozenset(doc.get("integrations") or ()) - {tool_id}
+            if targets != self._targets.get(tool_id, frozenset()):
+                changes[tool_id] = targets
+        if changes:
+            self._set_edges_locked(changes)
+        if changes or activated:
+            self._edges_changed_locked()
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            self._upsert_locked(documents)
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._upsert_locked(documents)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            changes: Dict[int, FrozenSet[int]] = {}
+            for tool_id in tool_ids:
+                position = self._position.get(tool_id)
+                if position is None or not self._active[position]:
+                    continue
+                self._active[position] = False
+                self._names.pop(tool_id, None)
+                changes[tool_id] = frozenset()
+            if changes:
+                self._set_edges_locked(changes)
+                self._edges_changed_locked()
+
+    def _walk_locked(self) -> Tuple[np.ndarray, ...]:
+        """Undirected walk over active tools as (src, dst, step weight, has edges, active)"""
+        if self._walk is None:
+            n = len(self._ids)
+            active = np.array(self._active, dtype=bool)
+            keep = active[self._src] & active[self._dst]
+            src = np.concatenate([self._src[keep], self._dst[keep]])
+            dst = np.concatenate([self._dst[keep], self._src[keep]])
+            degree = np.bincount(src, minlength=n).astype(np.float64)
+            weights = 1.0 / degree[src]
+            self._walk = (src, dst, weights, degree > 0, active)
+        return self._walk
+
+    def _personalized_pagerank_locked(self, seed_positions: List[int]) -> np.ndarray:
+        src, dst, weights, has_edges, _ = self._walk_locked()
+        n = len(self._ids)
+        restart = np.zeros(n, dtype=np.float64)
+        restart[seed_positions] = 1.0 / len(seed_positions)
+
+        scores = restart.copy()
+        for _ in range(self.MAX_ITERATIONS):
+            spread = np.bincount(dst, weights=scores[src] * weights, minlength=n)
+            # Walks stuck on a tool without integrations start over
+            stuck = scores[~has_edges].sum()
+            updated = (1 - self.RESTART_PROBABILITY) * (spread + stuck * restart) + self.RESTART_PROBABILITY * restart
+            converged = np.abs(updated - scores).sum() < self.TOLERANCE
+            scores = updated
+            if converged:
+                break
+        return scores
+
+    def _rank_locked(self, seeds: FrozenSet[int], count: int) -> List[Tuple[int, float]]:
+        seed_positions = [self._position[tool_id] for tool_id in seeds]
+        scores = self._personalized_pagerank_locked(seed_positions)
+        _, _, _, _, active = self._walk_locked()
+        candidates = np.flatnonzero(active & (scores > 0))
+        candidates = candidates[~np.isin(candidates, seed_positions)]
+        if len(candidates) > count:
+            candidates = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+        ids = np.array(self._ids, dtype=np.int64)[candidates]
+        order = np.lexsort((ids, -scores[candidates]))
+        return [(int(ids[i]), float(scores[candidates[i]])) for i in order]
+
+    def recommend(self, seed_ids: Iterable[int], limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Tools closest to the seeds in the integration graph, best first, as
+        {"tool_id", "name", "score"}, where score is the tool's share of
+        the walk's stationary distribution. Returns None when no seed is
+        an indexed tool.
+        """
+        with self._lock:
+            seeds = frozenset(
+                tool_id for tool_id in seed_ids
+                if tool_id in self._position and self._active[self._position[tool_id]]
+            )
+            if not seeds:
+                return None
+
+            if limit > self.CACHED_RESULTS:
+                ranking = self._rank_locked(seeds, limit)
+            else:
+                ranking = self._rankings.get(seeds)
+                if ranking is None:
+                    ranking = self._rank_locked(seeds, self.CACHED_RESULTS)
+                    self._rankings[seeds] = ranking
+                    while len(self._rankings) > self.cache_size:
+                        self._rankings.popitem(last=False)
+                else:
+                    self._rankings.move_to_end(seeds)
+
+            return [
+                {"tool_id": tool_id, "name": self._names.get(tool_id), "score": score}
+                for tool_id, score in ranking[:limit]
+            ]
+
+
+integration_graph = register_index(IntegrationGraph(cache_size=settings.GRAPH_RECOMMENDATION_CACHE_SIZE))
@@ -0,0 +1,156 @@
+# app/services/minhash_index.py
+from typing import List, Dict, Any, Optional, Iterable, Set, FrozenSet, Tuple
+import threading
+import zlib
+
+import numpy as np
+
+from app.services.catalog_sync import register_index
+
+# Mersenne-ish prime above 2^32 for the universal hash family
+_PRIME = np.uint64(4294967311)
+
+
+class MinHashIndex:
+    """
+    Locality-sensitive index over each tool's feature and integration sets,
+    catalog-wide. Every tool gets a MinHash signature of NUM_PERM hashes;
+    the signature is cut into BANDS bands of ROWS hashes and each band is a
+    bucket key, so tools sharing any band become candidates. Two sets with
+    Jaccard similarity s share a band with probability 1 - (1 - s^ROWS)^BANDS
+    (about 50% at s = 0.42 with the defaults), which keeps lookups well
+    below a full scan; candidates are then re-ranked by exact Jaccard.
+    """
+
+    NUM_PERM = 128
+    BANDS = 32
+    ROWS = 4
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        rng = np.random.default_rng(7)
+        # a < 2^31 keeps a * x + b below 2^64 for 32-bit token hashes
+        self._a = rng.integers(1, 2 ** 31, self.NUM_PERM, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 31, self.NUM_PERM, dtype=np.uint64)
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        self._tokens: Dict[int, FrozenSet[str]] = {}
+        self._band_keys: Dict[int, List[bytes]] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(self.BANDS)]
+
+    @staticmethod
+    def _document_tokens(doc: Dict[str, Any]) -> FrozenSet[str]:
+        tokens = {
+            "f:" + " ".join(name.lower().split())
+            for name in doc.get("features") or []
+            if name and name.strip()
+        }
+        tokens.update(f"i:{tool_id}" for tool_id in doc.get("integrations") or ())
+        return frozenset(tokens)
+
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint64)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys_for(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.ROWS:(band + 1) * self.ROWS].tobytes()
+            for band in range(self.BANDS)
+        ]
+
+    def _add_locked(self, doc: Dict[str, Any]) -> None:
+        tokens = self._document_tokens(doc)
+        if not tokens:
+            return
+        tool_id = doc["id"]
+        keys = self._band_keys_for(self.signature(tokens))
+        self._tokens[tool_id] = tokens
+        self._band_keys[tool_id] = keys
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, set()).add(tool_id)
+
+    def _remove_locked(self, tool_id: int) -> None:
+        self._tokens.pop(tool_id, None)
+        keys = self._band_keys.pop(tool_id, None)
+        if keys is None:
+            return
+        for band, key in enumerate(keys):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(tool_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            for doc in documents:
+                self._add_locked(doc)
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_locked(doc)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+
+    @staticmethod
+    def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+        union = len(a | b)
+        return len(a & b) / union if union else 0.0
+
+    def similar(
+        self,
+        tool_id: int,
+        limit: int = 10,
+        min_similarity: float = 0.0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Tools whose feature and integration sets overlap most with the given
+        tool's, best first, as {"tool_id", "similarity", "feature_similarity",
+        "integration_similarity", "shared_features", "shared_integrations"}.
+        Returns None for a tool without features or integrations.
+        """
+        with self._lock:
+            tokens = self._tokens.get(tool_id)
+            if tokens is None:
+                return None
+            candidates: Set[int] = set()
+            for band, key in enumerate(self._band_keys[tool_id]):
+                candidates |= self._buckets[band].get(key, set())
+            candidates.discard(tool_id)
+
+            scored: List[Tuple[float, int]] = []
+            for candidate in candidates:
+                similarity = self._jaccard(tokens, self._tokens[candidate])
+                if similarity >= min_similarity:
+                    scored.append((similarity, candidate))
+            scored.sort(key=lambda item: (-item[0], item[1]))
+
+            features = frozenset(t for t in tokens if t.startswith("f:"))
+            integrations = tokens - features
+            results = []
+            for similarity, candidate in scored[:limit]:
+                other = self._tokens[candidate]
+                other_features = frozenset(t for t in other if t.startswith("f:"))
+                other_integrations = other - other_features
+                results.append({
+                    "tool_id": candidate,
+                    "similarity": similarity,
+                    "feature_similarity": self._jaccard(features, other_features),
+                    "integration_similarity": self._jaccard(integrations, other_integrations),
+                    "shared_features": len(features & other_features),
+                    "shared_integrations": len(integrations & other_integrations)
+                })
+            return results
+
+
+minhash_index = register_index(MinHashIndex())
@@ -0,0 +1,132 @@
+# app/services/query_stats_buffer.py
+from typing import Dict, Tuple, Optional
+from datetime import datetime, timezone
+import logging
+import threading
+
+from sqlalchemy import update, values, column, func, Integer, Float, DateTime
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.tool import Tool
+from app.services.usage_service import UsageService, view_weight, log_add, log_add_sql, hour_bucket
+from app.services.trending_sketch import trending_sketch
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 1000
+
+
+class QueryStatsBuffer:
+    """
+    Write-behind buffer for per-tool view counters. Recording a view only
+    bumps an in-memory count, last-seen time, decayed trending weight and
+    hourly bucket; flush applies every pending tool in one UPDATE ... FROM
+    (VALUES ...) per batch, plus one upsert of the hourly buckets, instead
+    of a transaction per view. Flushes happen every flush_seconds, as soon
+    as max_events views are pending, and on shutdown, so a crash loses at
+    most that much. Views also feed this worker's trending sketch.
+    """
+
+    def __init__(self, flush_seconds: float = 5.0, max_events: int = 1000):
+        self.flush_seconds = flush_seconds
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._due = threading.Event()
+        # tool_id -> (views, last seen, log-space trending increment)
+        self._pending: Dict[int, Tuple[int, datetime, float]] = {}
+        # (tool_id, hour) -> views
+        self._hourly: Dict[Tuple[int, datetime], int] = {}
+        self._events = 0
+
+    def record(self, tool_id: int, seen_at: Optional[datetime] = None) -> None:
+        seen_at = seen_at or datetime.now(timezone.utc)
+        weight = view_weight(seen_at)
+        hour = (tool_id, hour_bucket(seen_at))
+        with self._lock:
+            count, last_seen, trend = self._pending.get(tool_id, (0, seen_at, None))
+            self._pending[tool_id] = (count + 1, max(last_seen, seen_at), log_add(trend, weight))
+            self._hourly[hour] = self._hourly.get(hour, 0) + 1
+            self._events += 1
+            if self._events >= self.max_events:
+                self._due.set()
+        trending_sketch.record(tool_id, seen_at)
+
+    def pending_events(self) -> int:
+        with self._lock:
+            return self._events
+
+    def wait_until_due(self) -> None:
+        """Block until the flush interval passes or enough views are pending"""
+        self._due.wait(self.flush_seconds)
+        self._due.clear()
+
+    def wake(self) -> None:
+        self._due.set()
+
+    def _merge_locked(
+        self,
+        pending: Dict[int, Tuple[int, datetime, float]],
+        hourly: Dict[Tuple[int, datetime], int]
+    ) -> None:
+        for tool_id, (count, seen_at, trend) in pending.items():
+            current_count, current_seen, current_trend = self._pending.get(tool_id, (0, seen_at, None))
+            self._pending[tool_id] = (
+                current_count + count,
+                max(current_seen, seen_at),
+                log_add(current_trend, trend)
+            )
+            self._events += count
+        for key, views in hourly.items():
+            self._hourly[key] = self._hourly.get(key, 0) + views
+
+    def flush(self, db: Session) -> int:
+        """
+        Apply the pending counters. On failure they are put back, to be
+        retried on the next flush. Returns the number of tools updated.
+        """
+        with self._lock:
+            pending, hourly = self._pending, self._hourly
+            self._pending, self._hourly = {}, {}
+            self._events = 0
+        if not pending:
+            return 0
+
+        rows = list((tool_id,) + entry for tool_id, entry in pending.items())
+        try:
+            for start in range(0, len(rows), UPDATE_BATCH_SIZE):
+                increments = values(
+                    column("tool_id", Integer),
+                    column("views", Integer),
+                    column("seen_at", DateTime(timezone=True)),
+                    column("trend", Float),
+                    name="increments"
+                ).data(rows[start:start + UPDATE_BATCH_SIZE])
+                db.execute(
+                    update(Tool)
+                    .where(Tool.id == increments.c.tool_id)
+                    .values(
+                        query_count=func.coalesce(Tool.query_count, 0) + increments.c.views,
+                        # GREATEST skips NULL in Postgres
+                        last_queried_at=func.greatest(Tool.last_queried_at, increments.c.seen_at),
+                        trending_score=log_add_sql(Tool.trending_score, increments.c.trend),
+                        # A view is not an edit, keep the onupdate timestamp out of it
+                        updated_at=Tool.updated_at
+                    ),
+                    execution_options={"synchronize_session": False}
+                )
+            UsageService.add_hourly_views(db, hourly)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._merge_locked(pending, hourly)
+            raise
+        logger.debug(f"Flushed query stats for {len(rows)} tools")
+        return len(rows)
+
+
+query_stats_buffer = QueryStatsBuffer(
+    flush_seconds=settings.QUERY_STATS_FLUSH_SECONDS,
+    max_events=settings.QUERY_STATS_FLUSH_EVENTS
+)
@@ -0,0 +1,431 @@
+# app/services/rate_limiter.py
+from typing import Dict, Any, Tuple, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import hashlib
+import ipaddress
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from sqlalchemy import update, values, column, case, func, Integer, DateTime
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.api_key import APIKey
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, where only the memory backend works
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 1000
+
+# Per-key limiter state: (window start, previous window count, current window count)
+WindowState = Tuple[float, float, float]
+
+
+class RateLimitDecision:
+    """Outcome of one rate-limited request, with what the X-RateLimit-* headers need"""
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset_at: int, retry_after: int = 0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_at)
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def sliding_window_hit(
+    state: Optional[WindowState],
+    limit: int,
+    now: float,
+    window: float = 3600.0
+) -> Tuple[WindowState, RateLimitDecision]:
+    """
+    Sliding-window counter over clock-aligned windows. The count in the
+    trailing window is estimated as previous * (1 - elapsed fraction) +
+    current, which needs two counters per key instead of a log of request
+    times. A request is admitted if the estimate leaves room for it, and
+    only admitted requests are counted. Returns the new state and the
+    decision; state None is a key with no history.
+    """
+    window_start = math.floor(now / window) * window
+    if state is None:
+        previous, current = 0.0, 0.0
+    else:
+        start, previous, current = state
+        if window_start - start >= 2 * window:
+            previous, current = 0.0, 0.0
+        elif window_start > start:
+            previous, current = current, 0.0
+
+    elapsed = (now - window_start) / window
+    estimate = previous * (1 - elapsed) + current
+    allowed = estimate + 1 <= limit
+    if allowed:
+        current += 1
+        estimate += 1
+
+    retry_after = 0
+    if not allowed:
+        # Earliest moment the estimate drops to limit - 1: later in this
+        # window as the previous one slides out, or else in the next one
+        room = limit - 1 - current
+        if room >= 0 and previous > 0:
+            opens_at = window_start + (1 - room / previous) * window
+        elif current > 0 and limit >= 1:
+            opens_at = window_start + window + (1 - (limit - 1) / current) * window
+        else:
+            opens_at = window_start + window
+        retry_after = max(1, math.ceil(opens_at - now))
+
+    # Every counted request has slid out once the window after the
+    # last counted one ends
+    reset_at = window_start + (2 * window if current > 0 else window)
+    decision = RateLimitDecision(
+        allowed=allowed,
+        limit=limit,
+        remaining=max(0, math.floor(limit - estimate)),
+        reset_at=int(reset_at),
+        retry_after=retry_after
+    )
+    return (window_start, previous, current), decision
+
+
+def seed_window(
+    requests_this_hour: Optional[int],
+    last_request_at: Optional[datetime],
+    now: Optional[datetime] = None
+) -> Optional[WindowState]:
+    """
+    Limiter state for a key this process has not seen yet, from the
+    reconciled api_keys counters, so a restart does not hand every key a
+    fresh budget. Stored datetimes are naive UTC.
+    """
+    if not requests_this_hour or last_request_at is None:
+        return None
+    now = now or datetime.utcnow()
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    start = (current_hour - datetime(1970, 1, 1)).total_seconds()
+    if last_request_at >= current_hour:
+        return (start, 0.0, float(requests_this_hour))
+    if last_request_at >= current_hour - timedelta(hours=1):
+        return (start, float(requests_this_hour), 0.0)
+    return None
+
+
+class MemoryRateLimiter:
+    """
+    Sliding-window limiter holding per-key state in this process. At most
+    max_keys keys are kept; the least recently seen is dropped first and
+    starts over from its seed when it comes back.
+    """
+
+    def __init__(self, window_seconds: float = 3600.0, max_keys: int = 100000):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[str, WindowState]" = OrderedDict()
+
+    def hit(
+        self,
+        key: str,
+        limit: int,
+        seed: Optional[WindowState] = None,
+        now: Optional[float] = None
+    ) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._states.get(key, seed)
+            state, decision = sliding_window_hit(state, limit, now, self.window_seconds)
+            self._states[key] = state
+            self._states.move_to_end(key)
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        return decision
+
+
+class SharedRateLimiter:
+    """
+    Sliding-window limiter whose state lives in a memory-mapped file, so
+    every worker process on the host draws from one budget per key. The
+    file is a set-associative table: a key hashes to a bucket of WAYS
+    slots holding (key hash, window start, previous, current, last seen),
+    and a new key takes an empty slot or the least recently seen one, so
+    the table never grows. Buckets are guarded by lock stripes, each an
+    fcntl lock on one byte past the table (between processes) plus a
+    thread lock (fcntl locks do not exclude threads of one process).
+
+    The file is <directory>/<name>-<buckets>.bin, so processes configured
+    with another RATE_LIMIT_MAX_KEYS (say, during a rolling deploy) use
+    their own file and never resize one that is mapped elsewhere.
+    """
+
+    MAGIC = b"DHRL0001"
+    HEADER = struct.Struct("<8sQQ")
+    HEADER_SIZE = 64
+    WAYS = 8
+    # window start, previous count, current count, last seen
+    FIELDS = 4
+    _BUCKET_KEYS = struct.Struct(f"<{WAYS}Q")
+    _STATE = struct.Struct(f"<{FIELDS}d")
+
+    def __init__(
+        self,
+        directory: str,
+        name: str,
+        max_keys: int = 100000,
+        window_seconds: float = 3600.0,
+        stripes: int = 64
+    ):
+        if fcntl is None:
+            raise OSError("The shared rate limiter needs fcntl")
+        self.window_seconds = window_seconds
+        self.buckets = max(1, -(-max_keys // self.WAYS))
+        self.path = os.path.join(directory, f"{name}-{self.buckets}.bin")
+        self.stripes = stripes
+        keys_size = self.buckets * self.WAYS * 8
+        size = self.HEADER_SIZE + keys_size + keys_size * self.FIELDS
+        header = self.HEADER.pack(self.MAGIC, self.buckets, self.WAYS)
+        self._lock_base = size
+
+        os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        # The byte after the stripes serializes creating the file
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, self._lock_base + stripes)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, header, 0)
+            compatible = os.fstat(self._fd).st_size == size and os.pread(self._fd, len(header), 0) == header
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._lock_base + stripes)
+        if not compatible:
+            # Another layout under this name may be mapped elsewhere; never rewrite it
+            os.close(self._fd)
+            raise OSError(f"{self.path} holds a different rate limiter layout")
+
+        self._map = mmap.mmap(self._fd, size)
+        self._states_offset = self.HEADER_SIZE + keys_size
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+
+    def _state_at(self, bucket: int, way: int) -> int:
+        return self._states_offset + (bucket * self.WAYS + way) * self._STATE.size
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def hit(
+        self,
+        key: str,
+        limit: int,
+        seed: Optional[WindowState] = None,
+        now: Optional[float] = None
+    ) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        hashed = self._hash(key)
+        bucket = hashed % self.buckets
+        stripe = bucket % self.stripes
+        keys_at = self.HEADER_SIZE + bucket * self.WAYS * 8
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, self._lock_base + stripe)
+            try:
+                keys = self._BUCKET_KEYS.unpack_from(self._map, keys_at)
+                if hashed in keys:
+                    way = keys.index(hashed)
+                    state = self._STATE.unpack_from(self._map, self._state_at(bucket, way))[:3]
+                else:
+                    if 0 in keys:
+                        way = keys.index(0)
+                    else:
+                        seen = [
+                            self._STATE.unpack_from(self._map, self._state_at(bucket, candidate))[3]
+                            for candidate in range(self.WAYS)
+                        ]
+                        way = seen.index(min(seen))
+                    struct.pack_into("<Q", self._map, keys_at + way * 8, hashed)
+                    state = seed
+                state, decision = sliding_window_hit(state, limit, now, self.window_seconds)
+                self._STATE.pack_into(self._map, self._state_at(bucket, way), *state, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._lock_base + stripe)
+        return decision
+
+
+def create_rate_limiter(name: str, max_keys: int):
+    """
+    Limiter for the configured RATE_LIMIT_BACKEND: "shared" keeps state in
+    RATE_LIMIT_SHARED_DIR/<name>-<buckets>.bin for all workers on the host,
+    "memory" in this process only. Falls back to memory if the file cannot
+    be used.
+    """
+    backend = settings.RATE_LIMIT_BACKEND
+    if backend == "shared":
+        try:
+            return SharedRateLimiter(settings.RATE_LIMIT_SHARED_DIR, name, max_keys=max_keys)
+        except OSError as e:
+            logger.warning(f"Shared rate limiter {name} unavailable in {settings.RATE_LIMIT_SHARED_DIR} ({e}), "
+                           f"limiting per worker")
+    elif backend != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+    return MemoryRateLimiter(max_keys=max_keys)
+
+
+def client_key(host: str, ipv6_prefix: int = 64) -> str:
+    """
+    Limiter key for an anonymous client: the IPv4 address, or the IPv6
+    prefix, since one host can hold a whole /64 and rotate through it.
+    """
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return f"ip:{host}"
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    if address.version == 4:
+        return f"ip:{address}"
+    return f"ip:{ipaddress.ip_network((address, ipv6_prefix), strict=False)}"
+
+
+class APIKeyUsageBuffer:
+    """
+    Write-behind buffer for the api_keys usage columns. The limiter
+    decides in memory; the requests_this_hour / requests_today counters
+    and last_request_at are only reporting, so they are accumulated here
+    and applied as increments in one UPDATE ... FROM (VALUES ...) per
+    batch. Increments from several workers add up, and a counter whose
+    hour or day has passed since the stored last_request_at restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key id -> (hour, requests that hour, day, requests that day, last request)
+        self._pending: Dict[int, Tuple[datetime, int, datetime, int, datetime]] = {}
+
+    def record(self, api_key_id: int, requested_at: Optional[datetime] = None) -> None:
+        requested_at = requested_at or datetime.utcnow()
+        hour = requested_at.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        with self._lock:
+            entry = self._pending.get(api_key_id)
+            if entry is None:
+                self._pending[api_key_id] = (hour, 1, day, 1, requested_at)
+                return
+            pending_hour, hour_count, pending_day, day_count, last = entry
+            self._pending[api_key_id] = (
+                max(hour, pending_hour),
+                hour_count + 1 if hour == pending_hour else (1 if hour > pending_hour else hour_count),
+                max(day, pending_day),
+                day_count + 1 if day == pending_day else (1 if day > pending_day else day_count),
+                max(last, requested_at)
+            )
+
+    def _merge_locked(self, pending: Dict[int, Tuple[datetime, int, datetime, int, datetime]]) -> None:
+        for api_key_id, (hour, hour_count, day, day_count, last) in pending.items():
+            current = self._pending.get(api_key_id)
+            if current is None:
+                self._pending[api_key_id] = (hour, hour_count, day, day_count, last)
+                continue
+            current_hour, current_hour_count, current_day, current_day_count, current_last = current
+            # Newer entries are in current; older counts only add up within the same hour or day
+            self._pending[api_key_id] = (
+                current_hour,
+                current_hour_count + (hour_count if hour == current_hour else 0),
+                current_day,
+                current_day_count + (day_count if day == current_day else 0),
+                max(current_last, last)
+            )
+
+    @staticmethod
+    def usage_values(increments) -> Dict[str, Any]:
+        """
+        New api_keys usage columns for a row of increments (hour_start,
+        hour_end, hour_requests, day_start, day_end, day_requests,
+        requested_at): a counter adds up within the stored hour or day,
+        restarts in a later one and is left alone if the stored
+        last_request_at is already past it.
+        """
+        return {
+            "requests_this_hour": case(
+                (APIKey.last_request_at >= increments.hour_end, APIKey.requests_this_hour),
+                (APIKey.last_request_at >= increments.hour_start,
+                 func.coalesce(APIKey.requests_this_hour, 0) + increments.hour_requests),
+                else_=increments.hour_requests
+            ),
+            "requests_today": case(
+                (APIKey.last_request_at >= increments.day_end, APIKey.requests_today),
+                (APIKey.last_request_at >= increments.day_start,
+                 func.coalesce(APIKey.requests_today, 0) + increments.day_requests),
+                else_=increments.day_requests
+            ),
+            # GREATEST skips NULL in Postgres
+            "last_request_at": func.greatest(APIKey.last_request_at, increments.requested_at)
+        }
+
+    def flush(self, db: Session) -> int:
+        """
+        Apply the pending usage counters. On failure they are put back, to
+        be retried on the next flush. Returns the number of keys updated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = [
+            (api_key_id, hour, hour + timedelta(hours=1), hour_count, day, day + timedelta(days=1), day_count, last)
+            for api_key_id, (hour, hour_count, day, day_count, last) in pending.items()
+        ]
+        try:
+            for start in range(0, len(rows), UPDATE_BATCH_SIZE):
+                increments = values(
+                    column("api_key_id", Integer),
+                    column("hour_start", DateTime),
+                    column("hour_end", DateTime),
+                    column("hour_requests", Integer),
+                    column("day_start", DateTime),
+                    column("day_end", DateTime),
+                    column("day_requests", Integer),
+                    column("requested_at", DateTime),
+                    name="increments"
+                ).data(rows[start:start + UPDATE_BATCH_SIZE])
+                db.execute(
+                    update(APIKey)
+                    .where(APIKey.id == increments.c.api_key_id)
+                    .values(**self.usage_values(increments.c)),
+                    # Usage counters are not part of the cached key resolution
+                    execution_options={"synchronize_session": False, "preserves_api_key_cache": True}
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._merge_locked(pending)
+            raise
+        logger.debug(f"Reconciled API key usage for {len(rows)} keys")
+        return len(rows)
+
+
+rate_limiter = create_rate_limiter("api-keys", settings.RATE_LIMIT_MAX_KEYS)
+# Separate table: a scan of client addresses must not evict API key state
+anonymous_rate_limiter = create_rate_limiter("anonymous", settings.ANONYMOUS_RATE_LIMIT_MAX_CLIENTS)
+api_key_usage = APIKeyUsageBuffer()
@@ -0,0 +1,225 @@
+# app/services/recommendation_index.py
+from typing import List, Dict, Any, Optional, Iterable, Set
+import threading
+
+import numpy as np
+
+from app.services.catalog_sync import register_index
+from app.services.semantic_index import _sparse_dot
+from app.services.similarity import SIMILARITY_WEIGHTS, COMPONENTS, _similarity_ratio
+
+
+class _CatalogMatrix:
+    """
+    Every indexed tool's features and integrations as (row, column) pairs
+    over one catalog-wide token vocabulary. A tool's integration tokens
+    include the tool itself, so a direct integration between two tools
+    counts as overlap whichever side declared it.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]]):
+        self.ids = [p["id"] for p in profiles]
+        self.names = [p["name"] for p in profiles]
+        self.row_of = {tool_id: row for row, tool_id in enumerate(self.ids)}
+        columns: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        for row, profile in enumerate(profiles):
+            tokens = [f"f:{name}" for name in profile["features"]]
+            tokens += [f"i:{tool_id}" for tool_id in profile["integrations"] | {profile["id"]}]
+            for token in tokens:
+                rows.append(row)
+                cols.append(columns.setdefault(token, len(columns)))
+
+        n = len(profiles)
+        self.rows = np.array(rows, dtype=np.int64)
+        self.cols = np.array(cols, dtype=np.int64)
+        self.is_feature = np.array([token.startswith("f:") for token in columns], dtype=bool)
+        feature_entries = self.is_feature[self.cols] if len(self.cols) else np.zeros(0, dtype=bool)
+        self.feature_sizes = np.bincount(self.rows, weights=feature_entries, minlength=n).astype(np.float32)
+        self.integration_sizes = np.bincount(self.rows, weights=~feature_entries, minlength=n).astype(np.float32)
+        self.prices = np.array([p["price"] for p in profiles], dtype=np.float32)
+        self.ratings = np.array([p["rating"] for p in profiles], dtype=np.float32)
+        # -1 stands in for tools without a category
+        self.categories = np.array(
+            [-1 if p["category_id"] is None else p["category_id"] for p in profiles], dtype=np.int64
+        )
+
+
+class RecommendationIndex:
+    """
+    Stack recommendations: every tool catalog-wide is compared against a
+    set of seed tools at once, with the weights of the similarity score;
+    see recommend_stack. Per-tool neighbours are precomputed into
+    tool_similarity by the similarity job instead.
+
+    The catalog matrix is built by rebuild and, after catalog writes, by
+    refresh_catalog off the request path. Until the new one is swapped in,
+    requests score against the previous one, minus the removed tools. An
+    index that is never rebuilt builds it on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stale = threading.Event()
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._catalog: Optional[_CatalogMatrix] = None
+        # Tools removed since the catalog matrix was built
+        self._removed: Set[int] = set()
+        self._stale.clear()
+
+    @staticmethod
+    def _profile(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": doc["id"],
+            "name": doc.get("name"),
+            "category_id": doc.get("category_id"),
+            "features": frozenset(f.strip().lower() for f in doc.get("features") or [] if f and f.strip()),
+            "integrations": frozenset(doc.get("integrations") or ()),
+            "price": doc.get("avg_price") or 0.0,
+            "rating": doc.get("rating") or 0.0
+        }
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        profiles = [self._profile(doc) for doc in documents]
+        catalog = _CatalogMatrix(profiles)
+        with self._lock:
+            self._reset()
+            self._docs = {profile["id"]: profile for profile in profiles}
+            self._catalog = catalog
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._docs[doc["id"]] = self._profile(doc)
+                self._removed.discard(doc["id"])
+        self._stale.set()
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                if self._docs.pop(tool_id, None) is not None:
+                    self._removed.add(tool_id)
+        self._stale.set()
+
+    def wait_until_stale(self) -> None:
+        """Block until a catalog write changes the indexed tools"""
+        self._stale.wait()
+
+    def wake(self) -> None:
+        self._stale.set()
+
+    def refresh_catalog(self) -> bool:
+        """
+        Rebuild the catalog matrix from a snapshot of the indexed tools
+        without holding the lock, then swap it in. Returns False when
+        nothing changed since the last build.
+        """
+        with self._lock:
+            if not self._stale.is_set():
+                return False
+            self._stale.clear()
+            profiles = list(self._docs.values())
+        catalog = _CatalogMatrix(profiles)
+        with self._lock:
+            self._catalog = catalog
+            # Removed again after the snapshot
+            self._removed = {tool_id for tool_id in self._removed if tool_id in catalog.row_of}
+        return True
+
+    def recommend_stack(self, seed_ids: Iterable[int], limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Tools that fit best with a set of seed tools, best first, as dicts
+        with "tool_id", "name", "score" (0-1) against the combined profile,
+        "components" and "contributions" (the tool's similarity to each
+        seed, keyed by seed id). The combined profile is the union of the
+        seeds' features and integrations, the share of seeds in each
+        category and their mean price and rating. Seeds themselves are
+        never recommended. Returns None when no seed is indexed.
+        """
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = _CatalogMatrix(list(self._docs.values()))
+            catalog = self._catalog
+            removed = np.array(
+                [catalog.row_of[tool_id] for tool_id in self._removed if tool_id in catalog.row_of], dtype=np.int64
+            )
+            seeds = [
+                tool_id for tool_id in dict.fromkeys(seed_ids)
+                if tool_id in catalog.row_of and tool_id not in self._removed
+            ]
+            if not seeds:
+                return None
+
+        n = len(catalog.ids)
+        k = len(seeds)
+        seed_rows = np.array([catalog.row_of[tool_id] for tool_id in seeds], dtype=np.int64)
+
+        # Column j < k is seed j's token set, column k the union of all
+        seed_position = np.full(n, -1, dtype=np.int64)
+        seed_position[seed_rows] = np.arange(k)
+        entry_seeds = seed_position[catalog.rows]
+        in_seed = entry_seeds >= 0
+        profile = np.zeros((len(catalog.is_feature), k + 1), dtype=np.float32)
+        profile[catalog.cols[in_seed], entry_seeds[in_seed]] = 1.0
+        profile[:, k] = profile[:, :k].max(axis=1)
+        feature_profile = profile * catalog.is_feature[:, None]
+        integration_profile = profile * ~catalog.is_feature[:, None]
+
+        ones = np.ones(len(catalog.rows), dtype=np.float32)
+        similarity = []
+        for token_profile, sizes in (
+            (feature_profile, catalog.feature_sizes),
+            (integration_profile, catalog.integration_sizes)
+        ):
+            intersection = _sparse_dot(catalog.rows, catalog.cols, ones, token_profile, n)
+            union = sizes[:, None] + token_profile.sum(axis=0)[None, :] - intersection
+            similarity.append(np.divide(
+                intersection, union, out=np.zeros_like(intersection), where=union > 0
+            ))
+        feature_similarity, integration_similarity = similarity
+
+        seed_categories = catalog.categories[seed_rows]
+        category = (catalog.categories[:, None] == seed_categories[None, :]).astype(np.float32)
+        category = np.hstack([category, category.mean(axis=1, keepdims=True)])
+
+        prices = np.append(catalog.prices[seed_rows], catalog.prices[seed_rows].mean())
+        ratings = np.append(catalog.ratings[seed_rows], catalog.ratings[seed_rows].mean())
+        components = np.stack([
+            feature_similarity,
+            _similarity_ratio(catalog.prices, prices),
+            category,
+            integration_similarity,
+            1 - np.abs(catalog.ratings[:, None] - ratings[None, :]) / 5
+        ], axis=-1).astype(np.float32)
+        weights = np.array([SIMILARITY_WEIGHTS[c] for c in COMPONENTS], dtype=np.float32)
+        scores = components @ weights
+
+        combined = scores[:, k].copy()
+        combined[seed_rows] = -np.inf
+        combined[removed] = -np.inf
+        keep = min(limit, n - k - len(removed))
+        if keep <= 0:
+            return []
+        ids = np.array(catalog.ids, dtype=np.int64)
+        top = np.argpartition(-combined, keep - 1)[:keep]
+        top = top[np.lexsort((ids[top], -combined[top]))]
+
+        results = []
+        for row in top:
+            results.append({
+                "tool_id": catalog.ids[row],
+                "name": catalog.names[row],
+                "score": float(combined[row]),
+                "components": dict(zip(COMPONENTS, components[row, k].tolist())),
+                "contributions": dict(zip(seeds, scores[row, :k].tolist()))
+            })
+        return results
+
+
+recommendation_index = register_index(RecommendationIndex())
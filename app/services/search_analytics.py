@@ -0,0 +1,167 @@
+# app/services/search_analytics.py
+from typing import List, Dict, Any, Optional, Tuple
+from bisect import bisect_left
+from datetime import datetime, timezone
+import logging
+import threading
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.models.search_query_stat import SearchQueryStat
+from app.utils.search import SearchPlan
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets; one more bucket holds
+# everything slower than the last bound
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Queries recorded once the aggregator is full share this entry per shape
+OTHER_QUERY = "(other)"
+
+
+def describe_search(plan: SearchPlan, sort_by: str = "relevance", semantic: float = 0.0) -> Tuple[str, str, str]:
+    """
+    Reduce a search to (normalized query, filter set, shape). The shape
+    names which predicates were used but not their values, e.g.
+    "text+category+price sort=relevance".
+    """
+    query = " ".join(
+        [plan.text.lower()] + [f'"{phrase.lower()}"' for phrase in sorted(plan.phrases)]
+    ).strip()
+    filters = SearchPlan(
+        categories=sorted({c.lower() for c in plan.categories}),
+        features=sorted({f.lower() for f in plan.features}),
+        price_min=plan.price_min,
+        price_max=plan.price_max,
+        min_exclusive=plan.min_exclusive,
+        max_exclusive=plan.max_exclusive
+    ).to_query()
+
+    parts = [
+        name for name, present in (
+            ("text", plan.text),
+            ("phrase", plan.phrases),
+            ("category", plan.categories),
+            ("feature", plan.features),
+            ("price", plan.has_price_filter)
+        ) if present
+    ]
+    shape = "+".join(parts) or "browse"
+    shape += f" sort={sort_by}"
+    if semantic:
+        shape += " semantic"
+    return query, filters, shape
+
+
+def histogram_percentile(histogram: List[int], fraction: float, max_latency: float) -> Optional[float]:
+    """
+    Approximate a latency percentile as the upper bound of the bucket it
+    falls in (the observed maximum for the overflow bucket).
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    threshold = fraction * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= threshold:
+            if i < len(LATENCY_BUCKETS_MS):
+                return float(min(LATENCY_BUCKETS_MS[i], max_latency))
+            return float(max_latency)
+    return float(max_latency)
+
+
+class SearchAnalytics:
+    """
+    In-memory aggregation of search traffic per (query, filters, shape).
+    Recording a search only updates counters; the aggregates are written to
+    search_query_stats in one batch per flush window.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+        self._entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._window_start = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _new_entry(query: str, filters: str, shape: str) -> Dict[str, Any]:
+        return {
+            "query": query,
+            "filters": filters,
+            "shape": shape,
+            "request_count": 0,
+            "zero_result_count": 0,
+            "result_count_total": 0,
+            "latency_total_ms": 0.0,
+            "latency_max_ms": 0.0,
+            "latency_histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        }
+
+    def record(self, query: str, filters: str, shape: str, result_count: int, latency_ms: float) -> None:
+        bucket = bisect_left(LATENCY_BUCKETS_MS, latency_ms)
+        with self._lock:
+            key = (query, filters, shape)
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_keys:
+                    key = (OTHER_QUERY, "", shape)
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = self._new_entry(*key)
+            entry["request_count"] += 1
+            entry["result_count_total"] += result_count
+            if result_count == 0:
+                entry["zero_result_count"] += 1
+            entry["latency_total_ms"] += latency_ms
+            entry["latency_max_ms"] = max(entry["latency_max_ms"], latency_ms)
+            entry["latency_histogram"][bucket] += 1
+
+    def _merge_locked(self, entries: List[Dict[str, Any]]) -> None:
+        for other in entries:
+            key = (other["query"], other["filters"], other["shape"])
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = other
+                continue
+            for field in ("request_count", "zero_result_count", "result_count_total", "latency_total_ms"):
+                entry[field] += other[field]
+            entry["latency_max_ms"] = max(entry["latency_max_ms"], other["latency_max_ms"])
+            entry["latency_histogram"] = [a + b for a, b in zip(entry["latency_histogram"], other["latency_histogram"])]
+
+    def flush(self, db: Session) -> int:
+        """
+        Write the current window as one row per key and start a new window.
+        On failure the window is put back, to be retried on the next flush.
+        Returns the number of rows written.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            window_start = self._window_start
+            self._entries = {}
+            self._window_start = datetime.now(timezone.utc)
+        if not entries:
+            return 0
+
+        window_end = datetime.now(timezone.utc)
+        try:
+            db.execute(insert(SearchQueryStat), [
+                dict(entry, window_start=window_start, window_end=window_end)
+                for entry in entries
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._merge_locked(entries)
+                self._window_start = min(self._window_start, window_start)
+            raise
+        logger.info(f"Flushed {len(entries)} search query stats")
+        return len(entries)
+
+
+search_analytics = SearchAnalytics(max_keys=settings.SEARCH_ANALYTICS_MAX_KEYS)
@@ -0,0 +1,117 @@
+# app/services/search_cache.py
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+from app.core.config import settings
+from app.services.catalog_sync import register_index
+
+
+class SearchCache:
+    """
+    LRU + TTL cache of search results keyed on the normalized query tuple.
+    Entries hold only tool ids (with their sort keys when ranked in
+    memory), never ORM rows, and the cache is bounded both by entry count
+    and by the total number of ids held. Any Tool, PricingTier or Feature
+    write clears it: every worker's catalog refresher calls the index hooks
+    below, after every index has applied the write, so a write reaches the
+    other workers within CATALOG_REFRESH_POLL_SECONDS. A ranking computed
+    across an invalidation is not stored (see generation()).
+    """
+
+    def __init__(self, max_entries: int, max_ids: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_ids = max_ids
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (expires_at, ids, sort keys)
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[int], List[Tuple]]]" = OrderedDict()
+        self._total_ids = 0
+        # Bumped on every invalidation
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Optional[Tuple[List[int], List[Tuple]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, ids, keys = entry
+            if expires_at < time.monotonic():
+                self._pop_locked(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ids, keys
+
+    def generation(self) -> int:
+        """
+        Take this before computing a result and pass it to set(), which
+        drops the result if the cache was invalidated in between.
+        """
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Tuple, ids: List[int], keys: List[Tuple], generation: Optional[int] = None) -> None:
+        if len(ids) > self.max_ids:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._pop_locked(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, ids, keys)
+            self._total_ids += len(ids)
+            while len(self._entries) > self.max_entries or self._total_ids > self.max_ids:
+                self._pop_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop_locked(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_ids -= len(entry[1])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_ids = 0
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "cached_ids": self._total_ids,
+                "max_entries": self.max_entries,
+                "max_ids": self.max_ids,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    # Catalog index hooks: any catalog write may change any result set
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        self.invalidate()
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        self.invalidate()
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        self.invalidate()
+
+
+search_cache = register_index(SearchCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    max_ids=settings.SEARCH_CACHE_MAX_IDS,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS
+), cache=True)
@@ -0,0 +1,131 @@
+# app/services/search_index.py
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from collections import Counter, defaultdict
+import heapq
+import math
+import threading
+
+from app.utils.search import analyze
+from app.services.catalog_sync import register_index
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over tool name, tagline and description,
+    scored with BM25F (per-field weighted term frequencies).
+    """
+
+    FIELD_WEIGHTS = {
+        "name": 3.0,
+        "tagline": 2.0,
+        "description": 1.0
+    }
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self.is_built = False
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def _analyze_document(self, doc: Dict[str, Any]) -> Tuple[Dict[str, float], float]:
+        weighted_tf: Dict[str, float] = Counter()
+        length = 0.0
+        for field, weight in self.FIELD_WEIGHTS.items():
+            terms = analyze(doc.get(field) or "")
+            length += weight * len(terms)
+            for term in terms:
+                weighted_tf[term] += weight
+        return dict(weighted_tf), length
+
+    def _remove_locked(self, tool_id: int) -> None:
+        terms = self._doc_terms.pop(tool_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(tool_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(tool_id)
+
+    def _add_locked(self, doc: Dict[str, Any]) -> None:
+        terms, length = self._analyze_document(doc)
+        tool_id = doc["id"]
+        for term, tf in terms.items():
+            self._postings[term][tool_id] = tf
+        self._doc_terms[tool_id] = terms
+        self._doc_lengths[tool_id] = length
+        self._total_length += length
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the index contents with the given tool documents.
+        """
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_terms = {}
+            self._doc_lengths = {}
+            self._total_length = 0.0
+            for doc in documents:
+                self._add_locked(doc)
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_locked(doc)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+
+    def has_term(self, word: str) -> bool:
+        """
+        Whether any indexed tool contains the (unstemmed) word.
+        """
+        terms = analyze(word)
+        with self._lock:
+            return bool(terms) and all(term in self._postings for term in terms)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Return (tool_id, score) pairs for tools matching any query term,
+        best first. All matches are returned when limit is None.
+        """
+        terms = analyze(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if doc_count == 0:
+                return []
+            avg_length = (self._total_length / doc_count) or 1.0
+
+            scores: Dict[int, float] = defaultdict(float)
+            for term, query_tf in Counter(terms).items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for tool_id, tf in postings.items():
+                    norm = self.K1 * (1 - self.B + self.B * self._doc_lengths[tool_id] / avg_length)
+                    scores[tool_id] += query_tf * idf * tf * (self.K1 + 1) / (tf + norm)
+
+        if limit is not None:
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+search_index = register_index(SearchIndex())
@@ -1,69 +1,477 @@
 # app/services/search_service.py
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func, desc
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_right
+import time
+from sqlalchemy.orm import Session, selectinload, configure_mappers
+from sqlalchemy import or_, and_, func, desc, exists, select
 
 from app.models.tool import Tool
 from app.models.category import Category
 from app.models.pricing import PricingTier
 from app.models.review import ReviewAggregate
 from app.models.feature import Feature
+from app.database.models.integration import Integration
+from app.database.models.tool_similarity import ToolSimilarity
+from app.services.search_index import search_index
+from app.services.suggestion_index import suggestion_index
+from app.services.facet_index import facet_index
+from app.services.feature_index import feature_index
+from app.services.search_cache import search_cache
+from app.services.fuzzy_index import fuzzy_index
+from app.services.semantic_index import semantic_index
+from app.services.search_analytics import search_analytics, describe_search
+from app.services.recommendation_index import RecommendationIndex, recommendation_index
+from app.services.integration_graph import IntegrationGraph, integration_graph
+from app.services.catalog_sync import load_tool_documents
+from app.services.usage_service import UsageService, TRENDING_PERIODS, decayed_views
+from app.services.trending_sketch import trending_sketch
+from app.services.tool_service import ToolService
+from app.utils.pagination import encode_cursor, decode_cursor, id_condition, paginate_keyset
+from app.utils.search import SearchPlan, parse_search_query, normalize_search_key
+from app.core.config import settings
 
 class SearchService:
     @staticmethod
-    def search_tools(
-        db: Session,
+    def _build_plan(
         query: str,
         category: Optional[str] = None,
         price_min: Optional[float] = None,
         price_max: Optional[float] = None,
         features: Optional[List[str]] = None
-    ):
-        # Basic full-text search across tool name, description, and tagline
-        search_terms = f"%{query}%"
-        query_obj = db.query(Tool).filter(
-            or_(
-                Tool.name.ilike(search_terms),
-                Tool.description.ilike(search_terms),
-                Tool.tagline.ilike(search_terms)
-            )
+    ) -> Tuple[SearchPlan, SearchPlan]:
+        """
+        Parse the query syntax and merge in the explicit filter parameters.
+        Returns (parsed query, full plan). Raises ValueError for bad syntax.
+        """
+        parsed = parse_search_query(query)
+        plan = parsed.copy(
+            categories=parsed.categories + ([category] if category else []),
+            features=parsed.features + [f for f in features or [] if f and f.strip()]
         )
+        plan.restrict_price(price_min, price_max)
+        return parsed, plan
+
+    @staticmethod
+    def _blend_scores(
+        keyword: List[Tuple[int, float]],
+        semantic: List[Tuple[int, float]],
+        weight: float
+    ) -> Dict[int, float]:
+        """
+        Mix BM25 scores (scaled to 0-1 by the best match) with cosine
+        similarities: (1 - weight) * keyword + weight * semantic.
+        """
+        best = keyword[0][1] if keyword else 0.0
+        scores: Dict[int, float] = {
+            tool_id: (1 - weight) * score / best
+            for tool_id, score in keyword
+        } if best > 0 else {}
+        for tool_id, similarity in semantic:
+            scores[tool_id] = scores.get(tool_id, 0.0) + weight * similarity
+        return scores
+
+    @staticmethod
+    def _match_query(
+        db: Session,
+        plan: SearchPlan,
+        semantic: float = 0.0,
+        with_scores: bool = True
+    ) -> Tuple[Optional[Any], Optional[Dict[int, float]]]:
+        """
+        Build the Tool query for the matching set (one row per tool) and
+        return it with the BM25 scores, or (None, None) if nothing matches.
+        With semantic > 0 the closest tools by meaning are added to the
+        matches and the scores blend in their similarity.
+        Scores are None when there is no text to rank by; without the
+        search index they are ts_rank over the stored tsvector, fetched
+        only if with_scores.
+
+        Predicates run cheapest first: the in-memory text and feature
+        indexes narrow the candidate ids, then everything else is applied
+        as conditions of a single statement (category and price as
+        subqueries, so no join multiplies the rows).
+        """
+        scores = None
+        candidate_ids = None
+        text_rank = None
+        conditions = []
+        features = plan.features
         
-        # Apply filters
-        if category:
-            query_obj = query_obj.join(Category).filter(
-                or_(
-                    Category.name.ilike(f"%{category}%"),
-                    Category.slug.ilike(f"%{category}%")
+        ranking_text = plan.ranking_text
+        if ranking_text and search_index.is_built:
+            # Rank candidates with the in-memory BM25 index
+            ranked = search_index.search(ranking_text)
+            if semantic > 0 and semantic_index.is_built:
+                scores = SearchService._blend_scores(
+                    ranked,
+                    semantic_index.search(
+                        ranking_text,
+                        limit=settings.SEMANTIC_SEARCH_CANDIDATES,
+                        min_similarity=settings.SEMANTIC_MIN_SIMILARITY
+                    ),
+                    semantic
                 )
+            else:
+                scores = dict(ranked)
+            if not scores:
+                return None, None
+            candidate_ids = list(scores)
+        elif plan.text:
+            # Index not available yet, fall back to the stored tsvector
+            # (GIN-indexed match, ranked by ts_rank)
+            text_query = func.plainto_tsquery("english", plan.text)
+            conditions.append(Tool.search_vector.op("@@")(text_query))
+            text_rank = func.ts_rank(Tool.search_vector, text_query)
+        
+        if features and feature_index.is_built:
+            # Narrow the candidates with the feature bitsets instead of joins
+            candidate_ids = feature_index.tools_with_all(
+                features,
+                candidate_ids=candidate_ids,
+                partial=True
             )
+            features = []
+            if not candidate_ids:
+                return None, None
+        
+        if candidate_ids is not None:
+            conditions.insert(0, id_condition(db, Tool.id, candidate_ids))
             
-        if price_min is not None or price_max is not None:
-            query_obj = query_obj.join(PricingTier, and_(
+        for category in plan.categories:
+            conditions.append(Tool.category_id.in_(
+                select(Category.id).where(or_(
+                    Category.name.ilike(f"%{category}%"),
+                    Category.slug.ilike(f"%{category}%")
+                ))
+            ))
+            
+        if plan.has_price_filter:
+            price_filter = [
                 PricingTier.tool_id == Tool.id,
                 PricingTier.is_current == True
+            ]
+            if plan.price_min is not None:
+                price_filter.append(
+                    PricingTier.monthly_price > plan.price_min if plan.min_exclusive
+                    else PricingTier.monthly_price >= plan.price_min
+                )
+            if plan.price_max is not None:
+                price_filter.append(
+                    PricingTier.monthly_price < plan.price_max if plan.max_exclusive
+                    else PricingTier.monthly_price <= plan.price_max
+                )
+            conditions.append(exists().where(*price_filter))
+        
+        for phrase in plan.phrases:
+            pattern = f"%{phrase}%"
+            conditions.append(or_(
+                Tool.name.ilike(pattern),
+                Tool.tagline.ilike(pattern),
+                Tool.description.ilike(pattern)
             ))
-            
-            if price_min is not None:
-                query_obj = query_obj.filter(PricingTier.monthly_price >= price_min)
-            if price_max is not None:
-                query_obj = query_obj.filter(PricingTier.monthly_price <= price_max)
                 
-        if features:
-            for feature in features:
-                query_obj = query_obj.join(Feature).filter(
-                    Feature.feature_name.ilike(f"%{feature}%"),
-                    Feature.is_available == True
+        for feature in features:
+            conditions.append(exists().where(
+                Feature.tool_id == Tool.id,
+                Feature.feature_name.ilike(f"%{feature}%"),
+                Feature.is_available == True
+            ))
+        
+        if text_rank is not None and with_scores:
+            scores = dict(db.query(Tool.id, text_rank).filter(*conditions))
+            if not scores:
+                return None, None
+        
+        return db.query(Tool).filter(*conditions), scores
+
+    @staticmethod
+    def _ranks_in_memory(plan: SearchPlan, sort_by: str) -> bool:
+        # Relevance scores exist only per search; every other order is a
+        # column SQL can sort and page by
+        if sort_by != "relevance":
+            return False
+        return bool(plan.ranking_text) if search_index.is_built else bool(plan.text)
+
+    @staticmethod
+    def _ranked_ids(
+        db: Session,
+        plan: SearchPlan,
+        semantic: float = 0.0
+    ) -> Tuple[List[int], List[Tuple]]:
+        """
+        Ids of every matching tool by relevance, with an ascending sort key
+        per id. Fetches ids only, never full rows.
+        """
+        query_obj, scores = SearchService._match_query(db, plan, semantic)
+        if query_obj is None:
+            return [], []
+        
+        keyed = sorted(
+            ((-scores.get(tool_id, 0.0), tool_id), tool_id)
+            for tool_id, in query_obj.with_entities(Tool.id).distinct()
+        )
+        return [tool_id for _, tool_id in keyed], [key for key, _ in keyed]
+
+    @staticmethod
+    def _matched_ids(
+        db: Session,
+        plan: SearchPlan,
+        semantic: float = 0.0
+    ) -> List[int]:
+        """
+        Ids of every matching tool, ascending, in no result order. Fetches
+        ids only, never sort values.
+        """
+        query_obj, _ = SearchService._match_query(db, plan, semantic, with_scores=False)
+        if query_obj is None:
+            return []
+        return sorted(tool_id for tool_id, in query_obj.with_entities(Tool.id).distinct())
+
+    @staticmethod
+    def _cached_matches(
+        db: Session,
+        plan: SearchPlan,
+        sort_by: str = "relevance",
+        semantic: float = 0.0
+    ) -> Tuple[List[int], Optional[List[Tuple]]]:
+        """
+        The matching ids of a search, cached per normalized plan: in result
+        order with their sort keys when ranked by relevance, else ascending
+        with keys None, one entry shared by every SQL sort order.
+        """
+        ranked = SearchService._ranks_in_memory(plan, sort_by)
+        cache_key = normalize_search_key(plan, "relevance" if ranked else None, semantic)
+        cached = search_cache.get(cache_key)
+        if cached is None:
+            # A catalog write landing while this runs must not leave the
+            # old matches cached until the TTL
+            generation = search_cache.generation()
+            if ranked:
+                cached = SearchService._ranked_ids(db, plan, semantic)
+            else:
+                cached = SearchService._matched_ids(db, plan, semantic), []
+            search_cache.set(cache_key, *cached, generation=generation)
+        ids, keys = cached
+        return ids, keys if ranked else None
+
+    @staticmethod
+    def _search_page(
+        db: Session,
+        query: str,
+        category: Optional[str] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        features: Optional[List[str]] = None,
+        sort_by: str = "relevance",
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        semantic: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Everything search_tools does except loading the rows: returns
+        {"page_ids", "next_cursor", "total", "matched_ids", "did_you_mean",
+        "analytics_key"}.
+        """
+        if not 0.0 <= semantic <= 1.0:
+            raise ValueError("semantic must be between 0 and 1")
+        parsed, plan = SearchService._build_plan(
+            query,
+            category=category,
+            price_min=price_min,
+            price_max=price_max,
+            features=features
+        )
+        ids, keys = SearchService._cached_matches(db, plan, sort_by, semantic)
+        
+        page_plan = plan
+        did_you_mean = None
+        if len(ids) < settings.SEARCH_FUZZY_MIN_RESULTS and fuzzy_index.is_built and search_index.is_built:
+            corrected = fuzzy_index.correct_query(plan.text, is_known=search_index.has_term)
+            if corrected:
+                corrected_plan = plan.copy(text=corrected)
+                corrected_ids, corrected_keys = SearchService._cached_matches(
+                    db,
+                    corrected_plan,
+                    sort_by,
+                    semantic
                 )
+                if len(corrected_ids) > len(ids):
+                    page_plan, ids, keys = corrected_plan, corrected_ids, corrected_keys
+                    did_you_mean = parsed.copy(text=corrected).to_query()
         
-        # Order by relevance (simplified - could be enhanced with full-text search)
-        query_obj = query_obj.order_by(
-            Tool.query_count.desc(),
-            Tool.last_queried_at.desc()
+        if keys is not None:
+            # Relevance: page through the cached ranking
+            start = 0
+            if cursor:
+                start = bisect_right(keys, tuple(decode_cursor(cursor, sort_by)))
+            page_ids = ids[start:start + limit]
+            
+            next_cursor = None
+            if page_ids and start + len(page_ids) < len(ids):
+                next_cursor = encode_cursor(sort_by, list(keys[start + len(page_ids) - 1]))
+        else:
+            # Any other order: WHERE (keys) > cursor ORDER BY keys LIMIT,
+            # over the match query, as the tool listing does
+            query_obj = None
+            if ids:
+                query_obj, _ = SearchService._match_query(db, page_plan, semantic, with_scores=False)
+            if query_obj is None:
+                if cursor:
+                    decode_cursor(cursor, sort_by)
+                page_ids, next_cursor = [], None
+            else:
+                query_obj, sort_keys = ToolService.sort_keys(
+                    query_obj.with_entities(Tool.id),
+                    "trending" if sort_by == "relevance" else sort_by
+                )
+                page_ids, next_cursor = paginate_keyset(query_obj, sort_keys, sort_by, cursor=cursor, size=limit)
+        
+        return {
+            "page_ids": page_ids,
+            "next_cursor": next_cursor,
+            "total": len(ids),
+            "matched_ids": ids,
+            "did_you_mean": did_you_mean,
+            "analytics_key": describe_search(plan, sort_by, semantic)
+        }
+
+    @staticmethod
+    def _load_tools(db: Session, tool_ids: List[int]) -> Dict[int, Tool]:
+        if not tool_ids:
+            return {}
+        return {tool.id: tool for tool in db.query(Tool).filter(Tool.id.in_(tool_ids))}
+
+    @staticmethod
+    def search_tools(
+        db: Session,
+        query: str,
+        category: Optional[str] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        features: Optional[List[str]] = None,
+        sort_by: str = "relevance",
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        semantic: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Search tools and return one keyset page:
+        {"items", "next_cursor", "total", "matched_ids", "did_you_mean"}.
+        The query may use the filter syntax of parse_search_query, e.g.
+        'category:ci-cd price<20 feature:docker "exact phrase"'; explicit
+        filter arguments are combined with it.
+        The ordered id list is cached per normalized plan, so later pages
+        and repeated queries only load the rows of the page itself.
+        When the query has fewer than SEARCH_FUZZY_MIN_RESULTS matches, its
+        misspelled words are corrected and the corrected results returned,
+        with the corrected query in "did_you_mean".
+        semantic (0-1) is the weight of embedding similarity in relevance.
+        Every search is recorded in the in-memory search analytics.
+        Raises ValueError for an invalid query, cursor or weight.
+        """
+        started = time.perf_counter()
+        result = SearchService._search_page(
+            db,
+            query,
+            category=category,
+            price_min=price_min,
+            price_max=price_max,
+            features=features,
+            sort_by=sort_by,
+            cursor=cursor,
+            limit=limit,
+            semantic=semantic
+        )
+        page_ids = result.pop("page_ids")
+        tools = SearchService._load_tools(db, page_ids)
+        result["items"] = [tools[tool_id] for tool_id in page_ids if tool_id in tools]
+        
+        search_analytics.record(
+            *result.pop("analytics_key"),
+            result_count=result["total"],
+            latency_ms=(time.perf_counter() - started) * 1000
         )
+        return result
+
+    @staticmethod
+    def batch_search(db: Session, specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run several searches in one go. Each spec takes the keyword
+        arguments of search_tools ("query", "category", ..., "limit").
+        Rankings come from the shared index and result cache, and the rows
+        of every page are loaded with a single query.
+        Returns {"results", "fetch_ms"}; each result carries its own
+        "took_ms", and a spec that fails validation gets an "error" instead
+        of failing the whole batch.
+        """
+        results = []
+        for spec in specs:
+            started = time.perf_counter()
+            try:
+                result = SearchService._search_page(db, **spec)
+            except ValueError as e:
+                result = {"error": str(e)}
+            took_ms = (time.perf_counter() - started) * 1000
+            result["took_ms"] = round(took_ms, 3)
+            if "analytics_key" in result:
+                search_analytics.record(
+                    *result.pop("analytics_key"),
+                    result_count=result["total"],
+                    latency_ms=took_ms
+                )
+            results.append(result)
+        
+        started = time.perf_counter()
+        wanted = {tool_id for result in results for tool_id in result.get("page_ids", ())}
+        tools = SearchService._load_tools(db, list(wanted))
+        fetch_ms = round((time.perf_counter() - started) * 1000, 3)
         
-        return query_obj.all()
+        for result in results:
+            if "error" in result:
+                continue
+            page_ids = result.pop("page_ids")
+            result["items"] = [tools[tool_id] for tool_id in page_ids if tool_id in tools]
+        return {"results": results, "fetch_ms": fetch_ms}
+
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Any]:
+        return search_cache.stats()
+
+    @staticmethod
+    def get_search_suggestions(
+        db: Session,
+        query: str,
+        limit: int = 5
+    ) -> List[str]:
+        if suggestion_index.is_built:
+            return suggestion_index.suggest(query, limit=limit)
+        
+        # Index not available yet, fall back to tool name prefixes
+        tools = db.query(Tool.name).filter(
+            Tool.name.ilike(f"{query}%"),
+            Tool.is_active == True
+        ).order_by(Tool.query_count.desc()).limit(limit).all()
+        return [name for name, in tools]
+
+    @staticmethod
+    def get_facets(tool_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Facet counts (categories, price ranges, features) for a result set,
+        or for the whole catalog when tool_ids is None.
+        """
+        return facet_index.counts(tool_ids)
+
+    @staticmethod
+    def get_available_filters(
+        db: Session,
+        query: Optional[str] = None
+    ) -> Dict[str, Any]:
+        tool_ids = None
+        if query:
+            _, plan = SearchService._build_plan(query)
+            tool_ids, _ = SearchService._cached_matches(db, plan)
+        return SearchService.get_facets(tool_ids)
 
     @staticmethod
     def get_trending_tools(
@@ -71,26 +479,44 @@ class SearchService:
         period: str = "7d",
         limit: int = 20
     ) -> List[Dict[str, Any]]:
-        # Calculate time delta based on period
-        now = datetime.utcnow()
-        if period == "24h":
-            delta = timedelta(days=1)
-        elif period == "30d":
-            delta = timedelta(days=30)
-        else:  # 7d default
-            delta = timedelta(days=7)
-            
-        time_threshold = now - delta
-        
-        # Simple trending algorithm: weight recent queries higher
-        query = db.query(Tool).filter(
-            Tool.last_queried_at >= time_threshold
-        ).order_by(
-            (Tool.query_count * func.coalesce(ReviewAggregate.avg_rating, 0)).desc()
-        ).outerjoin(
-            ReviewAggregate,
-            ReviewAggregate.tool_id == Tool.id
-        ).limit(limit)
+        """
+        Trending tools. "hot" ranks by decayed view count, from the trending
+        sketch snapshot or else in order off the trending_score index; 24h,
+        7d and 30d rank by views in that window, summed from pre-aggregated
+        hourly and daily buckets.
+        """
+        if period == "hot":
+            # Served from the merged worker sketches when a fresh snapshot holds limit tools
+            snapshot = trending_sketch.top(limit)
+            if snapshot is not None:
+                return snapshot
+            rows = db.query(Tool, Tool.trending_score).filter(
+                Tool.is_active == True,
+                Tool.trending_score.isnot(None)
+            ).order_by(
+                Tool.trending_score.desc(),
+                Tool.id
+            ).limit(limit).all()
+            now = datetime.now(timezone.utc)
+            ranked = [(tool, round(decayed_views(score, now), 2)) for tool, score in rows]
+        else:
+            window = UsageService.window_views(db, period if period in TRENDING_PERIODS else "7d")
+            ranked = db.query(Tool, window.c.views).join(
+                window,
+                window.c.tool_id == Tool.id
+            ).filter(
+                Tool.is_active == True
+            ).order_by(
+                window.c.views.desc(),
+                Tool.id
+            ).limit(limit).all()
+
+        ratings = dict(
+            db.query(ReviewAggregate.tool_id, func.avg(ReviewAggregate.avg_rating))
+            .filter(ReviewAggregate.tool_id.in_([tool.id for tool, _ in ranked]))
+            .group_by(ReviewAggregate.tool_id)
+            .all()
+        ) if ranked else {}
         
         return [
             {
@@ -99,9 +525,10 @@ class SearchService:
                 "slug": tool.slug,
                 "logo_url": tool.logo_url,
                 "query_count": tool.query_count,
-                "avg_rating": float(avg_rating) if (avg_rating := tool.avg_rating) is not None else None
+                "views": views,
+                "avg_rating": float(ratings[tool.id]) if ratings.get(tool.id) is not None else None
             }
-            for tool in query.all()
+            for tool, views in ranked
         ]
 
     @staticmethod
@@ -133,24 +560,254 @@ class SearchService:
             for change in query.all()
         ]
 
+    @staticmethod
+    def _precomputed_recommendations(
+        db: Session,
+        tool_id: int,
+        limit: int = 10
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recommendations from the neighbours the similarity job stored in
+        tool_similarity, with match reasons taken from the individual
+        similarity signals. One indexed query. Returns None when the tool
+        has not been scored yet.
+        """
+        rows = db.query(
+            ToolSimilarity.score,
+            ToolSimilarity.feature_score,
+            ToolSimilarity.price_score,
+            ToolSimilarity.integration_score,
+            Tool.id,
+            Tool.name,
+            Tool.slug,
+            Tool.logo_url,
+            Tool.category_id
+        ).join(
+            Tool, Tool.id == ToolSimilarity.similar_tool_id
+        ).filter(
+            ToolSimilarity.tool_id == tool_id,
+            Tool.is_active == True
+        ).order_by(ToolSimilarity.rank).limit(limit).all()
+        if not rows:
+            return None
+
+        results = []
+        for row in rows:
+            reasons = []
+            if row.feature_score >= 50:
+                reasons.append("Similar features")
+            if row.price_score >= 80:
+                reasons.append("Similar pricing")
+            if row.integration_score > 0:
+                reasons.append("Shared integrations")
+            reasons.append("Same category")
+            results.append({
+                "tool": {
+                    "id": row.id,
+                    "name": row.name,
+                    "slug": row.slug,
+                    "logo_url": row.logo_url,
+                    "category_id": row.category_id
+                },
+                "score": round(row.score / 100, 2),
+                "match_reasons": reasons
+            })
+        return results
+
+    @staticmethod
+    def get_stack_recommendations(
+        db: Session,
+        tool_ids: List[int],
+        limit: int = 10
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recommendations for a stack of seed tools, scored against their
+        combined profile, with each recommendation's similarity to every
+        seed. Returns None when none of the seeds is an active tool.
+        """
+        index = recommendation_index
+        if not index.is_built:
+            index = SearchService._live_stack_index(db, tool_ids, limit)
+            if index is None:
+                return None
+
+        ranked = index.recommend_stack(tool_ids, limit=limit)
+        if ranked is None:
+            return None
+        tools = SearchService._load_tools(db, [r["tool_id"] for r in ranked])
+
+        results = []
+        for recommendation in ranked:
+            tool = tools.get(recommendation["tool_id"])
+            if tool is None:
+                continue
+            components = recommendation["components"]
+            reasons = []
+            if components["features"] >= 0.3:
+                reasons.append("Shares features with your stack")
+            if components["integrations"] > 0:
+                reasons.append("Integrates with your stack")
+            if components["category"] > 0:
+                reasons.append("Same category as part of your stack")
+            results.append({
+                "tool": {
+                    "id": tool.id,
+                    "name": tool.name,
+                    "slug": tool.slug,
+                    "logo_url": tool.logo_url,
+                    "category_id": tool.category_id
+                },
+                "score": round(recommendation["score"], 2),
+                "match_reasons": reasons,
+                "contributions": [
+                    {"tool_id": seed_id, "score": round(score, 2)}
+                    for seed_id, score in recommendation["contributions"].items()
+                ]
+            })
+        return results
+
+    @staticmethod
+    def _live_stack_index(
+        db: Session,
+        tool_ids: List[int],
+        limit: int = 10
+    ) -> Optional[RecommendationIndex]:
+        """
+        Unscored index over the seeds and the candidates the live query
+        finds for them: active tools in a seed's category or integrated
+        with a seed, most viewed first. Returns None when none of the seeds
+        is an active tool.
+        """
+        seeds = db.query(Tool.id, Tool.category_id).filter(
+            Tool.id.in_(tool_ids),
+            Tool.is_active == True
+        ).all()
+        if not seeds:
+            return None
+        seed_ids = [tool_id for tool_id, _ in seeds]
+        category_ids = {category_id for _, category_id in seeds if category_id is not None}
+
+        partners = select(Integration.integrates_with).where(Integration.tool_id.in_(seed_ids))
+        candidate_ids = [tool_id for tool_id, in db.query(Tool.id).filter(
+            Tool.is_active == True,
+            ~Tool.id.in_(seed_ids),
+            or_(Tool.category_id.in_(category_ids), Tool.id.in_(partners))
+        ).order_by(Tool.query_count.desc().nullslast(), Tool.id).limit(limit * 2 * len(seed_ids)).all()]
+
+        # Not registered: only ever holds these tools
+        index = RecommendationIndex()
+        index.upsert(load_tool_documents(db, seed_ids + candidate_ids))
+        return index
+
+    @staticmethod
+    def get_graph_recommendations(
+        db: Session,
+        tool_ids: List[int],
+        limit: int = 10
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recommendations from a random walk with restart over the
+        integration graph, starting from one or more seed tools. Returns
+        None when none of the seeds is an active tool.
+        """
+        graph = integration_graph
+        if not graph.is_built:
+            graph = IntegrationGraph(cache_size=0)
+            graph.rebuild(load_tool_documents(db))
+
+        ranked = graph.recommend(tool_ids, limit=limit)
+        if ranked is None:
+            return None
+        tools = SearchService._load_tools(db, [r["tool_id"] for r in ranked])
+
+        results = []
+        for recommendation in ranked:
+            tool = tools.get(recommendation["tool_id"])
+            if tool is None:
+                continue
+            results.append({
+                "tool": {
+                    "id": tool.id,
+                    "name": tool.name,
+                    "slug": tool.slug,
+                    "logo_url": tool.logo_url,
+                    "category_id": tool.category_id
+                },
+                "score": round(recommendation["score"], 6)
+            })
+        return results
+
     @staticmethod
     def get_recommendations(
         db: Session,
         tool_id: int,
         limit: int = 10
     ) -> List[Dict[str, Any]]:
+        results = SearchService._precomputed_recommendations(db, tool_id, limit)
+        if results is not None:
+            return results
+        
+        # Not scored by the similarity job yet
+        return SearchService._live_recommendations(db, tool_id, limit)
+
+    @staticmethod
+    def _recommendation_loaders() -> List[Any]:
+        # integrations_out is a backref, only present once mappers are configured
+        configure_mappers()
+        return [
+            selectinload(Tool.pricing_tiers),
+            selectinload(Tool.features),
+            selectinload(Tool.integrations_out)
+        ]
+
+    @staticmethod
+    def _live_recommendations(
+        db: Session,
+        tool_id: int,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Score same-category tools straight from the database. The target and
+        the candidates come with their pricing tiers, features and
+        integrations in batched selectin loads, and ratings in one grouped
+        query, so the number of queries does not depend on limit.
+        """
+        loaders = SearchService._recommendation_loaders()
+
         # Get the target tool
-        target_tool = db.query(Tool).filter(Tool.id == tool_id).first()
+        target_tool = db.query(Tool).options(*loaders).filter(Tool.id == tool_id).first()
         if not target_tool:
             return []
             
         # Get tools in the same category
-        similar_tools = db.query(Tool).filter(
+        similar_tools = db.query(Tool).options(*loaders).filter(
             Tool.category_id == target_tool.category_id,
             Tool.id != target_tool.id,
             Tool.is_active == True
         ).limit(limit * 2).all()  # Get more than needed to filter later
-        
+        if not similar_tools:
+            return []
+
+        ratings = dict(
+            db.query(ReviewAggregate.tool_id, func.avg(ReviewAggregate.avg_rating))
+            .filter(ReviewAggregate.tool_id.in_([target_tool.id] + [tool.id for tool in similar_tools]))
+            .group_by(ReviewAggregate.tool_id)
+            .all()
+        )
+
+        def lowest_price(tool) -> Optional[float]:
+            prices = [float(p.monthly_price) for p in tool.pricing_tiers if p.monthly_price]
+            return min(prices) if prices else None
+
+        def available_features(tool) -> set:
+            return {f.feature_name for f in tool.features if f.is_available}
+
+        # Everything about the target is computed once
+        target_price = lowest_price(target_tool)
+        target_features = available_features(target_tool)
+        target_integrations = {i.integrates_with for i in target_tool.integrations_out}
+        target_rating = float(ratings.get(target_tool.id) or 0)
+
         # Simple scoring (in a real app, this would be more sophisticated)
         def calculate_score(tool):
             score = 0.0
@@ -160,41 +817,26 @@ class SearchService:
                 score += 0.15
                 
             # Price similarity (if available)
-            if target_tool.pricing_tiers and tool.pricing_tiers:
-                target_price = min((p.monthly_price or float('inf') for p in target_tool.pricing_tiers), default=None)
-                tool_price = min((p.monthly_price or float('inf') for p in tool.pricing_tiers), default=None)
-                
-                if target_price and tool_price:
-                    price_ratio = min(target_price, tool_price) / max(target_price, tool_price)
-                    score += 0.2 * price_ratio
+            tool_price = lowest_price(tool)
+            if target_price and tool_price:
+                price_ratio = min(target_price, tool_price) / max(target_price, tool_price)
+                score += 0.2 * price_ratio
             
             # Feature overlap
-            target_features = {f.feature_name for f in target_tool.features if f.is_available}
-            tool_features = {f.feature_name for f in tool.features if f.is_available}
-            common_features = target_features.intersection(tool_features)
-            
             if target_features:
+                common_features = target_features.intersection(available_features(tool))
                 feature_overlap = len(common_features) / len(target_features)
                 score += 0.4 * feature_overlap
                 
             # Integration overlap
-            target_integrations = {i.integrates_with for i in target_tool.integrations_out}
-            tool_integrations = {i.integrates_with for i in tool.integrations_out}
-            common_integrations = target_integrations.intersection(tool_integrations)
-            
             if target_integrations:
+                tool_integrations = {i.integrates_with for i in tool.integrations_out}
+                common_integrations = target_integrations.intersection(tool_integrations)
                 integration_overlap = len(common_integrations) / len(target_integrations)
                 score += 0.15 * integration_overlap
                 
             # Review similarity (simplified)
-            target_rating = db.query(func.avg(ReviewAggregate.avg_rating)).filter(
-                ReviewAggregate.tool_id == target_tool.id
-            ).scalar() or 0
-                
-            tool_rating = db.query(func.avg(ReviewAggregate.avg_rating)).filter(
-                ReviewAggregate.tool_id == tool.id
-            ).scalar() or 0
-            
+            tool_rating = float(ratings.get(tool.id) or 0)
             rating_similarity = 1 - (abs(target_rating - tool_rating) / 5)  # Normalize to 0-1
             score += 0.1 * rating_similarity
             
@@ -225,4 +867,4 @@ class SearchService:
                 ]
             }
             for tool, score in scored_tools[:limit]
-        ]
\ No newline at end of file
+        ]
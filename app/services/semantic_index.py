@@ -0,0 +1,399 @@
+# app/services/semantic_index.py
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from collections import Counter
+from functools import lru_cache
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from app.utils.search import analyze
+from app.services.catalog_sync import register_index
+from app.services.search_cache import search_cache
+
+
+def _sparse_dot(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    data: np.ndarray,
+    dense: np.ndarray,
+    n_rows: int
+) -> np.ndarray:
+    """
+    Multiply a sparse matrix given as (row, column, value) triples by a
+    dense matrix, one output column at a time with bincount. Swapping rows
+    and cols multiplies by the transpose.
+    """
+    out = np.empty((n_rows, dense.shape[1]), dtype=np.float32)
+    for j in range(dense.shape[1]):
+        out[:, j] = np.bincount(rows, weights=data * dense[cols, j], minlength=n_rows)
+    return out
+
+
+@lru_cache(maxsize=131072)
+def _term_bucket(term: str, buckets: int) -> Tuple[int, float]:
+    # Stable across processes, unlike hash()
+    h = zlib.crc32(term.encode())
+    return h % buckets, 1.0 if h & 0x80000000 else -1.0
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SemanticIndex:
+    """
+    Dependency-free semantic search over tool name, tagline and description.
+
+    Documents are embedded with hashed TF-IDF over words and adjacent word
+    pairs, projected onto the top singular vectors of the corpus (latent
+    semantic analysis, fitted with a randomized SVD) and stored in an IVF
+    index: vectors are grouped under k-means centroids, and a query only
+    scores the vectors of its NPROBE nearest centroids.
+
+    Tools added after the fit are folded into the existing projection. Once
+    REFIT_RATIO of the catalog has changed the index asks for a refit, which
+    a background task runs on a snapshot so writers and queries never wait
+    on it.
+    """
+
+    HASH_BUCKETS = 2 ** 14
+    COMPONENTS = 96
+    OVERSAMPLING = 10
+    POWER_ITERATIONS = 1
+    # Below this many tools a brute-force scan beats probing lists
+    BRUTE_FORCE_LIMIT = 2000
+    NPROBE = 8
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLE = 20000
+    REFIT_RATIO = 0.2
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rng = np.random.default_rng(0)
+        self._refit_due = threading.Event()
+        # Tools changed while a refit runs, replayed onto its result
+        self._changed_during_refit: Optional[set] = None
+        self._reset()
+        self.is_built = False
+
+    def _reset(self) -> None:
+        # Raw hashed term frequencies per tool: (buckets, values)
+        self._raw: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._df = np.zeros(self.HASH_BUCKETS, dtype=np.int64)
+        self._idf: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+        self._changes_since_fit = 0
+
+        self._rows: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._row_tool_ids = np.zeros(0, dtype=np.int64)
+
+        self._centroids: Optional[np.ndarray] = None
+        self._row_list = np.zeros(0, dtype=np.int64)
+        self._lists: List[set] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+
+    @classmethod
+    def _hash_terms(cls, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        words = analyze(text)
+        terms = Counter(words)
+        terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+        buckets: Dict[int, float] = {}
+        for term, count in terms.items():
+            bucket, sign = _term_bucket(term, cls.HASH_BUCKETS)
+            buckets[bucket] = buckets.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+        buckets = {b: v for b, v in buckets.items() if v}
+        return (
+            np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets)),
+            np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets))
+        )
+
+    @staticmethod
+    def _document_text(doc: Dict[str, Any]) -> str:
+        return " ".join(doc.get(field) or "" for field in ("name", "tagline", "description"))
+
+    def _weighted(self, buckets: np.ndarray, values: np.ndarray) -> np.ndarray:
+        weighted = values * self._idf[buckets]
+        norm = np.linalg.norm(weighted)
+        return weighted / norm if norm else weighted
+
+    def _embed(self, buckets: np.ndarray, values: np.ndarray) -> np.ndarray:
+        vector = self._weighted(buckets, values) @ self._components[buckets]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # Fitting
+
+    def _fit_locked(self) -> None:
+        """
+        Fit IDF weights and the LSA projection on the current documents,
+        then re-embed every document and rebuild the IVF lists.
+        """
+        tool_ids = list(self._raw)
+        n = len(tool_ids)
+        self._changes_since_fit = 0
+        if n == 0:
+            self._idf = np.ones(self.HASH_BUCKETS, dtype=np.float32)
+            self._components = np.zeros((self.HASH_BUCKETS, 1), dtype=np.float32)
+            self._store_vectors_locked([], np.zeros((0, 1), dtype=np.float32))
+            return
+
+        self._idf = (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+
+        # Sparse matrix of L2-normalized TF-IDF rows, as (row, bucket, value)
+        rows = [self._raw[tool_id] for tool_id in tool_ids]
+        row_of = np.repeat(np.arange(n), [len(buckets) for buckets, _ in rows])
+        buckets = np.concatenate([buckets for buckets, _ in rows])
+        data = np.concatenate([self._weighted(b, v) for b, v in rows]).astype(np.float32)
+        d = self.HASH_BUCKETS
+
+        # Randomized SVD: top right singular vectors of X. Small catalogs
+        # still get a reduced rank, or nothing would generalize.
+        k = min(self.COMPONENTS, max(1, n // 2))
+        width = min(k + self.OVERSAMPLING, n)
+        omega = self._rng.standard_normal((d, width)).astype(np.float32)
+        y = _sparse_dot(row_of, buckets, data, omega, n)
+        for _ in range(self.POWER_ITERATIONS):
+            q, _ = np.linalg.qr(y)
+            z, _ = np.linalg.qr(_sparse_dot(buckets, row_of, data, q, d))
+            y = _sparse_dot(row_of, buckets, data, z, n)
+        q, _ = np.linalg.qr(y)
+        b = _sparse_dot(buckets, row_of, data, q, d).T
+        _, _, vt = np.linalg.svd(b, full_matrices=False)
+        self._components = np.ascontiguousarray(vt[:k].T, dtype=np.float32)
+
+        vectors = _normalize_rows(_sparse_dot(row_of, buckets, data, self._components, n))
+        self._store_vectors_locked(tool_ids, vectors)
+
+    def _store_vectors_locked(self, tool_ids: List[int], vectors: np.ndarray) -> None:
+        n = len(tool_ids)
+        self._rows = {tool_id: row for row, tool_id in enumerate(tool_ids)}
+        self._free_rows = []
+        self._vectors = vectors.astype(np.float32)
+        self._row_tool_ids = np.array(tool_ids, dtype=np.int64)
+
+        self._centroids = None
+        self._lists = []
+        self._list_arrays = []
+        self._row_list = np.zeros(n, dtype=np.int64)
+        if n < self.BRUTE_FORCE_LIMIT:
+            return
+
+        # Spherical k-means on a sample, then assign every vector
+        nlist = int(math.sqrt(n))
+        sample = vectors
+        if n > self.KMEANS_SAMPLE:
+            sample = vectors[self._rng.choice(n, self.KMEANS_SAMPLE, replace=False)]
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignment = self._nearest_centroids(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            filled = np.bincount(assignment, minlength=nlist) > 0
+            centroids[filled] = _normalize_rows(sums[filled])
+
+        self._centroids = centroids
+        self._row_list = self._nearest_centroids(vectors, centroids)
+        self._lists = [set() for _ in range(nlist)]
+        for row, list_id in enumerate(self._row_list.tolist()):
+            self._lists[list_id].add(row)
+        self._list_arrays = [None] * nlist
+
+    @staticmethod
+    def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        assignment = np.zeros(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            assignment[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return assignment
+
+    # Incremental maintenance
+
+    def _add_raw_locked(self, doc: Dict[str, Any]) -> None:
+        buckets, values = self._hash_terms(self._document_text(doc))
+        self._raw[doc["id"]] = (buckets, values)
+        self._df[buckets] += 1
+
+    def _remove_locked(self, tool_id: int) -> None:
+        raw = self._raw.pop(tool_id, None)
+        if raw is None:
+            return
+        self._df[raw[0]] -= 1
+        self._drop_row_locked(tool_id)
+
+    def _drop_row_locked(self, tool_id: int) -> None:
+        row = self._rows.pop(tool_id, None)
+        if row is None:
+            return
+        self._row_tool_ids[row] = -1
+        self._vectors[row] = 0
+        if self._centroids is not None:
+            list_id = int(self._row_list[row])
+            self._lists[list_id].discard(row)
+            self._list_arrays[list_id] = None
+        self._free_rows.append(row)
+
+    def _fold_in_locked(self, tool_id: int) -> None:
+        vector = self._embed(*self._raw[tool_id])
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._row_tool_ids)
+            self._vectors = np.vstack([self._vectors, np.zeros((1, self._vectors.shape[1]), dtype=np.float32)])
+            self._row_tool_ids = np.append(self._row_tool_ids, -1)
+            self._row_list = np.append(self._row_list, 0)
+        self._rows[tool_id] = row
+        self._row_tool_ids[row] = tool_id
+        self._vectors[row] = vector
+        if self._centroids is not None:
+            list_id = int(np.argmax(self._centroids @ vector))
+            self._row_list[row] = list_id
+            self._lists[list_id].add(row)
+            self._list_arrays[list_id] = None
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            for doc in documents:
+                self._add_raw_locked(doc)
+            self._fit_locked()
+            # A refit running on the previous documents is now stale
+            self._changed_during_refit = None
+            self.is_built = True
+
+    def _count_changes_locked(self, tool_ids: List[int]) -> None:
+        if self._changed_during_refit is not None:
+            self._changed_during_refit.update(tool_ids)
+        self._changes_since_fit += len(tool_ids)
+        if self._changes_since_fit > self.REFIT_RATIO * max(len(self._rows), 1):
+            self._refit_due.set()
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            tool_ids = []
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_raw_locked(doc)
+                tool_ids.append(doc["id"])
+            if self._components is None:
+                return
+            for tool_id in tool_ids:
+                self._fold_in_locked(tool_id)
+            self._count_changes_locked(tool_ids)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            tool_ids = list(tool_ids)
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+            if self._components is not None:
+                self._count_changes_locked(tool_ids)
+
+    def wait_until_refit_due(self) -> None:
+        """Block until enough of the catalog has changed to refit"""
+        self._refit_due.wait()
+        self._refit_due.clear()
+
+    def wake(self) -> None:
+        self._refit_due.set()
+
+    def refit(self) -> bool:
+        """
+        Refit the projection on a snapshot of the current documents without
+        holding the lock, then swap it in and fold in the tools that changed
+        meanwhile. Returns False when no refit was needed.
+        """
+        with self._lock:
+            if self._components is None or self._changed_during_refit is not None:
+                return False
+            if self._changes_since_fit <= self.REFIT_RATIO * max(len(self._rows), 1):
+                return False
+            fitted = SemanticIndex()
+            fitted._raw = dict(self._raw)
+            fitted._df = self._df.copy()
+            self._changed_during_refit = set()
+
+        try:
+            fitted._fit_locked()
+        except Exception:
+            with self._lock:
+                self._changed_during_refit = None
+            raise
+
+        with self._lock:
+            changed = self._changed_during_refit
+            if changed is None:
+                # Rebuilt from the database while fitting
+                return False
+            self._changed_during_refit = None
+            for attr in (
+                "_idf", "_components", "_rows", "_free_rows", "_vectors", "_row_tool_ids",
+                "_centroids", "_row_list", "_lists", "_list_arrays"
+            ):
+                setattr(self, attr, getattr(fitted, attr))
+            self._changes_since_fit = len(changed)
+            for tool_id in changed:
+                self._drop_row_locked(tool_id)
+                if tool_id in self._raw:
+                    self._fold_in_locked(tool_id)
+        # Cached rankings blended the old projection's similarities
+        search_cache.invalidate()
+        return True
+
+    # Querying
+
+    def _candidate_rows_locked(self, query_vector: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.flatnonzero(self._row_tool_ids >= 0)
+        nprobe = min(self.NPROBE, len(self._centroids))
+        probe = np.argpartition(-(self._centroids @ query_vector), nprobe - 1)[:nprobe]
+        arrays = []
+        for list_id in probe.tolist():
+            if self._list_arrays[list_id] is None:
+                self._list_arrays[list_id] = np.fromiter(self._lists[list_id], dtype=np.int64)
+            arrays.append(self._list_arrays[list_id])
+        return np.concatenate(arrays)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 100,
+        min_similarity: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to `limit` (tool_id, cosine similarity) pairs closest to
+        the query, best first.
+        """
+        buckets, values = self._hash_terms(query)
+        if buckets.size == 0:
+            return []
+
+        with self._lock:
+            if self._components is None or not self._rows:
+                return []
+            query_vector = self._embed(buckets, values)
+            if not query_vector.any():
+                return []
+            rows = self._candidate_rows_locked(query_vector)
+            if rows.size == 0:
+                return []
+            similarities = self._vectors[rows] @ query_vector
+            if rows.size > limit:
+                top = np.argpartition(-similarities, limit - 1)[:limit]
+                rows, similarities = rows[top], similarities[top]
+            tool_ids = self._row_tool_ids[rows]
+
+        order = np.lexsort((tool_ids, -similarities))
+        return [
+            (int(tool_ids[i]), float(similarities[i]))
+            for i in order
+            if similarities[i] >= min_similarity and tool_ids[i] >= 0
+        ]
+
+
+semantic_index = register_index(SemanticIndex())
@@ -0,0 +1,166 @@
+# app/services/similarity.py
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+
+# Kept free of database and settings imports: shards are scored in
+# worker processes that only import this module.
+
+# Component weights of the similarity score
+SIMILARITY_WEIGHTS = {
+    "features": 0.4,
+    "price": 0.2,
+    "category": 0.15,
+    "integrations": 0.15,
+    "rating": 0.1
+}
+
+COMPONENTS = tuple(SIMILARITY_WEIGHTS)
+
+BLOCK_ROWS = 512
+
+
+def similarity_profile(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The fields similarity_score compares, from a catalog document
+    (see app.services.catalog_sync.load_tool_documents).
+    """
+    return {
+        "id": doc["id"],
+        "category_id": doc.get("category_id"),
+        "features": frozenset(f for f in doc.get("features") or [] if f),
+        "integrations": frozenset(doc.get("integrations") or ()),
+        "price": float(doc.get("avg_price") or 0),
+        "rating": float(doc.get("rating") or 0)
+    }
+
+
+def similarity_score(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """
+    Calculate similarity score between two tool profiles (0-100)
+    """
+    # 1. Feature overlap
+    common_features = len(a["features"] & b["features"])
+    total_features = len(a["features"] | b["features"])
+    feature_score = (common_features / total_features * 100) if total_features > 0 else 0
+
+    # 2. Price similarity
+    price_a = a["price"] or 0
+    price_b = b["price"] or 0
+
+    if price_a == 0 and price_b == 0:
+        price_score = 100  # Both are free
+    else:
+        price_diff = abs(price_a - price_b)
+        max_price = max(price_a, price_b) or 1  # Avoid division by zero
+        price_score = (1 - price_diff / max_price) * 100
+
+    # 3. Category match
+    category_score = 100 if a["category_id"] == b["category_id"] else 0
+
+    # 4. Integration overlap
+    common_integrations = len(a["integrations"] & b["integrations"])
+    total_integrations = len(a["integrations"] | b["integrations"]) or 1
+    integration_score = (common_integrations / total_integrations) * 100
+
+    # 5. Review similarity
+    rating_diff = abs((a["rating"] or 0) - (b["rating"] or 0))
+    review_score = (1 - rating_diff / 5) * 100  # Assuming 5-star rating scale
+
+    # 6. Weighted final score
+    similarity = (
+        feature_score * SIMILARITY_WEIGHTS["features"] +
+        price_score * SIMILARITY_WEIGHTS["price"] +
+        category_score * SIMILARITY_WEIGHTS["category"] +
+        integration_score * SIMILARITY_WEIGHTS["integrations"] +
+        review_score * SIMILARITY_WEIGHTS["rating"]
+    )
+
+    return round(similarity, 2)
+
+
+def _membership_matrix(sets: List[Set[Any]]) -> np.ndarray:
+    columns: Dict[Any, int] = {}
+    for values in sets:
+        for value in values:
+            columns.setdefault(value, len(columns))
+    matrix = np.zeros((len(sets), max(len(columns), 1)), dtype=np.float32)
+    for row, values in enumerate(sets):
+        matrix[row, [columns[value] for value in values]] = 1.0
+    return matrix
+
+
+def _jaccard(block: np.ndarray, matrix: np.ndarray, block_sizes: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    intersection = block @ matrix.T
+    union = block_sizes[:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def _similarity_ratio(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    # Both free counts as identical pricing
+    high = np.maximum(values[:, None], reference[None, :])
+    diff = np.abs(values[:, None] - reference[None, :])
+    return np.where(high > 0, 1 - diff / np.where(high > 0, high, 1), 1.0)
+
+
+def score_shard(
+    category_id: Optional[int],
+    profiles: List[Dict[str, Any]],
+    top_n: int,
+    min_score: float = 0.0
+) -> Tuple[Optional[int], List[Tuple[Any, ...]], int]:
+    """
+    Score every pair of tools in one category, as similarity_score does,
+    a block of rows at a time: features and integrations become 0/1
+    membership matrices whose products give every pairwise Jaccard at
+    once, and price and rating similarity are broadcast differences.
+
+    Returns (category_id, rows, pairs scored), where rows are (tool_id,
+    similar_tool_id, score, rank, features, price, integrations, rating)
+    for each tool's top_n most similar tools scoring at least min_score,
+    with the score and its components on the same 0-100 scale.
+    """
+    n = len(profiles)
+    keep = min(top_n, n - 1)
+    if keep <= 0:
+        return category_id, [], 0
+
+    profiles = sorted(profiles, key=lambda p: p["id"])
+    ids = np.array([p["id"] for p in profiles], dtype=np.int64)
+    features = _membership_matrix([p["features"] for p in profiles])
+    integrations = _membership_matrix([p["integrations"] for p in profiles])
+    feature_sizes = features.sum(axis=1)
+    integration_sizes = integrations.sum(axis=1)
+    prices = np.array([p["price"] for p in profiles], dtype=np.float64)
+    ratings = np.array([p["rating"] for p in profiles], dtype=np.float64)
+    weights = np.array([SIMILARITY_WEIGHTS[c] for c in COMPONENTS], dtype=np.float64)
+
+    rows = []
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n)
+        block = slice(start, stop)
+
+        price = _similarity_ratio(prices[block], prices)
+        components = np.stack([
+            _jaccard(features[block], features, feature_sizes[block], feature_sizes),
+            price,
+            np.ones_like(price),
+            _jaccard(integrations[block], integrations, integration_sizes[block], integration_sizes),
+            1 - np.abs(ratings[block, None] - ratings[None, :]) / 5
+        ], axis=-1).astype(np.float64) * 100
+        scores = np.round(components @ weights, 2)
+        # Never recommend a tool for itself
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        for i in range(stop - start):
+            top = np.argpartition(-scores[i], keep - 1)[:keep]
+            top = top[np.lexsort((ids[top], -scores[i, top]))]
+            for rank, j in enumerate(top, start=1):
+                if scores[i, j] < min_score:
+                    break
+                feature, price_match, _, integration, rating = components[i, j].round(2).tolist()
+                rows.append((
+                    int(ids[start + i]), int(ids[j]), float(scores[i, j]), rank,
+                    feature, price_match, integration, rating
+                ))
+    return category_id, rows, n * (n - 1) // 2
@@ -0,0 +1,369 @@
+# app/services/similarity_job.py
+from typing import List, Dict, Any, Optional, Iterable, Set
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from sqlalchemy import delete, insert, select, func, or_, false
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.session import SessionLocal, engine
+from app.database.models.tool_similarity import ToolSimilarity
+from app.models.tool import Tool
+from app.services.catalog_sync import load_tool_documents, register_index
+from app.services.similarity import similarity_profile, score_shard
+
+logger = logging.getLogger(__name__)
+
+INSERT_BATCH_SIZE = 5000
+
+
+class SimilarityRebuildJob:
+    """
+    Keeps the tool_similarity table up to date off the request path. The
+    catalog is sharded by category, shards are scored in a process pool
+    (largest first), and the new rows replace the old ones of the same
+    categories in a single transaction, so readers see either the previous
+    run or the new one.
+
+    The job is registered as a catalog index: catalog writes mark the
+    categories they touch as stale and the next run rescores only those.
+    The whole table is rebuilt every interval_seconds and whenever a
+    worker takes the job over. One worker per deployment runs it: the one
+    whose connection holds the job's Postgres advisory lock.
+    """
+
+    LOCK_KEY = 7304816
+
+    def __init__(
+        self,
+        workers: int = 0,
+        top_n: int = 20,
+        min_score: float = 0.0,
+        interval_seconds: float = 21600.0
+    ):
+        self.workers = workers
+        self.top_n = top_n
+        self.min_score = min_score
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._running = False
+        self._progress: Dict[str, Any] = self._new_progress("idle")
+        self._last_run: Optional[Dict[str, Any]] = None
+        self._due = threading.Event()
+        self._full_due = True
+        self._full_at: Optional[float] = None
+        self._stale_tools: Set[int] = set()
+        self._stale_categories: Set[Optional[int]] = set()
+        self._leader_lock = threading.Lock()
+        self._leader = False
+        self._lock_connection = None
+
+    @staticmethod
+    def _new_progress(state: str, mode: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "state": state,
+            "mode": mode,
+            "started_at": None,
+            "finished_at": None,
+            "tools": 0,
+            "shards_total": 0,
+            "shards_done": 0,
+            "pairs_scored": 0,
+            "rows_written": 0,
+            "load_seconds": None,
+            "score_seconds": None,
+            "write_seconds": None,
+            "duration_seconds": None,
+            "error": None
+        }
+
+    def _update(self, **changes: Any) -> None:
+        with self._lock:
+            self._progress.update(changes)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            progress = dict(self._progress)
+            shards_total = progress["shards_total"]
+            progress["progress"] = round(progress["shards_done"] / shards_total, 4) if shards_total else 0.0
+            progress["running"] = self._running
+            progress["leader"] = self._leader
+            progress["last_run"] = dict(self._last_run) if self._last_run else None
+            return progress
+
+    # Catalog index interface: changes are only recorded here, the
+    # background task rescores them
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._full_due = True
+        self._due.set()
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._stale_tools.add(doc["id"])
+                self._stale_categories.add(doc.get("category_id"))
+        self._due.set()
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._stale_tools.update(tool_ids)
+        self._due.set()
+
+    def wait_until_due(self) -> None:
+        """Block until a catalog change is recorded or the interval passes"""
+        self._due.wait(self.interval_seconds)
+        self._due.clear()
+
+    def wake(self) -> None:
+        self._due.set()
+
+    def run_due(self) -> bool:
+        """
+        In the worker running the job, rebuild the table if a full run is
+        due, else rescore the stale categories, in the calling thread.
+        Returns False when nothing ran.
+        """
+        if not self._hold_leadership():
+            with self._lock:
+                # Rescored by the worker running the job
+                self._stale_tools.clear()
+                self._stale_categories.clear()
+            return False
+
+        with self._lock:
+            if self._running:
+                return False
+            full = self._full_due or (
+                self._full_at is None or time.monotonic() - self._full_at >= self.interval_seconds
+            )
+            tools, categories = self._stale_tools, self._stale_categories
+            if not (full or tools or categories):
+                return False
+            self._claim_locked(full)
+        self._run_claimed(full, tools, categories)
+        return True
+
+    def start(self) -> bool:
+        """
+        Rebuild the whole table on a background thread. Returns False if a
+        run is already in progress, here or in the worker running the job.
+        """
+        if not self._hold_leadership():
+            return False
+        with self._lock:
+            if self._running:
+                return False
+            self._claim_locked(True)
+        threading.Thread(
+            target=self._run_claimed, args=(True, set(), set()), name="similarity-rebuild", daemon=True
+        ).start()
+        return True
+
+    def _claim_locked(self, full: bool) -> None:
+        self._running = True
+        self._progress = self._new_progress("loading", "full" if full else "incremental")
+        self._progress["started_at"] = datetime.now(timezone.utc)
+        # A full run rescores whatever is stale so far
+        if full:
+            self._full_due = False
+        self._stale_tools = set()
+        self._stale_categories = set()
+
+    def _hold_leadership(self) -> bool:
+        """
+        Whether this worker runs the job, taking the advisory lock if no
+        worker holds it. A worker that takes the job over rebuilds the
+        whole table: it did not track the changes made before.
+        """
+        with self._leader_lock:
+            if self._leader and self._lock_connection is not None:
+                try:
+                    self._lock_connection.execute(select(1))
+                    self._lock_connection.commit()
+                except Exception:
+                    # The lock went with the session
+                    logger.warning("Lost the similarity job lock connection")
+                    self._lock_connection.invalidate()
+                    self._lock_connection.close()
+                    self._lock_connection = None
+                    self._leader = False
+            if not self._leader:
+                self._leader = self._take_lock()
+                if self._leader:
+                    logger.info(f"Running the similarity job in worker {os.getpid()}")
+                    with self._lock:
+                        self._full_due = True
+            return self._leader
+
+    def _take_lock(self) -> bool:
+        if engine.dialect.name != "postgresql":
+            # No other process shares the job
+            return True
+        connection = engine.connect()
+        try:
+            taken = connection.execute(select(func.pg_try_advisory_lock(self.LOCK_KEY))).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not taken:
+            connection.close()
+            return False
+        # Held for the life of the session
+        self._lock_connection = connection
+        return True
+
+    def _run_claimed(self, full: bool, tools: Set[int], categories: Set[Optional[int]]) -> None:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            self._execute(db, started, full, tools, categories)
+            if full:
+                self._full_at = time.monotonic()
+        except Exception as e:
+            logger.exception("Similarity rebuild failed")
+            self._update(state="failed", error=str(e))
+            with self._lock:
+                # Retried on the next run
+                if full:
+                    self._full_due = True
+                self._stale_tools.update(tools)
+                self._stale_categories.update(categories)
+        finally:
+            db.close()
+            with self._lock:
+                self._progress["finished_at"] = datetime.now(timezone.utc)
+                self._progress["duration_seconds"] = round(time.perf_counter() - started, 3)
+                self._last_run = dict(self._progress)
+                self._running = False
+                if self._stale_tools or self._stale_categories:
+                    self._due.set()
+
+    @staticmethod
+    def _in_categories(categories: Set[Optional[int]]):
+        conditions = []
+        category_ids = [category_id for category_id in categories if category_id is not None]
+        if category_ids:
+            conditions.append(Tool.category_id.in_(category_ids))
+        if None in categories:
+            conditions.append(Tool.category_id.is_(None))
+        return or_(*conditions) if conditions else false()
+
+    def _execute(
+        self,
+        db: Session,
+        started: float,
+        full: bool,
+        tools: Set[int],
+        categories: Set[Optional[int]]
+    ) -> None:
+        if full:
+            documents = load_tool_documents(db)
+        else:
+            categories = set(categories)
+            if tools:
+                categories.update(
+                    category_id for category_id, in db.query(Tool.category_id).filter(Tool.id.in_(tools))
+                )
+                # A changed tool may have left the category of the tools
+                # listing it as a neighbour
+                categories.update(
+                    category_id for category_id, in db.query(Tool.category_id).join(
+                        ToolSimilarity, ToolSimilarity.tool_id == Tool.id
+                    ).filter(ToolSimilarity.similar_tool_id.in_(tools)).distinct()
+                )
+            members = db.query(Tool.id).filter(self._in_categories(categories))
+            documents = load_tool_documents(db, [tool_id for tool_id, in members])
+
+        shards: Dict[Optional[int], List[Dict[str, Any]]] = {}
+        for doc in documents:
+            shards.setdefault(doc.get("category_id"), []).append(similarity_profile(doc))
+        # Large categories dominate the run time, start them first
+        ordered = sorted(shards.items(), key=lambda item: len(item[1]), reverse=True)
+        loaded = time.perf_counter()
+        self._update(
+            state="scoring",
+            tools=len(documents),
+            shards_total=len(shards),
+            load_seconds=round(loaded - started, 3)
+        )
+
+        rows = []
+        pairs_scored = 0
+        if ordered:
+            # spawn: forking a process that runs threads and holds
+            # database connections is not safe
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers or os.cpu_count() or 1, len(ordered)),
+                mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = [
+                    executor.submit(score_shard, category_id, profiles, self.top_n, self.min_score)
+                    for category_id, profiles in ordered
+                ]
+                for future in as_completed(futures):
+                    _, shard_rows, pairs = future.result()
+                    rows.extend(shard_rows)
+                    pairs_scored += pairs
+                    with self._lock:
+                        self._progress["shards_done"] += 1
+                        self._progress["pairs_scored"] = pairs_scored
+        scored = time.perf_counter()
+        self._update(state="writing", score_seconds=round(scored - loaded, 3))
+
+        computed_at = datetime.now(timezone.utc)
+        try:
+            if full:
+                db.execute(delete(ToolSimilarity))
+            else:
+                db.execute(delete(ToolSimilarity).where(or_(
+                    ToolSimilarity.tool_id.in_(list(tools)),
+                    ToolSimilarity.tool_id.in_(select(Tool.id).where(self._in_categories(categories)))
+                )))
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                db.execute(insert(ToolSimilarity), [
+                    {
+                        "tool_id": tool_id,
+                        "similar_tool_id": similar_tool_id,
+                        "score": score,
+                        "rank": rank,
+                        "feature_score": feature_score,
+                        "price_score": price_score,
+                        "integration_score": integration_score,
+                        "rating_score": rating_score,
+                        "computed_at": computed_at
+                    }
+                    for (
+                        tool_id, similar_tool_id, score, rank,
+                        feature_score, price_score, integration_score, rating_score
+                    ) in rows[start:start + INSERT_BATCH_SIZE]
+                ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._update(
+            state="succeeded",
+            rows_written=len(rows),
+            write_seconds=round(time.perf_counter() - scored, 3)
+        )
+        logger.info(
+            f"Rescored tool similarity ({'full' if full else 'incremental'}): {len(rows)} rows "
+            f"from {pairs_scored} pairs in {len(shards)} categories"
+        )
+
+
+similarity_job = register_index(SimilarityRebuildJob(
+    workers=settings.SIMILARITY_JOB_WORKERS,
+    top_n=settings.SIMILARITY_TOP_N,
+    min_score=settings.SIMILARITY_MIN_SCORE,
+    interval_seconds=settings.SIMILARITY_REBUILD_INTERVAL_SECONDS
+))
@@ -0,0 +1,207 @@
+# app/services/suggestion_index.py
+from typing import List, Dict, Any, Iterable, Tuple
+from bisect import bisect_left, insort
+import heapq
+import threading
+
+from app.services.catalog_sync import register_index
+
+# (lowercased key, display text)
+Entry = Tuple[str, str]
+
+
+class SuggestionIndex:
+    """
+    Typeahead index over tool names, slugs, category names and feature
+    names. Entries are (key, display text) pairs kept in a sorted array, so
+    a prefix is a contiguous range found with two binary searches. Each
+    entry carries a weight summed from the query_count of the tools that
+    contribute it; texts sharing a key ("Build" and the word suffix of
+    "Google Cloud Build") are separate entries and rank on their own.
+    """
+
+    MAX_LIMIT = 10
+    # Keep the heaviest keys for every prefix up to this length precomputed,
+    # since those prefixes cover the widest ranges
+    WARM_PREFIX_LENGTH = 2
+    # Prefix ranges wider than this get their top keys memoised
+    CACHE_THRESHOLD = 64
+    MAX_CACHED_PREFIXES = 10000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Sorted (key, display text) pairs
+        self._keys: List[Entry] = []
+        # (key, display text) -> {"weight": float, "refs": int}
+        self._entries: Dict[Entry, Dict[str, Any]] = {}
+        # tool_id -> [(entry, weight)] contributed by that tool
+        self._contributions: Dict[int, List[Tuple[Entry, float]]] = {}
+        self._prefix_cache: Dict[str, List[Entry]] = {}
+        self.is_built = False
+
+    @staticmethod
+    def _document_entries(doc: Dict[str, Any]) -> List[Tuple[str, str, float]]:
+        weight = 1.0 + (doc.get("query_count") or 0)
+        texts = [doc.get("name"), doc.get("slug"), doc.get("category_name")]
+        texts.extend(doc.get("features") or [])
+
+        entries = []
+        seen = set()
+        for text in texts:
+            if not text:
+                continue
+            text = " ".join(text.split())
+            key = text.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            entries.append((key, text, weight))
+
+            # Let "cloud" complete to "Google Cloud Build"
+            words = key.split(" ")
+            for i in range(1, len(words)):
+                word_key = " ".join(words[i:])
+                if word_key not in seen:
+                    seen.add(word_key)
+                    entries.append((word_key, text, weight))
+        return entries
+
+    def _weight(self, entry: Entry) -> float:
+        return self._entries[entry]["weight"]
+
+    def _rank(self, entry: Entry) -> Tuple[float, Entry]:
+        return -self._weight(entry), entry
+
+    def _add_locked(self, doc: Dict[str, Any], keep_sorted: bool = True) -> None:
+        contributions = []
+        for key, text, weight in self._document_entries(doc):
+            entry = (key, text)
+            stats = self._entries.get(entry)
+            if stats is None:
+                stats = self._entries[entry] = {"weight": 0.0, "refs": 0}
+                if keep_sorted:
+                    insort(self._keys, entry)
+            stats["weight"] += weight
+            stats["refs"] += 1
+            contributions.append((entry, weight))
+            if keep_sorted:
+                self._promote_cached_locked(entry)
+        self._contributions[doc["id"]] = contributions
+
+    def _remove_locked(self, tool_id: int) -> None:
+        for entry, weight in self._contributions.pop(tool_id, ()):
+            stats = self._entries[entry]
+            stats["weight"] -= weight
+            stats["refs"] -= 1
+            if stats["refs"] <= 0:
+                del self._entries[entry]
+                del self._keys[bisect_left(self._keys, entry)]
+            self._demote_cached_locked(entry)
+
+    def _promote_cached_locked(self, entry: Entry) -> None:
+        # An entry that gained weight can only enter (or move up in) the
+        # cached top lists of its own key's prefixes
+        size = self.MAX_LIMIT * 2
+        key = entry[0]
+        for n in range(1, len(key) + 1):
+            cached = self._prefix_cache.get(key[:n])
+            if cached is None:
+                continue
+            if entry not in cached:
+                if len(cached) >= size and self._rank(cached[-1]) <= self._rank(entry):
+                    continue
+                cached.append(entry)
+            cached.sort(key=self._rank)
+            del cached[size:]
+
+    def _demote_cached_locked(self, entry: Entry) -> None:
+        # An entry that lost weight may fall out of a top list, in which
+        # case the list has to be recomputed from the range
+        key = entry[0]
+        for n in range(1, len(key) + 1):
+            prefix = key[:n]
+            cached = self._prefix_cache.get(prefix)
+            if cached is not None and entry in cached:
+                del self._prefix_cache[prefix]
+                if n <= self.WARM_PREFIX_LENGTH:
+                    self._top_keys_locked(prefix)
+
+    def _warm_cache_locked(self) -> None:
+        prefixes = sorted({
+            key[:n]
+            for key, _ in self._keys
+            for n in range(1, min(len(key), self.WARM_PREFIX_LENGTH) + 1)
+        })
+        for prefix in prefixes:
+            self._top_keys_locked(prefix, force_cache=True)
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries = {}
+            self._contributions = {}
+            self._prefix_cache = {}
+            for doc in documents:
+                self._add_locked(doc, keep_sorted=False)
+            self._keys = sorted(self._entries)
+            self._warm_cache_locked()
+            self.is_built = True
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._remove_locked(doc["id"])
+                self._add_locked(doc)
+
+    def remove(self, tool_ids: Iterable[int]) -> None:
+        with self._lock:
+            for tool_id in tool_ids:
+                self._remove_locked(tool_id)
+
+    def _top_keys_locked(self, prefix: str, force_cache: bool = False) -> List[Entry]:
+        cached = self._prefix_cache.get(prefix)
+        if cached is not None:
+            return cached
+
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\uffff",), lo)
+        keys = heapq.nsmallest(
+            self.MAX_LIMIT * 2,
+            (self._keys[i] for i in range(lo, hi)),
+            key=self._rank
+        )
+
+        if force_cache or hi - lo > self.CACHE_THRESHOLD:
+            if len(self._prefix_cache) >= self.MAX_CACHED_PREFIXES:
+                # Drop the lazily cached entries but keep the warm ones
+                self._prefix_cache = {
+                    p: v for p, v in self._prefix_cache.items()
+                    if len(p) <= self.WARM_PREFIX_LENGTH
+                }
+            self._prefix_cache[prefix] = keys
+        return keys
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Return up to `limit` completions for a prefix, heaviest first.
+        """
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        limit = min(limit, self.MAX_LIMIT)
+
+        with self._lock:
+            # Over-fetch since several keys can map to the same display text
+            entries = self._top_keys_locked(prefix)
+            suggestions = []
+            seen = set()
+            for _, text in entries:
+                if text.lower() in seen:
+                    continue
+                seen.add(text.lower())
+                suggestions.append(text)
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
+
+
+suggestion_index = register_index(SuggestionIndex())
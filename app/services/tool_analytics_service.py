@@ -10,12 +10,37 @@ from app.database.models.feature import ToolFeature
 from app.database.models.pricing import PricingTier
 from app.database.models.review import ReviewAggregate
 from app.database.models.integration import Integration
+from app.database.models.tool_similarity import ToolSimilarity
+from app.services.similarity import similarity_score
+from app.services.query_stats_buffer import query_stats_buffer
+from app.services.usage_service import decayed_views
 
 logger = logging.getLogger(__name__)
 
 class ToolAnalyticsService:
     @staticmethod
-    def calculate_similarity_score(db: Session, tool_id_a: int, tool_id_b: int) -> float:
+    def similarity_profile(db: Session, tool: Tool) -> Dict[str, Any]:
+        """
+        The fields compared by similarity_score, read from a loaded tool
+        """
+        prices = [
+            float(p.monthly_price) for p in tool.pricing_tiers
+            if p.is_current and p.monthly_price is not None
+        ]
+        rating = db.query(func.avg(ReviewAggregate.avg_rating)).filter(
+            ReviewAggregate.tool_id == tool.id
+        ).scalar()
+        return {
+            "id": tool.id,
+            "category_id": tool.category_id,
+            "features": frozenset(f.feature_name for f in tool.features if f.is_available),
+            "integrations": frozenset(i.integrates_with for i in tool.integrations_out),
+            "price": sum(prices) / len(prices) if prices else 0.0,
+            "rating": float(rating or 0)
+        }
+
+    @classmethod
+    def calculate_similarity_score(cls, db: Session, tool_id_a: int, tool_id_b: int) -> float:
         """
         Calculate similarity score between two tools (0-100)
         """
@@ -26,67 +51,18 @@ class ToolAnalyticsService:
         if not tool_a or not tool_b:
             return 0.0
 
-        # 1. Feature overlap
-        features_a = {f.feature_id for f in tool_a.features}
-        features_b = {f.feature_id for f in tool_b.features}
-        
-        common_features = len(features_a.intersection(features_b))
-        total_features = len(features_a.union(features_b))
-        feature_score = (common_features / total_features * 100) if total_features > 0 else 0
-
-        # 2. Price similarity
-        price_a = tool_a.avg_monthly_price or 0
-        price_b = tool_b.avg_monthly_price or 0
-        
-        if price_a == 0 and price_b == 0:
-            price_score = 100  # Both are free
-        else:
-            price_diff = abs(price_a - price_b)
-            max_price = max(price_a, price_b) or 1  # Avoid division by zero
-            price_score = (1 - price_diff / max_price) * 100
-
-        # 3. Category match
-        category_score = 100 if tool_a.category_id == tool_b.category_id else 0
-
-        # 4. Integration overlap
-        integrations_a = {i.id for i in tool_a.integrations}
-        integrations_b = {i.id for i in tool_b.integrations}
-        
-        common_integrations = len(integrations_a.intersection(integrations_b))
-        total_integrations = len(integrations_a.union(integrations_b)) or 1
-        integration_score = (common_integrations / total_integrations) * 100
-
-        # 5. Review similarity
-        rating_a = tool_a.avg_rating or 0
-        rating_b = tool_b.avg_rating or 0
-        rating_diff = abs(rating_a - rating_b)
-        review_score = (1 - rating_diff / 5) * 100  # Assuming 5-star rating scale
-
-        # 6. Weighted final score
-        similarity = (
-            feature_score * 0.4 +
-            price_score * 0.2 +
-            category_score * 0.15 +
-            integration_score * 0.15 +
-            review_score * 0.1
-        )
-
-        return round(similarity, 2)
+        return similarity_score(cls.similarity_profile(db, tool_a), cls.similarity_profile(db, tool_b))
 
     @staticmethod
     def calculate_trending_score(tool: Tool) -> float:
         """
         Calculate trending score for a tool
         """
-        if not tool.last_queried_at:
+        if tool.trending_score is None:
             return 0.0
             
-        # 1. Recency multiplier (7-day half-life)
-        hours_since_query = (datetime.now(timezone.utc) - tool.last_queried_at).total_seconds() / 3600
-        recency_multiplier = math.exp(-hours_since_query / 168)  # 168 hours = 7 days
-        
-        # 2. Popularity
-        popularity = (tool.query_count or 0) * recency_multiplier
+        # 1-2. Popularity: views decayed to now (TRENDING_HALF_LIFE_HOURS half-life)
+        popularity = decayed_views(tool.trending_score)
         
         # 3. Quality boost
         total_reviews = tool.review_aggregate.total_reviews if tool.review_aggregate else 0
@@ -100,20 +76,10 @@ class ToolAnalyticsService:
     @classmethod
     def update_tool_query_stats(cls, db: Session, tool_id: int) -> bool:
         """
-        Update query stats for a tool and recalculate trending score
+        Count a view of a tool. The increment is buffered and written
+        with other pending views by the query stats flush.
         """
-        tool = db.query(Tool).filter(Tool.id == tool_id).first()
-        if not tool:
-            return False
-            
-        # Update stats
-        tool.query_count = (tool.query_count or 0) + 1
-        tool.last_queried_at = datetime.now(timezone.utc)
-        
-        # Recalculate trending score
-        tool.trending_score = cls.calculate_trending_score(tool)
-        
-        db.commit()
+        query_stats_buffer.record(tool_id)
         return True
 
     @classmethod
@@ -125,37 +91,49 @@ class ToolAnalyticsService:
         min_similarity: float = 50.0
     ) -> List[Dict[str, Any]]:
         """
-        Get recommended tools based on similarity
+        Get recommended tools based on similarity, read from the
+        neighbours the similarity job stored in tool_similarity
         """
-        source_tool = db.query(Tool).filter(Tool.id == tool_id).first()
-        if not source_tool:
+        neighbours = db.query(
+            ToolSimilarity.score,
+            Tool.id,
+            Tool.name,
+            Tool.category_id,
+            Tool.query_count
+        ).join(
+            Tool, Tool.id == ToolSimilarity.similar_tool_id
+        ).filter(
+            ToolSimilarity.tool_id == tool_id,
+            ToolSimilarity.score >= min_similarity,
+            Tool.is_active == True
+        ).order_by(ToolSimilarity.rank).all()
+        if not neighbours:
             return []
-            
-        # Get all candidate tools in the same category
-        candidates = db.query(Tool).filter(
-            Tool.category_id == source_tool.category_id,
-            Tool.id != tool_id,
+        
+        neighbour_ids = [n.id for n in neighbours]
+        prices = dict(
+            db.query(PricingTier.tool_id, func.avg(PricingTier.monthly_price))
+            .filter(PricingTier.tool_id.in_(neighbour_ids), PricingTier.is_current == True)
+            .group_by(PricingTier.tool_id)
+            .all()
+        )
+        max_query_count = db.query(func.max(Tool.query_count)).filter(
+            Tool.category_id == neighbours[0].category_id,
             Tool.is_active == True
-        ).all()
+        ).scalar() or 1
         
         recommendations = []
-        max_query_count = max((t.query_count or 0 for t in candidates), default=1)
-        
-        for candidate in candidates:
-            # Calculate similarity score
-            score = cls.calculate_similarity_score(db, tool_id, candidate.id)
+        for neighbour in neighbours:
+            # Add popularity boost (0-10 points)
+            popularity_boost = ((neighbour.query_count or 0) / max_query_count) * 10
+            final_score = min(100, neighbour.score + popularity_boost)
             
-            if score >= min_similarity:
-                # Add popularity boost (0-10 points)
-                popularity_boost = ((candidate.query_count or 0) / max_query_count) * 10
-                final_score = min(100, score + popularity_boost)
-                
-                recommendations.append({
-                    'tool_id': candidate.id,
-                    'name': candidate.name,
-                    'score': round(final_score, 2),
-                    'price_tier': candidate.avg_monthly_price
-                })
+            recommendations.append({
+                'tool_id': neighbour.id,
+                'name': neighbour.name,
+                'score': round(final_score, 2),
+                'price_tier': float(prices.get(neighbour.id) or 0)
+            })
         
         # Sort by score descending
         recommendations.sort(key=lambda x: x['score'], reverse=True)
@@ -248,29 +226,17 @@ class ToolAnalyticsService:
         Search for tools with full-text search and filters
         """
         from sqlalchemy.sql import text
-        from sqlalchemy.dialects.postgresql import TSVECTOR
         
-        # Base query with full-text search
+        ts_query = func.plainto_tsquery('english', query_string)
+        
+        # Base query ranked against the stored, GIN-indexed search vector
         query = db.query(
             Tool,
-            func.ts_rank(
-                func.to_tsvector('english', 
-                    func.coalesce(Tool.name, '') + ' ' +
-                    func.coalesce(Tool.description, '') + ' ' +
-                    func.coalesce(Tool.tagline, '')
-                ),
-                func.plainto_tsquery('english', query_string)
-            ).label('relevance')
+            func.ts_rank(Tool.search_vector, ts_query).label('relevance')
         )
         
         # Apply text search condition
-        query = query.filter(
-            func.to_tsvector('english', 
-                func.coalesce(Tool.name, '') + ' ' +
-                func.coalesce(Tool.description, '') + ' ' +
-                func.coalesce(Tool.tagline, '')
-            ).op('@@')(func.plainto_tsquery('english', query_string))
-        )
+        query = query.filter(Tool.search_vector.op('@@')(ts_query))
         
         # Apply filters
         if category_id:
@@ -1,7 +1,8 @@
 # app/services/tool_service.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, select, exists
 from fastapi import HTTPException, status
 
 from app.models.tool import Tool
@@ -10,8 +11,48 @@ from app.models.pricing import PricingTier
 from app.models.feature import Feature
 from app.models.review import ReviewAggregate
 from app.schemas.tool import ToolCreate, ToolUpdate
+from app.services.feature_index import FeatureIndex, feature_index
+from app.services.minhash_index import minhash_index
+from app.utils.pagination import paginate_keyset, id_condition
+
+# Sort key for tools without a current price, so they sort last
+NO_PRICE = 10 ** 9
+# Sort key for tools without a creation time, so they sort last when
+# newest first; a NULL key would never compare after a cursor
+NO_DATE = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 class ToolService:
+    @staticmethod
+    def sort_keys(query, sort: str):
+        """
+        Join whatever a sort order needs onto a Tool query and return the
+        query with its keyset sort keys, ending with Tool.id as tiebreaker.
+        """
+        if sort in ("price", "price_asc", "price_desc"):
+            prices = select(
+                PricingTier.tool_id,
+                func.min(PricingTier.monthly_price).label("min_price")
+            ).where(
+                PricingTier.is_current == True
+            ).group_by(PricingTier.tool_id).subquery()
+            query = query.outerjoin(prices, prices.c.tool_id == Tool.id)
+            if sort == "price_desc":
+                # Tools without pricing go last in both directions
+                return query, [(func.coalesce(prices.c.min_price, -1), True), (Tool.id, False)]
+            return query, [(func.coalesce(prices.c.min_price, NO_PRICE), False), (Tool.id, False)]
+        if sort == "rating":
+            ratings = select(
+                ReviewAggregate.tool_id,
+                func.avg(ReviewAggregate.avg_rating).label("avg_rating")
+            ).group_by(ReviewAggregate.tool_id).subquery()
+            query = query.outerjoin(ratings, ratings.c.tool_id == Tool.id)
+            return query, [(func.coalesce(ratings.c.avg_rating, 0), True), (Tool.id, False)]
+        if sort == "trending":
+            return query, [(func.coalesce(Tool.query_count, 0), True), (Tool.id, False)]
+        if sort == "recent":
+            return query, [(func.coalesce(Tool.created_at, NO_DATE), True), (Tool.id, False)]
+        return query, [(Tool.name, False), (Tool.id, False)]
+
     @staticmethod
     def get_tools(
         db: Session,
@@ -20,9 +61,9 @@ class ToolService:
         price_max: Optional[float] = None,
         features: Optional[List[str]] = None,
         sort: str = "name",
-        skip: int = 0,
-        limit: int = 100
-    ):
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Tool], Optional[str]]:
         query = db.query(Tool)
         
         # Apply filters
@@ -30,43 +71,40 @@ class ToolService:
             query = query.join(Category).filter(Category.name == category)
             
         if price_min is not None or price_max is not None:
-            query = query.join(PricingTier)
+            price_filter = [
+                PricingTier.tool_id == Tool.id,
+                PricingTier.is_current == True
+            ]
             if price_min is not None:
-                query = query.filter(PricingTier.monthly_price >= price_min)
+                price_filter.append(PricingTier.monthly_price >= price_min)
             if price_max is not None:
-                query = query.filter(PricingTier.monthly_price <= price_max)
-            query = query.filter(PricingTier.is_current == True)
+                price_filter.append(PricingTier.monthly_price <= price_max)
+            # EXISTS keeps one row per tool, which keyset pagination relies on
+            query = query.filter(exists().where(*price_filter))
             
         if features:
-            for feature in features:
-                query = query.join(Feature).filter(
-                    Feature.feature_name == feature,
-                    Feature.is_available == True
-                )
+            if feature_index.is_built:
+                query = query.filter(id_condition(db, Tool.id, feature_index.tools_with_all(features)))
+            else:
+                # Case- and whitespace-insensitive, like the feature index
+                for feature in features:
+                    if not feature or not feature.strip():
+                        continue
+                    query = query.filter(exists().where(
+                        Feature.tool_id == Tool.id,
+                        FeatureIndex.normalize_sql(Feature.feature_name) == FeatureIndex.normalize(feature),
+                        Feature.is_available == True
+                    ))
         
-        # Apply sorting
-        if sort == "name":
-            query = query.order_by(Tool.name)
-        elif sort == "price":
-            query = query.outerjoin(
-                PricingTier, 
-                and_(
-                    PricingTier.tool_id == Tool.id,
-                    PricingTier.is_current == True
-                )
-            ).order_by(PricingTier.monthly_price.asc())
-        elif sort == "rating":
-            query = query.outerjoin(
-                ReviewAggregate,
-                ReviewAggregate.tool_id == Tool.id
-            ).order_by(ReviewAggregate.avg_rating.desc())
-        elif sort == "trending":
-            query = query.order_by(
-                Tool.query_count.desc(),
-                Tool.last_queried_at.desc()
+        # Apply sorting and fetch the page after the cursor
+        query, keys = ToolService.sort_keys(query, sort)
+        try:
+            return paginate_keyset(query, keys, sort, cursor=cursor, size=limit)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
             )
-        
-        return query.offset(skip).limit(limit).all()
 
     @staticmethod
     def get_tool(db: Session, tool_id: int):
@@ -79,16 +117,53 @@ class ToolService:
         min_similarity: float = 50.0,
         limit: int = 10
     ):
-        # This is a simplified version - in a real app, you'd calculate similarity
-        # based on features, pricing, category, etc.
+        """
+        Find tools with the most similar feature and integration sets across
+        the whole catalog: MinHash/LSH candidates re-ranked by exact Jaccard
+        similarity (reported as 0-100).
+        """
         tool = ToolService.get_tool(db, tool_id)
         if not tool:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Tool not found"
             )
+        
+        if minhash_index.is_built:
+            matches = minhash_index.similar(
+                tool_id,
+                limit=limit,
+                min_similarity=min_similarity / 100
+            ) or []
+            tools = {
+                t.id: t
+                for t in db.query(Tool).filter(
+                    Tool.id.in_([m["tool_id"] for m in matches]),
+                    Tool.is_active == True
+                )
+            } if matches else {}
+            
+            alternatives = []
+            for match in matches:
+                t = tools.get(match["tool_id"])
+                if t is None:
+                    continue
+                basis = [
+                    name for name, shared in (
+                        ("features", match["shared_features"]),
+                        ("integrations", match["shared_integrations"])
+                    ) if shared
+                ]
+                alternatives.append({
+                    **t.to_dict(),
+                    "similarity_score": round(match["similarity"] * 100, 2),
+                    "feature_similarity": round(match["feature_similarity"] * 100, 2),
+                    "integration_similarity": round(match["integration_similarity"] * 100, 2),
+                    "match_basis": "+".join(basis)
+                })
+            return alternatives
             
-        # Get tools in the same category
+        # Index not available yet, fall back to tools in the same category
         similar_tools = db.query(Tool).filter(
             Tool.category_id == tool.category_id,
             Tool.id != tool_id,
@@ -0,0 +1,327 @@
+# app/services/trending_sketch.py
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+import glob
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.tool import Tool
+from app.models.review import ReviewAggregate
+from app.services.usage_service import decayed_views
+
+logger = logging.getLogger(__name__)
+
+# Prime above 2^32 for the universal hash family, as in the MinHash index
+_PRIME = np.uint64(4294967311)
+
+SNAPSHOT_FILE = "snapshot.json"
+WORKER_FILE_PATTERN = "worker-*.npz"
+
+
+class CountMinSketch:
+    """
+    depth x width table of weights; an item's estimate is the smallest of
+    its depth cells, never below its true weight. Tables with the same
+    shape and seed add up cell by cell, which is how workers are merged.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 11):
+        self.width = width
+        self.depth = depth
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 31, depth, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 31, depth, dtype=np.uint64)
+        self._rows = np.arange(depth)
+        self._coefficients = list(zip(self._a.tolist(), self._b.tolist()))
+        self._prime = int(_PRIME)
+        self.table = np.zeros((depth, width), dtype=np.float64)
+
+    def _cells(self, items: np.ndarray) -> np.ndarray:
+        hashed = (self._a[:, None] * items.astype(np.uint64)[None, :] + self._b[:, None]) % _PRIME
+        return (hashed % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, item: int, weight: float = 1.0) -> None:
+        # Plain ints: for a single item this beats the vectorized hash
+        for row, (a, b) in enumerate(self._coefficients):
+            self.table[row, (a * item + b) % self._prime % self.width] += weight
+
+    def estimate_many(self, items: List[int]) -> np.ndarray:
+        if not items:
+            return np.zeros(0)
+        cells = self._cells(np.array(items))
+        return self.table[self._rows[:, None], cells].min(axis=0)
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-k summary: at most capacity tracked items. A new item
+    arriving when full replaces the smallest one and inherits its count,
+    so any item whose weight exceeds total / capacity is always tracked.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.counts: Dict[int, float] = {}
+        # One (count, item) entry per tracked item; entries go stale when
+        # counts grow and are refreshed lazily during eviction
+        self._heap: List[tuple] = []
+
+    def add(self, item: int, weight: float = 1.0) -> None:
+        if item in self.counts:
+            self.counts[item] += weight
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = weight
+            heapq.heappush(self._heap, (weight, item))
+            return
+        while True:
+            count, victim = heapq.heappop(self._heap)
+            if self.counts[victim] == count:
+                break
+            heapq.heappush(self._heap, (self.counts[victim], victim))
+        del self.counts[victim]
+        self.counts[item] = count + weight
+        heapq.heappush(self._heap, (count + weight, item))
+
+    def scale(self, factor: float) -> None:
+        self.counts = {item: count * factor for item, count in self.counts.items()}
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+
+class TrendingSketch:
+    """
+    Per-worker heavy hitters of tool views in fixed memory: a Count-Min
+    sketch for weights and a Space-Saving summary for candidates. Views are
+    weighted exp(rate * (t - reference)) with the half-life of the decayed
+    trending score, so both structures hold decayed view counts; the
+    reference is moved forward (and the weights scaled down) once per
+    half-life.
+
+    seed() starts a worker from the decayed views already stored in
+    Tool.trending_score, so a snapshot right after a deploy ranks all views,
+    on the same basis as the trending_score fallback, not only the ones
+    seen since startup.
+
+    publish() writes this worker's sketch to a shared directory and merges
+    every worker's file into a snapshot of the top tools: candidates are
+    the union of the summaries, weighed with the summed Count-Min tables,
+    plus the oldest seed among the files. Later seeds already include
+    views the older workers counted, so only one is merged. top() serves
+    that snapshot from memory.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        width: int = 2048,
+        depth: int = 4,
+        capacity: int = 256,
+        snapshot_size: int = 100,
+        half_life_hours: float = 72.0,
+        publish_seconds: float = 10.0
+    ):
+        self.directory = directory
+        self.snapshot_size = snapshot_size
+        self.publish_seconds = publish_seconds
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.half_life_seconds = half_life_hours * 3600
+        self._lock = threading.Lock()
+        self._sketch = CountMinSketch(width, depth)
+        self._candidates = SpaceSaving(capacity)
+        self._reference = time.time()
+        # (table, candidates, reference) read from trending_score by seed()
+        self._seed: Optional[tuple] = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_mtime = 0.0
+        self._snapshot_checked = 0.0
+
+    def record(self, tool_id: int, seen_at: Optional[datetime] = None) -> None:
+        now = seen_at.timestamp() if seen_at else time.time()
+        with self._lock:
+            if now - self._reference > self.half_life_seconds:
+                factor = math.exp(-self.rate * (now - self._reference))
+                self._sketch.table *= factor
+                self._candidates.scale(factor)
+                self._reference = now
+            weight = math.exp(self.rate * (now - self._reference))
+            self._sketch.add(tool_id, weight)
+            self._candidates.add(tool_id, weight)
+
+    def seed(self, db: Session) -> int:
+        """
+        Load the decayed views of the top tools by trending_score, one
+        indexed query. Returns the number of tools seeded.
+        """
+        rows = db.query(Tool.id, Tool.trending_score).filter(
+            Tool.is_active == True,
+            Tool.trending_score.isnot(None)
+        ).order_by(
+            Tool.trending_score.desc(),
+            Tool.id
+        ).limit(self._candidates.capacity).all()
+
+        now = time.time()
+        moment = datetime.fromtimestamp(now, timezone.utc)
+        seeded = CountMinSketch(self._sketch.width, self._sketch.depth)
+        for tool_id, score in rows:
+            seeded.add(tool_id, decayed_views(score, moment))
+        with self._lock:
+            self._seed = (seeded.table, np.array([tool_id for tool_id, _ in rows], dtype=np.int64), now)
+        return len(rows)
+
+    @staticmethod
+    def _write_atomic(path: str, write) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def _write_worker_file(self) -> None:
+        with self._lock:
+            table = self._sketch.table.copy()
+            candidates = np.array(list(self._candidates.counts), dtype=np.int64)
+            reference = self._reference
+            seed = self._seed
+        arrays = {"table": table, "candidates": candidates, "reference": np.float64(reference)}
+        if seed is not None:
+            arrays.update(seed_table=seed[0], seed_candidates=seed[1], seed_reference=np.float64(seed[2]))
+        self._write_atomic(
+            os.path.join(self.directory, f"worker-{os.getpid()}.npz"),
+            lambda f: np.savez(f, **arrays)
+        )
+
+    def _merge_worker_files(self, now: float):
+        merged = CountMinSketch(self._sketch.width, self._sketch.depth)
+        candidates = set()
+        seed = None
+        for path in glob.glob(os.path.join(self.directory, WORKER_FILE_PATTERN)):
+            try:
+                # Workers gone for several half-lives contribute nothing
+                if now - os.path.getmtime(path) > 4 * self.half_life_seconds:
+                    os.remove(path)
+                    continue
+                with np.load(path) as data:
+                    if data["table"].shape != merged.table.shape:
+                        continue
+                    # Bring every worker's weights to the common reference: now
+                    merged.table += data["table"] * math.exp(self.rate * (float(data["reference"]) - now))
+                    candidates.update(int(item) for item in data["candidates"])
+                    if "seed_reference" in data.files:
+                        reference = float(data["seed_reference"])
+                        if seed is None or reference < seed[0]:
+                            seed = (reference, data["seed_table"], data["seed_candidates"])
+            except (OSError, ValueError, KeyError):
+                logger.warning(f"Skipping unreadable trending sketch {path}")
+        if seed is not None and seed[1].shape == merged.table.shape:
+            merged.table += seed[1] * math.exp(self.rate * (seed[0] - now))
+            candidates.update(int(item) for item in seed[2])
+        return merged, sorted(candidates)
+
+    def publish(self, db: Session) -> int:
+        """
+        Write this worker's sketch and rebuild the shared snapshot. Costs
+        two queries for the details and ratings of the top tools. Returns
+        the number of tools in the snapshot.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_worker_file()
+
+        now = time.time()
+        merged, candidates = self._merge_worker_files(now)
+        estimates = merged.estimate_many(candidates)
+        ranked = sorted(zip(candidates, estimates.tolist()), key=lambda item: (-item[1], item[0]))
+
+        # Over-fetch so inactive tools do not leave the snapshot short
+        top = ranked[:self.snapshot_size * 2]
+        tools = {
+            row.id: row for row in db.query(
+                Tool.id, Tool.name, Tool.slug, Tool.logo_url, Tool.query_count
+            ).filter(Tool.id.in_([tool_id for tool_id, _ in top]), Tool.is_active == True)
+        } if top else {}
+        ratings = dict(
+            db.query(ReviewAggregate.tool_id, func.avg(ReviewAggregate.avg_rating))
+            .filter(ReviewAggregate.tool_id.in_(list(tools)))
+            .group_by(ReviewAggregate.tool_id)
+            .all()
+        ) if tools else {}
+
+        items = []
+        for tool_id, views in top:
+            tool = tools.get(tool_id)
+            if tool is None:
+                continue
+            items.append({
+                "id": tool.id,
+                "name": tool.name,
+                "slug": tool.slug,
+                "logo_url": tool.logo_url,
+                "query_count": tool.query_count,
+                "views": views,
+                "avg_rating": float(ratings[tool.id]) if ratings.get(tool.id) is not None else None
+            })
+            if len(items) >= self.snapshot_size:
+                break
+
+        snapshot = {"generated_at": now, "items": items}
+        self._write_atomic(
+            os.path.join(self.directory, SNAPSHOT_FILE),
+            lambda f: f.write(json.dumps(snapshot).encode())
+        )
+        return len(items)
+
+    def _load_snapshot(self) -> Optional[Dict[str, Any]]:
+        # Stat the file at most once a second; in between serve from memory
+        checked = time.monotonic()
+        if checked - self._snapshot_checked < 1.0:
+            return self._snapshot
+        self._snapshot_checked = checked
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        try:
+            mtime = os.path.getmtime(path)
+            if mtime != self._snapshot_mtime:
+                with open(path, "rb") as f:
+                    self._snapshot = json.loads(f.read())
+                self._snapshot_mtime = mtime
+        except (OSError, ValueError):
+            self._snapshot = None
+        return self._snapshot
+
+    def top(self, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top tools by decayed views from the shared snapshot, or None when
+        there is no snapshot recent enough to serve or it holds fewer than
+        limit tools.
+        """
+        snapshot = self._load_snapshot()
+        if snapshot is None:
+            return None
+        age = time.time() - snapshot["generated_at"]
+        if age > 5 * self.publish_seconds or limit > len(snapshot["items"]):
+            return None
+        factor = math.exp(-self.rate * max(age, 0.0))
+        return [
+            dict(item, views=round(item["views"] * factor, 2))
+            for item in snapshot["items"][:limit]
+        ]
+
+
+trending_sketch = TrendingSketch(
+    directory=settings.TRENDING_SKETCH_DIR,
+    width=settings.TRENDING_SKETCH_WIDTH,
+    depth=settings.TRENDING_SKETCH_DEPTH,
+    capacity=settings.TRENDING_SKETCH_CAPACITY,
+    snapshot_size=settings.TRENDING_SNAPSHOT_SIZE,
+    half_life_hours=settings.TRENDING_HALF_LIFE_HOURS,
+    publish_seconds=settings.TRENDING_SKETCH_PUBLISH_SECONDS
+)
@@ -0,0 +1,180 @@
+# app/services/usage_service.py
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, date, timedelta, timezone
+import logging
+import math
+
+from sqlalchemy import select, delete, union_all, func, case, cast, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.models.tool_usage import ToolUsageHourly, ToolUsageDaily
+
+logger = logging.getLogger(__name__)
+
+# Decayed trending scores are stored as log(sum of exp(rate * (t - epoch)))
+# over a tool's views. Every stored score shares the epoch, so ordering by
+# the column orders by the current decayed count without touching rows.
+# Changing TRENDING_HALF_LIFE_HOURS makes existing scores incomparable.
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# exp() of anything below this underflows in Postgres instead of returning 0
+_MAX_LOG_GAP = 700.0
+
+TRENDING_PERIODS = {"24h": 1, "7d": 7, "30d": 30}
+
+INSERT_BATCH_SIZE = 1000
+
+
+def _decay_rate() -> float:
+    """Decay per second for the configured half-life"""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def view_weight(seen_at: datetime) -> float:
+    """Log-space weight of a single view at seen_at"""
+    return _decay_rate() * (seen_at - TRENDING_EPOCH).total_seconds()
+
+
+def log_add(a: Optional[float], b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow; a may be None for an empty score"""
+    if a is None:
+        return b
+    high, gap = max(a, b), min(abs(a - b), _MAX_LOG_GAP)
+    return high + math.log1p(math.exp(-gap))
+
+
+def decayed_views(score: Optional[float], now: Optional[datetime] = None) -> float:
+    """Current decayed view count for a stored trending score"""
+    if score is None:
+        return 0.0
+    now = now or datetime.now(timezone.utc)
+    return math.exp(min(score - view_weight(now), _MAX_LOG_GAP))
+
+
+def log_add_sql(current, increment):
+    """SQL form of log_add for a nullable column and an increment"""
+    high = func.greatest(current, increment)
+    gap = func.least(func.abs(current - increment), _MAX_LOG_GAP)
+    return case(
+        (current.is_(None), increment),
+        else_=high + func.ln(1 + func.exp(-gap))
+    )
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+class UsageService:
+    @staticmethod
+    def add_hourly_views(db: Session, buckets: Dict[Tuple[int, datetime], int]) -> None:
+        """
+        Add view counts to their hourly buckets. Runs in the caller's
+        transaction.
+        """
+        rows = [
+            {"tool_id": tool_id, "bucket_start": bucket_start, "views": views}
+            for (tool_id, bucket_start), views in buckets.items()
+        ]
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            stmt = pg_insert(ToolUsageHourly).values(rows[start:start + INSERT_BATCH_SIZE])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ToolUsageHourly.tool_id, ToolUsageHourly.bucket_start],
+                set_={"views": ToolUsageHourly.views + stmt.excluded.views}
+            ))
+
+    @staticmethod
+    def _hourly_boundary(now: datetime) -> date:
+        """First day whose hourly buckets are all still retained"""
+        return (now - timedelta(hours=settings.TOOL_USAGE_HOURLY_RETENTION_HOURS)).date()
+
+    @staticmethod
+    def rollup(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Roll hourly buckets of finished days into daily buckets, then drop
+        hourly buckets past their retention and daily buckets past theirs.
+        Safe to repeat: a day's daily bucket is recomputed from its hourly
+        buckets for as long as they are kept.
+        """
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        today = _day_start(now.date())
+        hourly_cutoff = _day_start(UsageService._hourly_boundary(now))
+        daily_cutoff = now.date() - timedelta(days=settings.TOOL_USAGE_DAILY_RETENTION_DAYS)
+
+        day = cast(func.timezone("UTC", ToolUsageHourly.bucket_start), Date)
+        finished_days = select(
+            ToolUsageHourly.tool_id,
+            day,
+            func.sum(ToolUsageHourly.views)
+        ).where(
+            ToolUsageHourly.bucket_start < today
+        ).group_by(ToolUsageHourly.tool_id, day)
+
+        try:
+            stmt = pg_insert(ToolUsageDaily).from_select(["tool_id", "day", "views"], finished_days)
+            rolled = db.execute(stmt.on_conflict_do_update(
+                index_elements=[ToolUsageDaily.tool_id, ToolUsageDaily.day],
+                set_={"views": stmt.excluded.views}
+            )).rowcount
+            expired_hourly = db.execute(
+                delete(ToolUsageHourly).where(ToolUsageHourly.bucket_start < hourly_cutoff)
+            ).rowcount
+            expired_daily = db.execute(
+                delete(ToolUsageDaily).where(ToolUsageDaily.day < daily_cutoff)
+            ).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(
+            f"Rolled up {rolled} daily usage buckets, expired {expired_hourly} hourly "
+            f"and {expired_daily} daily buckets"
+        )
+        return {
+            "daily_buckets_written": rolled,
+            "hourly_buckets_expired": expired_hourly,
+            "daily_buckets_expired": expired_daily
+        }
+
+    @staticmethod
+    def window_views(db: Session, period: str = "7d", now: Optional[datetime] = None):
+        """
+        Views per tool over a trending period, as a selectable of
+        (tool_id, views). 24h sums the last 24 hourly buckets; longer
+        periods sum daily buckets up to the retained hourly ones and the
+        hourly buckets from there on, so a tool contributes at most
+        (days + hourly retention) buckets.
+        """
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        days = TRENDING_PERIODS[period]
+
+        if days == 1:
+            start = hour_bucket(now) - timedelta(hours=23)
+            parts = [
+                select(ToolUsageHourly.tool_id, ToolUsageHourly.views)
+                .where(ToolUsageHourly.bucket_start >= start)
+            ]
+        else:
+            first_day = now.date() - timedelta(days=days - 1)
+            boundary = max(UsageService._hourly_boundary(now), first_day)
+            parts = [
+                select(ToolUsageDaily.tool_id, ToolUsageDaily.views).where(
+                    ToolUsageDaily.day >= first_day,
+                    ToolUsageDaily.day < boundary
+                ),
+                select(ToolUsageHourly.tool_id, ToolUsageHourly.views)
+                .where(ToolUsageHourly.bucket_start >= _day_start(boundary))
+            ]
+
+        buckets = union_all(*parts).subquery("buckets") if len(parts) > 1 else parts[0].subquery("buckets")
+        return select(
+            buckets.c.tool_id,
+            func.sum(buckets.c.views).label("views")
+        ).group_by(buckets.c.tool_id).subquery("window_views")
@@ -4,36 +4,191 @@ import asyncio
 from sqlalchemy.orm import Session
 from app.database.session import SessionLocal
 from app.models.api_key import APIKey
+from app.core.config import settings
+from app.services.search_analytics import search_analytics
+from app.services.query_stats_buffer import query_stats_buffer
+from app.services.usage_service import UsageService
+from app.services.trending_sketch import trending_sketch
+from app.services.rate_limiter import api_key_usage
+from app.services.catalog_sync import catalog_refresher
+from app.services.semantic_index import semantic_index
+from app.services.similarity_job import similarity_job
+from app.services.recommendation_index import recommendation_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+def reset_daily_counters_now():
+    db = SessionLocal()
+    try:
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Keys used since midnight were already restarted by the usage flush;
+        # only counters are touched, so cached key resolutions stay valid
+        db.query(APIKey).execution_options(preserves_api_key_cache=True).filter(
+            APIKey.last_request_at < today,
+            APIKey.requests_today != 0
+        ).update({"requests_today": 0}, synchronize_session=False)
+        db.commit()
+    except Exception:
+        logger.exception("Error resetting daily counters")
+        db.rollback()
+    finally:
+        db.close()
 
 async def reset_daily_counters():
     while True:
-        try:
-            db = SessionLocal()
-            # Reset daily counters at midnight UTC
-            now = datetime.utcnow()
-            next_reset = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-            sleep_seconds = (next_reset - now).total_seconds()
-            
-            await asyncio.sleep(sleep_seconds)
-            
-            # Reset all daily counters
-            db.query(APIKey).update({"requests_today": 0})
-            db.commit()
-            
-        except Exception as e:
-            print(f"Error resetting daily counters: {e}")
-            if db:
-                db.rollback()
-        finally:
-            if db:
-                db.close()
-        
-        # Sleep until next day
-        await asyncio.sleep(86400)  # 24 hours
+        # Reset daily counters after midnight UTC, once every worker has
+        # flushed the previous day's usage
+        now = datetime.utcnow()
+        next_reset = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        await asyncio.sleep((next_reset - now).total_seconds() + 2 * settings.RATE_LIMIT_SYNC_SECONDS)
+        await asyncio.to_thread(reset_daily_counters_now)
+
+def flush_search_analytics_now():
+    db = SessionLocal()
+    try:
+        search_analytics.flush(db)
+    except Exception:
+        logger.exception("Error flushing search analytics")
+    finally:
+        db.close()
+
+async def flush_search_analytics():
+    while True:
+        await asyncio.sleep(settings.SEARCH_ANALYTICS_FLUSH_SECONDS)
+        # The insert is blocking, keep it off the event loop
+        await asyncio.to_thread(flush_search_analytics_now)
+
+def flush_query_stats_now():
+    db = SessionLocal()
+    try:
+        query_stats_buffer.flush(db)
+    except Exception:
+        logger.exception("Error flushing tool query stats")
+    finally:
+        db.close()
+
+def flush_query_stats_when_due():
+    query_stats_buffer.wait_until_due()
+    flush_query_stats_now()
+
+async def flush_query_stats():
+    while True:
+        # Wakes up early once enough views are pending
+        await asyncio.to_thread(flush_query_stats_when_due)
+
+def rollup_tool_usage_now():
+    db = SessionLocal()
+    try:
+        UsageService.rollup(db)
+    except Exception:
+        logger.exception("Error rolling up tool usage")
+    finally:
+        db.close()
+
+async def rollup_tool_usage():
+    while True:
+        await asyncio.sleep(settings.TOOL_USAGE_ROLLUP_SECONDS)
+        await asyncio.to_thread(rollup_tool_usage_now)
+
+def publish_trending_sketch_now():
+    db = SessionLocal()
+    try:
+        trending_sketch.publish(db)
+    except Exception:
+        logger.exception("Error publishing trending sketch")
+    finally:
+        db.close()
+
+async def publish_trending_sketch():
+    while True:
+        await asyncio.sleep(settings.TRENDING_SKETCH_PUBLISH_SECONDS)
+        await asyncio.to_thread(publish_trending_sketch_now)
+
+def flush_api_key_usage_now():
+    db = SessionLocal()
+    try:
+        api_key_usage.flush(db)
+    except Exception:
+        logger.exception("Error reconciling API key usage")
+    finally:
+        db.close()
+
+async def flush_api_key_usage():
+    while True:
+        await asyncio.sleep(settings.RATE_LIMIT_SYNC_SECONDS)
+        await asyncio.to_thread(flush_api_key_usage_now)
+
+def refresh_catalog_indexes_now():
+    db = SessionLocal()
+    try:
+        catalog_refresher.refresh(db)
+    except Exception:
+        logger.exception("Error refreshing catalog indexes")
+        db.rollback()
+    finally:
+        db.close()
+
+def refresh_catalog_indexes_when_due():
+    catalog_refresher.wait_until_due()
+    refresh_catalog_indexes_now()
+
+async def refresh_catalog_indexes():
+    while True:
+        # Wakes up early when this worker commits a catalog write
+        await asyncio.to_thread(refresh_catalog_indexes_when_due)
+
+def refit_semantic_index_when_due():
+    semantic_index.wait_until_refit_due()
+    try:
+        semantic_index.refit()
+    except Exception:
+        logger.exception("Error refitting semantic index")
+
+async def refit_semantic_index():
+    while True:
+        # Woken by the catalog refresh once enough tools have changed
+        await asyncio.to_thread(refit_semantic_index_when_due)
+
+def refresh_stack_recommendations_when_due():
+    recommendation_index.wait_until_stale()
+    try:
+        recommendation_index.refresh_catalog()
+    except Exception:
+        logger.exception("Error refreshing stack recommendations")
+
+async def refresh_stack_recommendations():
+    while True:
+        # Woken by the catalog refresh when the indexed tools change
+        await asyncio.to_thread(refresh_stack_recommendations_when_due)
+
+def rebuild_tool_similarity_when_due():
+    similarity_job.wait_until_due()
+    try:
+        similarity_job.run_due()
+    except Exception:
+        logger.exception("Error rebuilding tool similarity")
+
+async def rebuild_tool_similarity():
+    while True:
+        # Woken by the catalog refresh when a write touches the catalog
+        await asyncio.to_thread(rebuild_tool_similarity_when_due)
 
 # Start the background task when the application starts
 def start_background_tasks(app):
     app.state.background_tasks = set()
-    task = asyncio.create_task(reset_daily_counters())
-    app.state.background_tasks.add(task)
-    task.add_done_callback(app.state.background_tasks.discard)
\ No newline at end of file
+    for coro in (
+        reset_daily_counters(),
+        flush_search_analytics(),
+        flush_query_stats(),
+        rollup_tool_usage(),
+        publish_trending_sketch(),
+        flush_api_key_usage(),
+        refresh_catalog_indexes(),
+        refit_semantic_index(),
+        refresh_stack_recommendations(),
+        rebuild_tool_similarity()
+    ):
+        task = asyncio.create_task(coro)
+        app.state.background_tasks.add(task)
+        task.add_done_callback(app.state.background_tasks.discard)
\ No newline at end of file
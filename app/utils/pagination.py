@@ -0,0 +1,118 @@
+# app/utils/pagination.py
+from typing import List, Any, Optional, Sequence, Tuple
+from datetime import datetime
+from decimal import Decimal
+import base64
+import binascii
+import json
+
+from sqlalchemy import and_, or_, tuple_, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# (sort expression, descending)
+SortKey = Tuple[Any, bool]
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _from_json(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """
+    Encode the sort keys of the last row of a page as an opaque cursor.
+    """
+    payload = json.dumps({"s": sort, "k": [_to_json(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor for the same sort order.
+    Raises ValueError for malformed cursors or a sort mismatch.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        cursor_sort = payload["s"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(values, list):
+        raise ValueError("Cursor does not match the requested sort order")
+    return [_from_json(v) for v in values]
+
+
+def id_condition(db, column, ids: Sequence[int]):
+    """
+    "column is one of ids". On Postgres the ids are bound as a single
+    array parameter (= ANY), so the statement does not grow with the
+    number of ids; other databases get a plain IN.
+    """
+    ids = list(ids)
+    if db.get_bind().dialect.name == "postgresql":
+        return column == any_(bindparam(None, ids, type_=ARRAY(Integer)))
+    return column.in_(ids)
+
+
+def keyset_condition(keys: Sequence[SortKey], values: Sequence[Any]):
+    """
+    Build "(k1, k2, ...) comes after (v1, v2, ...)" for the given sort
+    directions. Uniform directions use a row-value comparison, which
+    Postgres can answer from a composite index.
+    """
+    if len(values) != len(keys):
+        raise ValueError("Cursor does not match the requested sort order")
+
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        left = tuple_(*[expr for expr, _ in keys])
+        right = tuple_(*values)
+        return left < right if directions.pop() else left > right
+
+    clauses = []
+    for i, (expr, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        after = expr < values[i] if descending else expr > values[i]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+
+def paginate_keyset(
+    query,
+    keys: Sequence[SortKey],
+    sort: str,
+    cursor: Optional[str] = None,
+    size: int = 20
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of `query` ordered by `keys` starting after `cursor`
+    with WHERE (keys) > cursor LIMIT size, so every page costs the same.
+    The last key should be unique (normally the primary key).
+    Returns the page items and the cursor for the next page, if any.
+    """
+    query = query.add_columns(*[expr.label(f"keyset_{i}") for i, (expr, _) in enumerate(keys)])
+    if cursor:
+        query = query.filter(keyset_condition(keys, decode_cursor(cursor, sort)))
+    query = query.order_by(None).order_by(*[
+        expr.desc() if descending else expr.asc()
+        for expr, descending in keys
+    ])
+
+    rows = query.limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(sort, list(rows[-1])[1:])
+    return [row[0] for row in rows], next_cursor
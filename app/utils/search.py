@@ -0,0 +1,269 @@
+# app/utils/search.py
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple, Any
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.+#][a-z0-9]+)*[+#]*")
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "into", "is", "it", "its", "of", "on", "or", "that", "the", "to", "with",
+    "your", "you", "we", "our", "this", "all"
+})
+
+# Suffix rewrites applied once, longest first (a trimmed-down Porter step 2/3)
+_SUFFIXES = (
+    ("ational", "ate"), ("tional", "tion"), ("ization", "ize"),
+    ("fulness", "ful"), ("ousness", "ous"), ("iveness", "ive"),
+    ("biliti", "ble"), ("alism", "al"), ("ation", "ate"), ("ement", ""),
+    ("ness", ""), ("ment", ""), ("able", ""), ("ible", ""), ("ator", "ate"),
+    ("izer", "ize"), ("ful", ""), ("ity", ""), ("ive", ""), ("ize", ""),
+)
+
+_VOWELS = set("aeiouy")
+
+
+def _has_vowel(s: str) -> bool:
+    return any(ch in _VOWELS for ch in s)
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """
+    Reduce a lowercase token to a crude stem so that e.g. "deploying",
+    "deployment" and "deploys" index to the same term.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+
+    # Plurals
+    if token.endswith("sses"):
+        token = token[:-2]
+    elif token.endswith("ies"):
+        token = token[:-3] + "i"
+    elif token.endswith("s") and not token.endswith("ss") and not token.endswith("us"):
+        token = token[:-1]
+
+    # Past tense / gerunds
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and _has_vowel(token[:-len(suffix)]):
+            token = token[:-len(suffix)]
+            if len(token) > 2 and token[-1] == token[-2] and token[-1] not in "lsz":
+                token = token[:-1]
+            break
+
+    # Derivational suffixes, only while a reasonable stem remains
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)] + replacement
+            break
+
+    if token.endswith("y") and len(token) > 3 and token[-2] not in _VOWELS:
+        token = token[:-1] + "i"
+    if token.endswith("e") and len(token) > 4:
+        token = token[:-1]
+
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms, keeping tech names such as "c++",
+    "node.js" and "c#" intact, and drop stop words.
+    """
+    if not text:
+        return []
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def analyze(text: str) -> List[str]:
+    """
+    Tokenize and stem text. Used for both indexing and querying so the two
+    always agree.
+    """
+    return [stem(token) for token in tokenize(text)]
+
+
+class SearchPlan:
+    """
+    A parsed search request: free text to rank by, exact phrases and the
+    structured predicates. Every predicate must hold for a tool to match.
+    """
+
+    def __init__(
+        self,
+        text: str = "",
+        phrases: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        features: Optional[List[str]] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        min_exclusive: bool = False,
+        max_exclusive: bool = False
+    ):
+        self.text = " ".join(text.split())
+        self.phrases = list(phrases or [])
+        self.categories = list(categories or [])
+        self.features = list(features or [])
+        self.price_min = price_min
+        self.price_max = price_max
+        self.min_exclusive = min_exclusive
+        self.max_exclusive = max_exclusive
+
+    def copy(self, **changes: Any) -> "SearchPlan":
+        values = dict(
+            text=self.text,
+            phrases=self.phrases,
+            categories=self.categories,
+            features=self.features,
+            price_min=self.price_min,
+            price_max=self.price_max,
+            min_exclusive=self.min_exclusive,
+            max_exclusive=self.max_exclusive
+        )
+        values.update(changes)
+        return SearchPlan(**values)
+
+    @property
+    def ranking_text(self) -> str:
+        # Phrase words count towards relevance like any other term
+        return " ".join([self.text] + self.phrases).strip()
+
+    @property
+    def has_price_filter(self) -> bool:
+        return self.price_min is not None or self.price_max is not None
+
+    def restrict_price(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        exclusive: bool = False
+    ) -> None:
+        """
+        Intersect the price range with [low, high] (or (low, high)).
+        """
+        if low is not None:
+            low = float(low)
+            if self.price_min is None or low > self.price_min or (low == self.price_min and exclusive):
+                self.price_min, self.min_exclusive = low, exclusive
+        if high is not None:
+            high = float(high)
+            if self.price_max is None or high < self.price_max or (high == self.price_max and exclusive):
+                self.price_max, self.max_exclusive = high, exclusive
+
+    def to_query(self) -> str:
+        """
+        Render the plan back into query syntax.
+        """
+        def quote(value: str) -> str:
+            return f'"{value}"' if " " in value else value
+
+        def number(value: float) -> str:
+            return f"{value:g}"
+
+        parts = [self.text] if self.text else []
+        parts.extend(f'"{phrase}"' for phrase in self.phrases)
+        parts.extend(f"category:{quote(c)}" for c in self.categories)
+        parts.extend(f"feature:{quote(f)}" for f in self.features)
+        if self.price_min is not None and self.price_min == self.price_max and not (self.min_exclusive or self.max_exclusive):
+            parts.append(f"price:{number(self.price_min)}")
+        else:
+            if self.price_min is not None:
+                parts.append(f"price{'>' if self.min_exclusive else '>='}{number(self.price_min)}")
+            if self.price_max is not None:
+                parts.append(f"price{'<' if self.max_exclusive else '<='}{number(self.price_max)}")
+        return " ".join(parts)
+
+
+_QUERY_RE = re.compile(
+    r'(?P<field>category|cat|feature|price)\s*(?P<op><=|>=|<|>|:|=)\s*(?P<value>"[^"]*"?|[^\s"]+)'
+    r'|"(?P<phrase>[^"]*)"?'
+    r'|(?P<word>[^\s"]+)',
+    re.IGNORECASE
+)
+
+
+def _parse_price(value: str) -> float:
+    value = value.strip().lstrip("$")
+    if value.lower() == "free":
+        return 0.0
+    try:
+        price = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid price in query: {value!r}")
+    if price < 0:
+        raise ValueError(f"Invalid price in query: {value!r}")
+    return price
+
+
+def parse_search_query(query: str) -> SearchPlan:
+    """
+    Parse a search query into a SearchPlan. Besides free text it accepts
+
+        category:ci-cd   feature:docker   feature:"single sign-on"
+        price<20  price<=20  price>5  price>=5  price:10-50  price:free
+        "exact phrase"
+
+    Raises ValueError for a malformed price.
+    """
+    plan = SearchPlan()
+    words = []
+    for match in _QUERY_RE.finditer(query or ""):
+        if match.group("word") is not None:
+            words.append(match.group("word"))
+            continue
+        if match.group("phrase") is not None:
+            phrase = " ".join(match.group("phrase").split())
+            if phrase:
+                plan.phrases.append(phrase)
+            continue
+
+        field = match.group("field").lower()
+        op = match.group("op")
+        value = " ".join(match.group("value").strip('"').split())
+        if not value:
+            continue
+        if field in ("category", "cat"):
+            plan.categories.append(value)
+        elif field == "feature":
+            plan.features.append(value)
+        elif op in ("<", "<="):
+            plan.restrict_price(high=_parse_price(value), exclusive=op == "<")
+        elif op in (">", ">="):
+            plan.restrict_price(low=_parse_price(value), exclusive=op == ">")
+        elif "-" in value.strip("-"):
+            low, high = value.split("-", 1)
+            plan.restrict_price(low=_parse_price(low), high=_parse_price(high))
+        else:
+            price = _parse_price(value)
+            plan.restrict_price(low=price, high=price)
+
+    plan.text = " ".join(words)
+    return plan
+
+
+def normalize_search_key(
+    plan: SearchPlan,
+    sort_by: str = "relevance",
+    semantic: float = 0.0
+) -> Tuple:
+    """
+    Canonical form of a search request, so that "CI ", "ci" and the same
+    filters written in another order share one cache entry.
+    """
+    def normalized(values: List[str]) -> Tuple[str, ...]:
+        return tuple(sorted({" ".join(v.lower().split()) for v in values if v and v.strip()}))
+
+    return (
+        plan.text.lower(),
+        normalized(plan.phrases),
+        normalized(plan.categories),
+        normalized(plan.features),
+        (plan.price_min, plan.min_exclusive) if plan.price_min is not None else None,
+        (plan.price_max, plan.max_exclusive) if plan.price_max is not None else None,
+        sort_by,
+        float(semantic)
+    )
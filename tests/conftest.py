@@ -0,0 +1,59 @@
+# tests/conftest.py
+import os
+import re
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from app.models import Tool, Category, PricingTier, Feature, ReviewAggregate
+from app.database.models.integration import Integration
+from app.database.models.tool_similarity import ToolSimilarity
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector_sqlite(type_, compiler, **kw):
+    return "TEXT"
+
+
+def _register_text_search_functions(dbapi_connection, connection_record):
+    # Enough for the generated tools.search_vector column to compute
+    dbapi_connection.create_function("to_tsvector", 2, lambda config, text: text, deterministic=True)
+    dbapi_connection.create_function("setweight", 2, lambda vector, weight: vector, deterministic=True)
+    # Postgres regexp_replace with the global flag
+    dbapi_connection.create_function(
+        "regexp_replace", 4, lambda text, pattern, replacement, flags: re.sub(pattern, replacement, text),
+        deterministic=True
+    )
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the catalog tables"""
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", _register_text_search_functions)
+    Base.metadata.create_all(engine, tables=[
+        Category.__table__,
+        Tool.__table__,
+        PricingTier.__table__,
+        Feature.__table__,
+        ReviewAggregate.__table__,
+        Integration.__table__,
+        ToolSimilarity.__table__
+    ])
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
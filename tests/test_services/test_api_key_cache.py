@@ -0,0 +1,185 @@
+# tests/test_services/test_api_key_cache.py
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.base_class import Base
+from app.models.api_key import APIKey
+from app.models.user import User
+from app.services import api_key_cache as api_key_cache_module
+from app.services.api_key_cache import APIKeyCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(api_key_cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    # One connection for every thread: misses may load in the threadpool
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[User.__table__, APIKey.__table__])
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add_all([
+        User(id=1, email="one@example.com", password_hash="x"),
+        User(id=2, email="two@example.com", password_hash="x")
+    ])
+    session.add_all([
+        APIKey(id=1, user_id=1, api_key="key-1", rate_limit=100),
+        APIKey(id=2, user_id=2, api_key="key-2", rate_limit=100),
+        APIKey(id=3, user_id=1, api_key="key-3", expires_at=datetime.utcnow() + timedelta(seconds=30))
+    ])
+    session.commit()
+    session.close()
+    monkeypatch.setattr(api_key_cache_module, "SessionLocal", factory)
+    try:
+        yield factory
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def cache(sessions, clock, monkeypatch):
+    cache = APIKeyCache(max_entries=10, max_negative_entries=2, ttl_seconds=300, negative_ttl_seconds=20)
+    # The commit hooks invalidate the module's cache
+    monkeypatch.setattr(api_key_cache_module, "api_key_cache", cache)
+    return cache
+
+
+def test_entries_expire_after_the_ttl_but_never_outlive_the_key(cache, clock):
+    assert cache.resolve("key-1").rate_limit == 100
+    assert cache.resolve("key-3").api_key_id == 3
+    assert cache.stats()["misses"] == 2
+
+    clock[0] += 29
+    cache.resolve("key-1")
+    cache.resolve("key-3")
+    assert cache.stats()["hits"] == 2
+
+    # key-3 expires in 30 seconds, well before the ttl
+    clock[0] += 2
+    cache.resolve("key-1")
+    cache.resolve("key-3")
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 3)
+
+    clock[0] += 300
+    cache.resolve("key-1")
+    assert cache.stats()["misses"] == 4
+
+
+def test_unknown_keys_have_their_own_shorter_lru(cache, clock):
+    cache.resolve("key-1")
+    for api_key in ["bad-1", "bad-2", "bad-3"]:
+        assert cache.resolve(api_key) is None
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["negative_entries"]) == (1, 2)
+    # The oldest bad key was evicted, not the good one
+    cache.resolve("bad-3")
+    cache.resolve("key-1")
+    assert cache.stats()["hits"] == 2
+    cache.resolve("bad-1")
+    assert cache.stats()["misses"] == 5
+
+    clock[0] += 21
+    cache.resolve("bad-3")
+    cache.resolve("key-1")
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 6)
+
+
+def test_writes_invalidate_once_committed(cache, sessions):
+    cache.resolve("key-1")
+    cache.resolve("key-2")
+    db = sessions()
+    key = db.get(APIKey, 1)
+    key.rate_limit = 500
+    db.flush()
+
+    # Not yet committed: other requests still see the committed row
+    assert cache.resolve("key-1").rate_limit == 100
+    db.commit()
+    assert cache.resolve("key-1").rate_limit == 500
+    assert cache.stats()["entries"] == 2
+
+    # A user write drops that user's keys only
+    db.get(User, 2).name = "Two"
+    db.commit()
+    assert cache.stats()["entries"] == 1
+
+    # Rolled back writes invalidate nothing
+    db.get(APIKey, 1).rate_limit = 1
+    db.flush()
+    db.rollback()
+    assert cache.stats()["entries"] == 1
+    db.close()
+
+
+def test_bulk_writes_clear_the_cache_unless_they_preserve_it(cache, sessions):
+    cache.resolve("key-1")
+    cache.resolve("key-2")
+    db = sessions()
+
+    db.execute(
+        update(APIKey).values(requests_today=0),
+        execution_options={"preserves_api_key_cache": True, "synchronize_session": False}
+    )
+    db.commit()
+    assert cache.stats()["entries"] == 2
+
+    db.execute(update(APIKey).where(APIKey.id == 2).values(is_active=False),
+               execution_options={"synchronize_session": False})
+    assert cache.stats()["entries"] == 2
+    db.commit()
+    assert cache.stats()["entries"] == 0
+    assert cache.resolve("key-2") is None
+    db.close()
+
+
+def test_a_load_that_raced_an_invalidation_is_not_stored(cache, monkeypatch):
+    load = APIKeyCache._load
+
+    def racing_load(db, api_key):
+        resolved = load(db, api_key)
+        # A write commits while the stale row is on its way to the cache
+        cache.invalidate(["key-1"])
+        return resolved
+
+    monkeypatch.setattr(cache, "_load", racing_load)
+    assert cache.resolve("key-1").rate_limit == 100
+    assert cache.stats()["entries"] == 0
+
+    monkeypatch.setattr(cache, "_load", load)
+    cache.resolve("key-1")
+    assert cache.stats()["entries"] == 1
+
+
+def test_async_resolve_loads_misses_off_the_event_loop(cache, monkeypatch):
+    loads = []
+    load = APIKeyCache._load
+
+    def recording_load(db, api_key):
+        loads.append(threading.get_ident())
+        return load(db, api_key)
+
+    monkeypatch.setattr(cache, "_load", recording_load)
+
+    async def resolve_twice():
+        first = await cache.resolve_async("key-1")
+        second = await cache.resolve_async("key-1")
+        return first, second
+
+    first, second = asyncio.run(resolve_twice())
+
+    assert first is second
+    # Loaded once, in a threadpool thread rather than the loop's
+    assert len(loads) == 1
+    assert loads[0] != threading.get_ident()
@@ -0,0 +1,82 @@
+# tests/test_services/test_fuzzy_index.py
+import pytest
+
+from app.services.fuzzy_index import FuzzyIndex, edit_distance
+
+
+def built(*documents):
+    index = FuzzyIndex()
+    index.rebuild(documents)
+    return index
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("docker", "docker", 0),
+    ("docker", "dokcer", 1),     # adjacent transposition
+    ("docker", "doker", 1),
+    ("docker", "dcoekr", 2),
+    ("docker", "dockerfile", 4),  # past the limit
+    ("kubernetes", "kubernets", 1),
+    ("kubernetes", "kuberntes", 1),
+    ("jenkins", "jenkinsss", 2)
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 3) == distance
+    # Gives up past the limit
+    assert edit_distance(a, b, 0) == min(distance, 1)
+
+
+def test_corrects_typos_within_the_distance_for_the_word_length():
+    index = built(
+        {"id": 1, "name": "Kubernetes", "tagline": "Container orchestration"},
+        {"id": 2, "name": "Grafana", "tagline": "Dashboards", "features": ["Alerting"]}
+    )
+
+    assert index.correct("kubernets") == "kubernetes"
+    assert index.correct("Kuberentes") == "kubernetes"
+    assert index.correct("orchestraton") == "orchestration"
+    assert index.correct("alertnig") == "alerting"
+    assert index.correct("grafana") == "grafana"
+    # Short words get one edit
+    assert index.correct("dashbaords") == "dashboards"
+    assert built({"id": 1, "name": "Vault"}).correct("vlt") is None
+    assert built({"id": 1, "name": "Vault"}).correct("vaul") == "vault"
+    assert built({"id": 1, "name": "Vault"}).correct("valtu") is None
+    # Too short, or not a word
+    assert index.correct("kub") is None
+    assert index.correct("k8s") is None
+
+
+def test_prefers_the_closest_then_the_most_common_word():
+    index = built(
+        {"id": 1, "name": "Helm", "tagline": "Chart"},
+        {"id": 2, "name": "Charts"},
+        {"id": 3, "name": "Chart"},
+        {"id": 4, "name": "Charm"}
+    )
+
+    # chart and charm are both one edit from charx; chart is in two tools
+    assert index.correct("charx") == "chart"
+    assert index.correct("chartss") == "charts"
+
+
+def test_removed_words_are_no_longer_suggested():
+    index = built({"id": 1, "name": "Terraform"}, {"id": 2, "name": "Terraform Cloud"})
+
+    index.remove([1])
+    assert index.correct("terrafrom") == "terraform"
+    index.upsert([{"id": 2, "name": "Pulumi Cloud"}])
+    assert index.correct("terrafrom") is None
+    assert index.correct("pulumy") == "pulumi"
+    # Nothing is left behind of the removed words' deletes
+    assert all(words <= {"pulumi", "cloud"} for words in index._deletes.values())
+
+
+def test_correct_query_leaves_known_words_alone():
+    index = built({"id": 1, "name": "Prometheus", "tagline": "Monitoring system"})
+
+    assert index.correct_query("promethues monitorng") == "prometheus monitoring"
+    assert index.correct_query("promethues monitorng", is_known=lambda word: word == "monitorng") == (
+        "prometheus monitorng"
+    )
+    assert index.correct_query("prometheus monitoring") is None
@@ -0,0 +1,88 @@
+# tests/test_services/test_integration_graph.py
+import numpy as np
+import pytest
+
+from app.services.integration_graph import IntegrationGraph
+
+
+def doc(tool_id, integrations=()):
+    return {"id": tool_id, "name": f"Tool {tool_id}", "integrations": list(integrations)}
+
+
+def reference_pagerank(edges, tool_ids, seeds, restart=IntegrationGraph.RESTART_PROBABILITY):
+    """Dense solve of the walk: follows integrations both ways, restarts from the seeds"""
+    position = {tool_id: i for i, tool_id in enumerate(tool_ids)}
+    n = len(tool_ids)
+    adjacency = np.zeros((n, n))
+    for source, target in edges:
+        adjacency[position[source], position[target]] += 1
+        adjacency[position[target], position[source]] += 1
+    degree = adjacency.sum(axis=1)
+    transition = np.divide(adjacency, degree[:, None], out=np.zeros_like(adjacency), where=degree[:, None] > 0)
+    r = np.zeros(n)
+    r[[position[s] for s in seeds]] = 1.0 / len(seeds)
+    # Dangling tools jump back to the seeds
+    transition[degree == 0] = r
+    # x = restart * r + (1 - restart) * x P
+    x = np.linalg.solve((np.eye(n) - (1 - restart) * transition).T, restart * r)
+    return {tool_id: x[position[tool_id]] for tool_id in tool_ids}
+
+
+GRAPH = [
+    doc(1, [2, 3]),
+    doc(2, [1, 4]),   # 1 and 2 declare each other
+    doc(3, [5]),
+    doc(4),
+    doc(5, [6]),
+    doc(6),
+    doc(7)            # no integrations
+]
+EDGES = [(1, 2), (1, 3), (2, 1), (2, 4), (3, 5), (5, 6)]
+
+
+@pytest.mark.parametrize("seeds", [[1], [4], [1, 6], [7]])
+def test_scores_match_a_dense_solve(seeds):
+    graph = IntegrationGraph()
+    graph.rebuild(GRAPH)
+    expected = reference_pagerank(EDGES, [d["id"] for d in GRAPH], seeds)
+
+    results = graph.recommend(seeds, limit=10)
+
+    reachable = {tool_id: score for tool_id, score in expected.items() if score > 1e-12 and tool_id not in seeds}
+    assert {r["tool_id"] for r in results} == set(reachable)
+    for result in results:
+        assert result["score"] == pytest.approx(reachable[result["tool_id"]], abs=1e-6)
+        assert result["name"] == f"Tool {result['tool_id']}"
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+
+
+def test_closer_tools_rank_first_and_seeds_are_left_out():
+    graph = IntegrationGraph()
+    graph.rebuild(GRAPH)
+
+    ranking = [r["tool_id"] for r in graph.recommend([1], limit=3)]
+
+    assert ranking[0] == 2
+    assert 1 not in ranking
+    assert [r["tool_id"] for r in graph.recommend([1], limit=1)] == [2]
+    assert graph.recommend([99]) is None
+
+
+def test_writes_replace_edges_and_drop_cached_rankings():
+    graph = IntegrationGraph(cache_size=2)
+    graph.rebuild(GRAPH)
+    assert graph.recommend([3], limit=10)[0]["tool_id"] in (1, 5)
+
+    # Tool 3 now integrates with 7 instead of 5; 1 still lists 3
+    graph.upsert([doc(3, [7])])
+    expected = reference_pagerank([(1, 2), (1, 3), (2, 1), (2, 4), (3, 7), (5, 6)], list(range(1, 8)), [3])
+    results = graph.recommend([3], limit=10)
+    assert {r["tool_id"] for r in results} == {1, 2, 4, 7}
+    for result in results:
+        assert result["score"] == pytest.approx(expected[result["tool_id"]], abs=1e-6)
+
+    graph.remove([1])
+    assert [r["tool_id"] for r in graph.recommend([3], limit=10)] == [7]
+    assert graph.recommend([1]) is None
+    expected = reference_pagerank([(2, 4), (3, 7), (5, 6)], [2, 3, 4, 5, 6, 7], [2])
+    assert graph.recommend([2])[0]["score"] == pytest.approx(expected[4], abs=1e-6)
@@ -0,0 +1,76 @@
+# tests/test_services/test_minhash_index.py
+import pytest
+
+from app.services.minhash_index import MinHashIndex
+
+
+def doc(tool_id, features=(), integrations=()):
+    return {"id": tool_id, "features": list(features), "integrations": list(integrations)}
+
+
+def features(*numbers):
+    return [f"Feature {n}" for n in numbers]
+
+
+def test_signatures_agree_about_as_often_as_the_sets_overlap():
+    index = MinHashIndex()
+    a = index.signature([f"f:{n}" for n in range(0, 60)])
+    b = index.signature([f"f:{n}" for n in range(20, 80)])
+
+    # Jaccard 40 / 80
+    assert (a == b).mean() == pytest.approx(0.5, abs=0.12)
+    assert (index.signature(["f:1", "f:2"]) == index.signature(["f:2", "f:1"])).all()
+
+
+def test_near_duplicates_are_found_and_distant_tools_are_not_scanned():
+    index = MinHashIndex()
+    query = doc(1, features(*range(20)))
+    # 18 of 20 features shared: Jaccard 18/22
+    near = [doc(100 + i, features(*[n for n in range(20) if n not in (i, i + 1)], 100 + i, 200 + i)) for i in range(10)]
+    # 2 of 20 shared: Jaccard 2/38
+    far = [doc(1000 + i, features(i, i + 1, *range(300 + 18 * i, 318 + 18 * i))) for i in range(200)]
+    index.rebuild([query] + near + far)
+
+    results = index.similar(1, limit=50)
+
+    assert {r["tool_id"] for r in results} >= {d["id"] for d in near}
+    assert len(results) < 20
+    top = results[0]
+    assert top["similarity"] == pytest.approx(18 / 22)
+    assert top["shared_features"] == 18
+    assert top["feature_similarity"] == pytest.approx(18 / 22)
+    assert top["integration_similarity"] == 0.0
+
+
+def test_results_are_ranked_by_exact_jaccard_with_the_integration_split():
+    index = MinHashIndex()
+    index.rebuild([
+        doc(1, ["Docker", "SSO", "Audit log"], [10, 11]),
+        doc(2, ["docker", " SSO ", "Audit  log"], [10, 11]),
+        doc(3, ["Docker", "SSO", "Audit log"], [10]),
+        doc(4, ["Docker", "SSO", "Audit log", "Caching"], [10, 11, 12]),
+        doc(5)
+    ])
+
+    results = index.similar(1)
+
+    assert [(r["tool_id"], r["similarity"]) for r in results] == [(2, 1.0), (3, 0.8), (4, pytest.approx(5 / 7))]
+    assert results[1]["feature_similarity"] == 1.0
+    assert results[1]["integration_similarity"] == 0.5
+    assert (results[2]["shared_features"], results[2]["shared_integrations"]) == (3, 2)
+    assert [r["tool_id"] for r in index.similar(1, limit=1)] == [2]
+    assert [r["tool_id"] for r in index.similar(1, min_similarity=0.75)] == [2, 3]
+    # Nothing to compare
+    assert index.similar(5) is None
+
+
+def test_updated_and_removed_tools_leave_their_buckets():
+    index = MinHashIndex()
+    index.rebuild([doc(1, ["Docker", "SSO"]), doc(2, ["Docker", "SSO"]), doc(3, ["Docker", "SSO"])])
+
+    index.remove([2])
+    index.upsert([doc(3, ["Terraform", "Vault"])])
+
+    assert index.similar(1) == []
+    assert index.similar(2) is None
+    assert all(bucket <= {1, 3} for buckets in index._buckets for bucket in buckets.values())
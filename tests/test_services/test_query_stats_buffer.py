@@ -0,0 +1,86 @@
+# tests/test_services/test_query_stats_buffer.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.services.query_stats_buffer import QueryStatsBuffer
+from app.services.usage_service import view_weight, log_add
+
+NOON = datetime(2026, 3, 2, 12, 30, tzinfo=timezone.utc)
+
+
+class FailingSession:
+    """Fails the flush's first statement, after running on_execute"""
+
+    def __init__(self, on_execute=None):
+        self.on_execute = on_execute
+        self.rollbacks = 0
+
+    def execute(self, *args, **kwargs):
+        if self.on_execute:
+            self.on_execute()
+        raise OperationalError("UPDATE tools", {}, Exception("connection lost"))
+
+    def commit(self):
+        raise AssertionError("nothing to commit")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_records_are_coalesced_per_tool_and_hour():
+    buffer = QueryStatsBuffer(max_events=3)
+    buffer.record(1, NOON)
+    buffer.record(1, NOON + timedelta(minutes=40))
+    buffer.record(2, NOON - timedelta(minutes=5))
+
+    count, last_seen, trend = buffer._pending[1]
+    assert (count, last_seen) == (2, NOON + timedelta(minutes=40))
+    assert trend == pytest.approx(log_add(view_weight(NOON), view_weight(NOON + timedelta(minutes=40))))
+    assert buffer._hourly == {
+        (1, NOON.replace(minute=0)): 1,
+        (1, NOON.replace(hour=13, minute=0)): 1,
+        (2, NOON.replace(minute=0)): 1
+    }
+    assert buffer.pending_events() == 3
+    # max_events views pending make a flush due
+    assert buffer._due.is_set()
+
+
+def test_failed_flush_merges_its_counts_back_with_views_recorded_meanwhile():
+    buffer = QueryStatsBuffer()
+    buffer.record(1, NOON)
+    buffer.record(1, NOON + timedelta(minutes=10))
+    buffer.record(2, NOON)
+    # A request records views while the flush is running
+    db = FailingSession(on_execute=lambda: (buffer.record(1, NOON + timedelta(minutes=5)), buffer.record(3, NOON)))
+
+    with pytest.raises(OperationalError):
+        buffer.flush(db)
+
+    assert db.rollbacks == 1
+    assert buffer.pending_events() == 5
+    count, last_seen, trend = buffer._pending[1]
+    assert (count, last_seen) == (3, NOON + timedelta(minutes=10))
+    expected = None
+    for minutes in (0, 10, 5):
+        expected = log_add(expected, view_weight(NOON + timedelta(minutes=minutes)))
+    assert trend == pytest.approx(expected)
+    assert buffer._pending[2][0] == 1
+    assert buffer._pending[3][0] == 1
+    assert buffer._hourly == {(1, NOON.replace(minute=0)): 3, (2, NOON.replace(minute=0)): 1, (3, NOON.replace(minute=0)): 1}
+
+    # Retried in full by the next flush
+    retried = FailingSession()
+    with pytest.raises(OperationalError):
+        buffer.flush(retried)
+    assert buffer.pending_events() == 5
+    assert buffer._pending[1][0] == 3
+
+
+def test_flush_with_nothing_pending_touches_nothing():
+    db = FailingSession()
+
+    assert QueryStatsBuffer().flush(db) == 0
+    assert db.rollbacks == 0
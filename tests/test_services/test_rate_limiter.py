@@ -0,0 +1,277 @@
+# tests/test_services/test_rate_limiter.py
+import asyncio
+import multiprocessing
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, Table, Column, Integer, DateTime, MetaData, insert, update
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.database.base_class import Base
+from app.middleware import rate_limit
+from app.models.api_key import APIKey
+from app.models.user import User, UserTier
+from app.services import rate_limiter as rate_limiter_module
+from app.services.api_key_cache import ResolvedAPIKey
+from app.services.rate_limiter import (
+    APIKeyUsageBuffer,
+    MemoryRateLimiter,
+    SharedRateLimiter,
+    client_key,
+    fcntl,
+    sliding_window_hit
+)
+from app.tasks import background
+
+WINDOW = 100.0
+
+
+def frozen_utcnow(moment):
+    return type("FrozenDatetime", (datetime,), {"utcnow": staticmethod(lambda: moment)})
+
+
+def hits(limit, times, state=None):
+    decisions = []
+    for now in times:
+        state, decision = sliding_window_hit(state, limit, now, WINDOW)
+        decisions.append(decision)
+    return state, decisions
+
+
+def test_sliding_window_admits_up_to_the_limit_and_says_when_to_retry():
+    state, decisions = hits(10, [1000 + 50] * 11)
+
+    assert [d.allowed for d in decisions] == [True] * 10 + [False]
+    assert [d.remaining for d in decisions[:3]] == [9, 8, 7]
+    denied = decisions[-1]
+    # 10 counted: the estimate drops to 9 once 10% of them slide out, 10% into the next window
+    assert denied.retry_after == 60
+    assert denied.remaining == 0
+    assert denied.reset_at == 1200
+    assert state == (1000, 0.0, 10.0)
+
+
+def test_sliding_window_weighs_the_previous_window_by_its_remaining_share():
+    state, _ = hits(10, [1000 + 50] * 10)
+    # Halfway into the next window the previous ten count as five
+    state, decisions = hits(10, [1100 + 50] * 6, state)
+
+    assert [d.allowed for d in decisions] == [True] * 5 + [False]
+    assert decisions[0].remaining == 4
+    # 5 current + 10 * 0.4 = 9 leaves room again at 60% of the window
+    assert decisions[-1].retry_after == 10
+    assert decisions[-1].reset_at == 1300
+
+    # Two windows later nothing is left of either
+    _, decisions = hits(10, [1300 + 1], state)
+    assert decisions[0].remaining == 9
+
+
+def test_decision_headers():
+    _, decisions = hits(2, [1000 + 50] * 3)
+
+    assert decisions[0].headers() == {
+        "X-RateLimit-Limit": "2",
+        "X-RateLimit-Remaining": "1",
+        "X-RateLimit-Reset": "1200"
+    }
+    assert decisions[-1].headers() == {
+        "X-RateLimit-Limit": "2",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "1200",
+        "Retry-After": "100"
+    }
+
+
+def request(path="/api/v1/tools", api_key=None, host="203.0.113.7"):
+    headers = [(b"authorization", f"Bearer {api_key}".encode())] if api_key else []
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": headers,
+        "query_string": b"",
+        "client": (host, 1234)
+    })
+
+
+async def ok(request):
+    return Response("ok")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Halfway into an hour
+    now = 1_700_000_000 // 3600 * 3600 + 1800
+    monkeypatch.setattr(rate_limiter_module.time, "time", lambda: now)
+    monkeypatch.setattr(rate_limit, "datetime", frozen_utcnow(datetime.utcfromtimestamp(now)))
+    return now
+
+
+def test_middleware_headers_for_anonymous_clients(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "anonymous_rate_limiter", MemoryRateLimiter())
+    monkeypatch.setattr(settings, "ANONYMOUS_RATE_LIMIT", 2)
+    hour_start = clock - 1800
+
+    responses = [asyncio.run(rate_limit.rate_limit_middleware(request(), ok)) for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "2"
+    assert responses[0].headers["X-RateLimit-Remaining"] == "1"
+    assert responses[0].headers["X-RateLimit-Reset"] == str(hour_start + 7200)
+    assert "Retry-After" not in responses[0].headers
+    # One of the two requests has to slide out: halfway through the next hour
+    assert responses[2].headers["Retry-After"] == "3600"
+    assert responses[2].headers["X-RateLimit-Remaining"] == "0"
+
+    # Another client has its own budget
+    assert asyncio.run(rate_limit.rate_limit_middleware(request(host="203.0.113.8"), ok)).status_code == 200
+
+
+def test_middleware_seeds_keys_from_the_reconciled_counters(clock, monkeypatch):
+    resolved = ResolvedAPIKey(
+        api_key_id=1,
+        user_id=1,
+        tier=UserTier.FREE,
+        rate_limit=100,
+        requests_this_hour=100,
+        last_request_at=datetime.utcfromtimestamp(clock - 60),
+        expires_at=None,
+        user=None
+    )
+    async def resolve_async(api_key):
+        return resolved
+
+    monkeypatch.setattr(rate_limit.api_key_cache, "resolve_async", resolve_async)
+    monkeypatch.setattr(rate_limit, "rate_limiter", MemoryRateLimiter())
+    monkeypatch.setattr(rate_limit, "api_key_usage", APIKeyUsageBuffer())
+
+    response = asyncio.run(rate_limit.rate_limit_middleware(request(api_key="key"), ok))
+
+    assert response.status_code == 429
+    assert response.headers["X-RateLimit-Limit"] == "100"
+    # Room for one more once 1/100 of this hour's requests has slid out of the next hour
+    assert response.headers["Retry-After"] == str(1800 + 36)
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("203.0.113.7", "ip:203.0.113.7"),
+    ("2001:db8:1:2:3:4:5:6", "ip:2001:db8:1:2::/64"),
+    ("2001:db8:1:2:ffff::1", "ip:2001:db8:1:2::/64"),
+    ("2001:db8:1:3::1", "ip:2001:db8:1:3::/64"),
+    ("::ffff:203.0.113.7", "ip:203.0.113.7"),
+    ("testclient", "ip:testclient")
+])
+def test_client_key_groups_ipv6_clients_by_prefix(host, expected):
+    assert client_key(host) == expected
+
+
+def _shared_hits(directory):
+    limiter = SharedRateLimiter(directory, "api-keys", max_keys=64)
+    return sum(limiter.hit("key:1", 1000, now=1800.0).allowed for _ in range(400))
+
+
+@pytest.mark.skipif(fcntl is None, reason="the shared limiter needs fcntl")
+def test_shared_limiter_is_one_budget_across_processes(tmp_path):
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        admitted = pool.map(_shared_hits, [str(tmp_path)] * 4)
+
+    assert sum(admitted) == 1000
+    assert not SharedRateLimiter(str(tmp_path), "api-keys", max_keys=64).hit("key:1", 1000, now=1800.0).allowed
+
+
+@pytest.mark.skipif(fcntl is None, reason="the shared limiter needs fcntl")
+def test_shared_limiter_of_another_size_leaves_the_running_one_alone(tmp_path):
+    running = SharedRateLimiter(str(tmp_path), "api-keys", max_keys=64)
+    assert running.hit("key:1", 1, now=1800.0).allowed
+
+    # A worker of the next deploy, configured with more keys
+    resized = SharedRateLimiter(str(tmp_path), "api-keys", max_keys=128)
+
+    assert resized.path != running.path
+    assert not running.hit("key:1", 1, now=1800.0).allowed
+    assert resized.hit("key:1", 1, now=1800.0).allowed
+
+
+@pytest.mark.skipif(fcntl is None, reason="the shared limiter needs fcntl")
+def test_shared_limiter_refuses_a_file_with_another_layout(tmp_path):
+    path = SharedRateLimiter(str(tmp_path), "api-keys", max_keys=64).path
+    with open(path, "r+b") as f:
+        f.write(b"DHRL0000")
+
+    with pytest.raises(OSError):
+        SharedRateLimiter(str(tmp_path), "api-keys", max_keys=64)
+    with open(path, "rb") as f:
+        assert f.read(8) == b"DHRL0000"
+
+
+@pytest.fixture
+def api_keys():
+    engine = create_engine("sqlite://")
+    # Postgres GREATEST ignores NULLs
+    event.listen(engine, "connect", lambda connection, record: connection.create_function(
+        "greatest", 2, lambda a, b: b if a is None else a if b is None else max(a, b)
+    ))
+    Base.metadata.create_all(engine, tables=[User.__table__, APIKey.__table__])
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="dev@example.com", password_hash="x"))
+    for key_id, hour_count, day_count, last in [
+        (1, 5, 50, datetime(2026, 1, 1, 10, 30)),  # same hour
+        (2, 5, 50, datetime(2026, 1, 1, 9, 30)),   # earlier hour, same day
+        (3, 5, 50, datetime(2025, 12, 31, 23, 0)), # earlier day
+        (4, 5, 50, datetime(2026, 1, 1, 12, 0)),   # a later hour of the same day is already stored
+        (5, None, None, None)                      # never used
+    ]:
+        session.add(APIKey(id=key_id, user_id=1, api_key=f"key-{key_id}", requests_this_hour=hour_count,
+                           requests_today=day_count, last_request_at=last))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_usage_reconciliation_restarts_counters_by_hour_and_day(api_keys):
+    increments = Table(
+        "increments", MetaData(),
+        *[Column(name, DateTime) for name in ("hour_start", "hour_end", "day_start", "day_end", "requested_at")],
+        Column("api_key_id", Integer), Column("hour_requests", Integer), Column("day_requests", Integer)
+    )
+    increments.create(api_keys.get_bind())
+    api_keys.execute(insert(increments), [
+        {"api_key_id": key_id, "hour_start": datetime(2026, 1, 1, 10), "hour_end": datetime(2026, 1, 1, 11),
+         "day_start": datetime(2026, 1, 1), "day_end": datetime(2026, 1, 2), "hour_requests": 2,
+         "day_requests": 3, "requested_at": datetime(2026, 1, 1, 10, 45)}
+        for key_id in range(1, 6)
+    ])
+    api_keys.execute(
+        update(APIKey).where(APIKey.id == increments.c.api_key_id).values(**APIKeyUsageBuffer.usage_values(increments.c)),
+        execution_options={"synchronize_session": False}
+    )
+
+    rows = api_keys.query(APIKey.requests_this_hour, APIKey.requests_today, APIKey.last_request_at).order_by(APIKey.id)
+    assert [tuple(row) for row in rows] == [
+        (7, 53, datetime(2026, 1, 1, 10, 45)),
+        (2, 53, datetime(2026, 1, 1, 10, 45)),
+        (2, 3, datetime(2026, 1, 1, 10, 45)),
+        (5, 53, datetime(2026, 1, 1, 12, 0)),
+        (2, 3, datetime(2026, 1, 1, 10, 45))
+    ]
+
+
+def test_daily_reset_keeps_todays_counts_and_cached_keys(api_keys, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(background, "SessionLocal", sessionmaker(bind=api_keys.get_bind()))
+    monkeypatch.setattr(background, "datetime", frozen_utcnow(datetime(2026, 1, 1, 0, 0, 20)))
+    from app.services import api_key_cache
+    monkeypatch.setattr(api_key_cache.api_key_cache, "invalidate_all", lambda: invalidated.append(True))
+
+    background.reset_daily_counters_now()
+
+    rows = api_keys.query(APIKey.id, APIKey.requests_today).order_by(APIKey.id)
+    assert [tuple(row) for row in rows] == [(1, 50), (2, 50), (3, 0), (4, 50), (5, 0)]
+    assert not invalidated
@@ -0,0 +1,83 @@
+# tests/test_services/test_search_index.py
+import math
+
+import pytest
+
+from app.services.search_index import SearchIndex
+
+
+def doc(tool_id, name="", tagline="", description=""):
+    return {"id": tool_id, "name": name, "tagline": tagline, "description": description}
+
+
+def built(*documents):
+    index = SearchIndex()
+    index.rebuild(documents)
+    return index
+
+
+def test_bm25_score_of_a_single_term():
+    index = built(
+        doc(1, "Kafka", "Streaming platform"),
+        doc(2, "Pulsar", "Messaging platform", "Kafka compatible")
+    )
+    k1, b = SearchIndex.K1, SearchIndex.B
+    # name weighs 3 and tagline 2 per term: lengths 3 + 4 and 3 + 4 + 2
+    avg_length = (7 + 9) / 2
+    idf = math.log(1 + (2 - 2 + 0.5) / (2 + 0.5))
+
+    def bm25(tf, length):
+        return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+
+    assert index.search("kafka") == [
+        (1, pytest.approx(bm25(3.0, 7))),
+        (2, pytest.approx(bm25(1.0, 9)))
+    ]
+
+
+def test_field_weights_rank_name_over_tagline_over_description():
+    index = built(
+        doc(1, "Jenkins", "Build server", "Runs pipeline jobs"),
+        doc(2, "Drone", "Pipeline server", "Runs build jobs"),
+        doc(3, "Pipeline", "Build server", "Runs drone jobs")
+    )
+
+    assert [tool_id for tool_id, _ in index.search("pipeline")] == [3, 2, 1]
+
+
+def test_rare_terms_outweigh_common_ones_and_long_documents_are_normalised():
+    index = built(
+        doc(1, "Alpha", "Deploy containers"),
+        doc(2, "Beta", "Deploy serverless"),
+        doc(3, "Gamma", "Deploy containers", "Scale " * 20)
+    )
+    scores = dict(index.search("deploy serverless"))
+
+    # serverless is in one tool, deploy in all three
+    assert scores[2] > scores[1]
+    # The same matches in a longer document
+    assert scores[3] < scores[1]
+    assert [tool_id for tool_id, _ in index.search("containers")] == [1, 3]
+
+
+def test_incremental_updates_score_as_a_rebuild():
+    documents = [doc(i, f"Tool {i}", ["Docker hosting", "Kubernetes hosting"][i % 2]) for i in range(1, 7)]
+    index = built(*documents)
+
+    index.upsert([doc(2, "Tool 2", "Docker registry")])
+    index.remove([5])
+    expected = built(*[d for d in documents if d["id"] not in (2, 5)], doc(2, "Tool 2", "Docker registry"))
+
+    for query in ["docker", "hosting", "registry kubernetes"]:
+        assert index.search(query) == pytest.approx(expected.search(query))
+    assert len(index) == 5
+    assert not index.has_term("nonexistent")
+    assert index.has_term("Registry")
+
+
+def test_limit_breaks_ties_by_tool_id():
+    index = built(*[doc(i, "Redis", "Cache") for i in (4, 2, 3, 1)])
+
+    assert [tool_id for tool_id, _ in index.search("redis", limit=2)] == [1, 2]
+    assert [tool_id for tool_id, _ in index.search("redis")] == [1, 2, 3, 4]
+    assert index.search("the and") == []
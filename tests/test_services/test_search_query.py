@@ -0,0 +1,81 @@
+# tests/test_services/test_search_query.py
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.search import search_tools
+from app.utils.search import parse_search_query
+
+
+def test_free_text_categories_features_and_phrases():
+    plan = parse_search_query(
+        'fast  ci category:ci-cd cat:"Version Control" feature:docker feature:"single  sign-on" "build cache"'
+    )
+
+    assert plan.text == "fast ci"
+    assert plan.categories == ["ci-cd", "Version Control"]
+    assert plan.features == ["docker", "single sign-on"]
+    assert plan.phrases == ["build cache"]
+    assert plan.ranking_text == "fast ci build cache"
+    assert not plan.has_price_filter
+
+
+@pytest.mark.parametrize("query, price_min, min_exclusive, price_max, max_exclusive", [
+    ("price<20", None, False, 20.0, True),
+    ("price<=20", None, False, 20.0, False),
+    ("price>5", 5.0, True, None, False),
+    ("PRICE >= $5", 5.0, False, None, False),
+    ("price:10-50", 10.0, False, 50.0, False),
+    ("price:free", 0.0, False, 0.0, False),
+    ("price=15", 15.0, False, 15.0, False),
+    # The tighter bound of each side wins
+    ("price<50 price<=20 price>=5 price>5", 5.0, True, 20.0, False),
+    ("price:10-50 price<30", 10.0, False, 30.0, True)
+])
+def test_price_predicates(query, price_min, min_exclusive, price_max, max_exclusive):
+    plan = parse_search_query(f"monitoring {query}")
+
+    assert plan.text == "monitoring"
+    assert (plan.price_min, plan.min_exclusive) == (price_min, min_exclusive)
+    assert (plan.price_max, plan.max_exclusive) == (price_max, max_exclusive)
+
+
+def test_plans_render_back_to_equivalent_queries():
+    query = 'ci "build cache" category:ci-cd feature:"single sign-on" price>5 price<=20'
+    plan = parse_search_query(query)
+
+    assert plan.to_query() == query
+    assert parse_search_query("price:10-10").to_query() == "price:10"
+
+
+def test_empty_and_unterminated_values_are_tolerated():
+    plan = parse_search_query('category:"" feature:"" "" "open phrase')
+
+    assert plan.categories == []
+    assert plan.features == []
+    assert plan.phrases == ["open phrase"]
+    assert parse_search_query("").text == ""
+
+
+@pytest.mark.parametrize("query", ["price<abc", "price:-5", "price:10-x", "price>=$", "price:free-ish"])
+def test_malformed_prices_raise_value_error(query):
+    with pytest.raises(ValueError, match="Invalid price"):
+        parse_search_query(query)
+
+
+def test_search_endpoint_answers_malformed_queries_with_400(db):
+    with pytest.raises(HTTPException) as raised:
+        search_tools(
+            q="docker price<cheap",
+            category=None,
+            price_min=None,
+            price_max=None,
+            features=None,
+            sort_by="relevance",
+            cursor=None,
+            size=10,
+            semantic=0.0,
+            db=db
+        )
+
+    assert raised.value.status_code == 400
+    assert "Invalid price" in raised.value.detail
@@ -0,0 +1,224 @@
+# tests/test_services/test_search_service.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Tool, Category, PricingTier, Feature, ReviewAggregate
+from app.database.models.integration import Integration
+from app.services import catalog_sync
+from app.services.catalog_sync import load_tool_documents, refresh_tools
+from app.services.facet_index import FacetIndex
+from app.services.recommendation_index import RecommendationIndex, recommendation_index
+from app.services.search_cache import SearchCache, search_cache
+from app.services.search_service import SearchService
+
+
+@pytest.fixture
+def catalog(db):
+    category = Category(name="CI/CD", slug="ci-cd")
+    db.add(category)
+    db.flush()
+
+    tools = []
+    for i in range(30):
+        tool = Tool(name=f"Tool {i}", slug=f"tool-{i}", category_id=category.id, is_active=True)
+        db.add(tool)
+        db.flush()
+        db.add(PricingTier(tool_id=tool.id, tier_name="pro", monthly_price=5 + i % 4 * 5))
+        db.add(Feature(tool_id=tool.id, feature_name=["Docker", "SSO", "Caching"][i % 3], is_available=True))
+        db.add(ReviewAggregate(tool_id=tool.id, source="g2", avg_rating=3 + i % 3))
+        tools.append(tool)
+    for i, tool in enumerate(tools):
+        db.add(Integration(tool_id=tool.id, integrates_with=tools[(i + 1) % len(tools)].id))
+    db.commit()
+    return tools
+
+
+def count_queries(db, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, len(statements)
+
+
+def test_live_recommendations_query_count_is_constant(db, catalog):
+    # Nothing in tool_similarity yet
+    target = catalog[0].id
+
+    counts = {}
+    for limit in (1, 5, 14):
+        db.expunge_all()
+        results, counts[limit] = count_queries(
+            db, lambda: SearchService.get_recommendations(db, target, limit=limit)
+        )
+        assert len(results) == limit
+
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_live_recommendations_scores(db, catalog):
+    results = SearchService.get_recommendations(db, catalog[0].id, limit=5)
+
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert catalog[0].id not in {r["tool"]["id"] for r in results}
+    # Among the first ten candidates, same feature and rating with the closest price
+    assert results[0]["tool"]["id"] == catalog[9].id
+
+
+def test_stack_recommendations_without_the_index_match_the_index(db, catalog, monkeypatch):
+    seeds = [catalog[0].id, catalog[4].id]
+    index = RecommendationIndex()
+    index.rebuild(load_tool_documents(db))
+    # limit * 2 candidates per seed covers the whole category here
+    expected = index.recommend_stack(seeds, limit=8)
+
+    monkeypatch.setattr(recommendation_index, "is_built", False)
+    results = SearchService.get_stack_recommendations(db, seeds, limit=8)
+
+    assert [r["tool"]["id"] for r in results] == [r["tool_id"] for r in expected]
+    assert SearchService.get_stack_recommendations(db, [-1], limit=5) is None
+
+
+def test_stack_recommendations_serve_the_previous_matrix_until_refreshed(db, catalog):
+    index = RecommendationIndex()
+    index.rebuild(load_tool_documents(db))
+    seeds = [catalog[0].id]
+    before = [r["tool_id"] for r in index.recommend_stack(seeds, limit=30)]
+
+    index.remove([before[0]])
+    catalog[1].name = "Renamed"
+    index.upsert(load_tool_documents(db, [catalog[1].id]))
+
+    # Removed tools drop out at once, the rest waits for the refresh
+    assert [r["tool_id"] for r in index.recommend_stack(seeds, limit=30)] == before[1:]
+    assert index.recommend_stack([before[0]]) is None
+    assert "Renamed" not in {r["name"] for r in index.recommend_stack(seeds, limit=30)}
+
+    assert index.refresh_catalog()
+    assert not index.refresh_catalog()
+    assert "Renamed" in {r["name"] for r in index.recommend_stack(seeds, limit=30)}
+    assert before[0] not in {r["tool_id"] for r in index.recommend_stack(seeds, limit=30)}
+
+
+@pytest.mark.parametrize("sort_by", ["name", "price", "rating", "trending", "recent", "relevance"])
+def test_search_pages_sql_orders_with_keyset_cursors(db, catalog, sort_by):
+    search_cache.invalidate()
+    for i, tool in enumerate(catalog):
+        tool.created_at = datetime(2026, 1, 1) + timedelta(days=i % 4)
+    # Stored without a creation time
+    catalog[3].created_at = None
+    catalog[5].query_count = 7
+    db.commit()
+
+    seen = []
+    cursor = None
+    pages = 0
+    while pages < 10:
+        result = SearchService._search_page(db, "category:ci-cd", sort_by=sort_by, cursor=cursor, limit=7)
+        seen.extend(result["page_ids"])
+        pages += 1
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 5
+    assert sorted(seen) == sorted(tool.id for tool in catalog)
+    assert result["total"] == len(catalog)
+    if sort_by == "name":
+        assert seen == [tool.id for tool in sorted(catalog, key=lambda tool: (tool.name, tool.id))]
+    if sort_by in ("trending", "relevance"):
+        assert seen[0] == catalog[5].id
+    if sort_by == "recent":
+        assert seen[-1] == catalog[3].id
+
+
+def test_ranking_computed_across_an_invalidation_is_not_cached():
+    cache = SearchCache(max_entries=10, max_ids=100, ttl_seconds=60)
+
+    generation = cache.generation()
+    cache.invalidate()
+    cache.set(("q",), [1, 2], [(1,), (2,)], generation=generation)
+    assert cache.get(("q",)) is None
+
+    cache.set(("q",), [1, 2], [(1,), (2,)], generation=cache.generation())
+    assert cache.get(("q",)) == ([1, 2], [(1,), (2,)])
+
+
+def test_catalog_refresh_clears_caches_after_every_index(db, catalog, monkeypatch):
+    applied = []
+
+    class Index:
+        def __init__(self, name):
+            self.name = name
+
+        def upsert(self, documents):
+            applied.append(self.name)
+
+        def remove(self, tool_ids):
+            applied.append(self.name)
+
+    cache = Index("cache")
+    # Registered before the indexes, as an import order could do
+    monkeypatch.setattr(catalog_sync, "_indexes", [])
+    monkeypatch.setattr(catalog_sync, "_caches", [])
+    catalog_sync.register_index(cache, cache=True)
+    catalog_sync.register_index(Index("fuzzy"))
+    catalog_sync.register_index(Index("semantic"))
+
+    refresh_tools({catalog[0].id}, db=db)
+
+    assert applied == ["fuzzy", "semantic", "cache"]
+
+
+def test_price_facet_counts_a_tool_in_every_band_it_has_a_tier_in(db, catalog):
+    tool = catalog[0]
+    db.add(PricingTier(tool_id=tool.id, tier_name="enterprise", monthly_price=60))
+    db.add(PricingTier(tool_id=tool.id, tier_name="legacy", monthly_price=500, is_current=False))
+    db.commit()
+    index = FacetIndex()
+    index.rebuild(load_tool_documents(db))
+
+    price_ranges = {e["value"]: e["count"] for e in index.counts([tool.id])["price_ranges"]}
+
+    assert price_ranges == {"under_10": 1, "50_100": 1}
+    assert {e["value"]: e["count"] for e in index.counts()["price_ranges"]} == {
+        "under_10": 8, "10_50": 22, "50_100": 1
+    }
+
+
+def test_batch_search_keeps_request_order_and_reports_errors_per_query(db, catalog):
+    search_cache.invalidate()
+    specs = [
+        {"query": "category:ci-cd", "sort_by": "name", "limit": 3},
+        {"query": "docker price<cheap"},
+        {"query": "category:ci-cd price<=5", "sort_by": "name", "limit": 5},
+        {"query": "category:ci-cd", "cursor": "not-a-cursor"},
+        {"query": "category:ci-cd", "sort_by": "name", "limit": 3}
+    ]
+
+    batch = SearchService.batch_search(db, specs)
+    results = batch["results"]
+
+    assert len(results) == len(specs)
+    assert all(result["took_ms"] >= 0 for result in results)
+    assert "Invalid price" in results[1]["error"]
+    assert "items" not in results[1]
+    assert results[3]["error"]
+    for i in (0, 2, 4):
+        alone = SearchService.search_tools(db, **specs[i])
+        assert "error" not in results[i]
+        assert [tool.id for tool in results[i]["items"]] == [tool.id for tool in alone["items"]]
+        assert results[i]["total"] == alone["total"]
+        assert results[i]["next_cursor"] == alone["next_cursor"]
+    assert results[0]["items"] == results[4]["items"]
+    assert results[2]["total"] == 8
+    assert batch["fetch_ms"] >= 0
@@ -0,0 +1,49 @@
+# tests/test_services/test_semantic_index.py
+from app.services.search_cache import search_cache
+from app.services.semantic_index import SemanticIndex
+
+
+WORDS = ["deploy", "monitor", "database", "queue", "cache", "search", "auth", "logging"]
+
+
+def doc(tool_id, words):
+    return {"id": tool_id, "name": f"Tool {tool_id}", "tagline": " ".join(words), "description": None}
+
+
+def test_upsert_folds_in_and_leaves_the_refit_to_the_background():
+    index = SemanticIndex()
+    index.rebuild([doc(i, WORDS[i % 8:i % 8 + 2]) for i in range(20)])
+    components = index._components
+
+    index.upsert([doc(100 + i, ["database", "cache"]) for i in range(10)])
+
+    assert index._components is components
+    assert index._refit_due.is_set()
+    assert 100 in {tool_id for tool_id, _ in index.search("database cache", limit=50)}
+
+    generation = search_cache.generation()
+    assert index.refit()
+    assert index._components is not components
+    # Rankings blended with the old projection are dropped
+    assert search_cache.generation() > generation
+    assert not index.refit()
+    assert 100 in {tool_id for tool_id, _ in index.search("database cache", limit=50)}
+
+
+def test_tools_changed_during_a_refit_are_replayed_onto_it(monkeypatch):
+    index = SemanticIndex()
+    index.rebuild([doc(i, WORDS[i % 8:i % 8 + 2]) for i in range(20)])
+    index.upsert([doc(100 + i, ["queue"]) for i in range(10)])
+    fit = SemanticIndex._fit_locked
+
+    def fit_while_writing(fitted):
+        fit(fitted)
+        index.upsert([doc(200, ["search", "auth"])])
+        index.remove([100])
+
+    monkeypatch.setattr(SemanticIndex, "_fit_locked", fit_while_writing)
+    assert index.refit()
+
+    found = {tool_id for tool_id, _ in index.search("search auth queue", limit=50)}
+    assert 200 in found
+    assert 100 not in found
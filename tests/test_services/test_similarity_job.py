@@ -0,0 +1,120 @@
+# tests/test_services/test_similarity_job.py
+import pytest
+
+from app.models import Tool, Category, PricingTier, Feature
+from app.database.models.tool_similarity import ToolSimilarity
+from app.services import similarity_job as similarity_job_module
+from app.services.catalog_sync import load_tool_documents
+from app.services.search_service import SearchService
+from app.services.similarity import similarity_profile, similarity_score, score_shard
+from app.services.similarity_job import SimilarityRebuildJob
+
+
+def profile(tool_id, features, integrations=(), price=0.0, rating=0.0, category_id=1):
+    return {
+        "id": tool_id,
+        "category_id": category_id,
+        "features": frozenset(features),
+        "integrations": frozenset(integrations),
+        "price": price,
+        "rating": rating
+    }
+
+
+def test_shard_scores_match_the_pairwise_score_and_rank_best_first():
+    profiles = [
+        profile(i, {"docker", "sso", "caching", "audit"} - {["sso", "caching", "audit", "x"][i % 4]},
+                integrations={(i + 1) % 9, (i + 3) % 9}, price=[0, 0, 10, 25][i % 4], rating=3 + i % 3 / 2)
+        for i in range(9)
+    ]
+    by_id = {p["id"]: p for p in profiles}
+
+    _, rows, pairs = score_shard(1, list(reversed(profiles)), top_n=4)
+
+    assert pairs == 36
+    assert {row[0] for row in rows} == set(by_id)
+    for tool_id in by_id:
+        neighbours = [row for row in rows if row[0] == tool_id]
+        expected = sorted(
+            ((similarity_score(by_id[tool_id], other), other["id"]) for other in profiles if other["id"] != tool_id),
+            key=lambda item: (-item[0], item[1])
+        )[:4]
+        assert [row[1] for row in neighbours] == [other_id for _, other_id in expected]
+        assert [row[2] for row in neighbours] == pytest.approx([score for score, _ in expected], abs=0.01)
+        assert [row[3] for row in neighbours] == [1, 2, 3, 4]
+
+
+def test_shard_drops_neighbours_below_the_minimum_score():
+    profiles = [profile(1, {"a"}), profile(2, {"a"}), profile(3, {"b"}, price=100.0, rating=5.0)]
+
+    _, rows, _ = score_shard(1, profiles, top_n=5, min_score=60)
+
+    assert [(row[0], row[1]) for row in rows] == [(1, 2), (2, 1)]
+    # Components on the score's scale
+    assert rows[0][4:] == (100.0, 100.0, 0.0, 100.0)
+
+
+@pytest.fixture
+def similarity_catalog(db, monkeypatch):
+    categories = [Category(name="CI/CD", slug="ci-cd"), Category(name="Monitoring", slug="monitoring")]
+    db.add_all(categories)
+    db.flush()
+    tools = []
+    for i in range(8):
+        tool = Tool(name=f"Tool {i}", slug=f"tool-{i}", category_id=categories[i % 2].id, is_active=True)
+        db.add(tool)
+        db.flush()
+        db.add(PricingTier(tool_id=tool.id, tier_name="pro", monthly_price=10 + i))
+        db.add(Feature(tool_id=tool.id, feature_name=["Docker", "SSO"][i % 3 % 2], is_available=True))
+        tools.append(tool)
+    db.commit()
+
+    engine = db.get_bind()
+    monkeypatch.setattr(similarity_job_module, "engine", engine)
+    monkeypatch.setattr(similarity_job_module, "SessionLocal", lambda: type(db)(bind=engine))
+    return categories, tools
+
+
+def stored(db):
+    return {
+        (tool_id, similar_tool_id)
+        for tool_id, similar_tool_id in db.query(ToolSimilarity.tool_id, ToolSimilarity.similar_tool_id)
+    }
+
+
+def test_job_rescores_the_categories_a_moved_tool_left_and_joined(db, similarity_catalog):
+    categories, tools = similarity_catalog
+    job = SimilarityRebuildJob(workers=2, top_n=10)
+    ids = [tool.id for tool in tools]
+
+    assert job.run_due()
+    assert job.status()["last_run"]["mode"] == "full"
+    assert stored(db) == {(a, b) for a in ids for b in ids if a != b and a % 2 == b % 2}
+    assert not job.run_due()
+
+    # Tool 0 moves to the second category
+    moved = tools[0]
+    moved.category_id = categories[1].id
+    db.commit()
+    job.upsert(load_tool_documents(db, [moved.id]))
+    assert job.run_due()
+
+    status = job.status()
+    assert status["last_run"]["mode"] == "incremental"
+    assert status["last_run"]["shards_total"] == 2
+    assert status["last_run"]["state"] == "succeeded"
+    assert status["last_run"]["duration_seconds"] is not None
+    second = [t.id for t in tools if t.category_id == categories[1].id]
+    first = [t.id for t in tools if t.category_id == categories[0].id]
+    assert stored(db) == (
+        {(a, b) for a in first for b in first if a != b} | {(a, b) for a in second for b in second if a != b}
+    )
+
+    # Recommendations are read from the table, scored as similarity_score
+    results = SearchService.get_recommendations(db, moved.id, limit=3)
+    documents = {doc["id"]: similarity_profile(doc) for doc in load_tool_documents(db)}
+    assert [r["tool"]["id"] for r in results] == [
+        other for _, other in sorted(
+            (-similarity_score(documents[moved.id], documents[other]), other) for other in second if other != moved.id
+        )[:3]
+    ]
@@ -0,0 +1,43 @@
+# tests/test_services/test_suggestion_index.py
+from app.services.suggestion_index import SuggestionIndex
+
+
+def doc(tool_id, name, query_count=0):
+    return {"id": tool_id, "name": name, "slug": None, "category_name": None,
+            "features": [], "query_count": query_count}
+
+
+def build(*documents):
+    index = SuggestionIndex()
+    index.rebuild(list(documents))
+    return index
+
+
+def test_text_sharing_a_key_with_a_word_suffix_is_suggested():
+    index = build(doc(1, "Google Cloud Build", 50), doc(2, "Build", 10))
+
+    assert index.suggest("bui") == ["Google Cloud Build", "Build"]
+
+
+def test_every_text_under_a_shared_key_ranks_by_its_own_weight():
+    index = build(doc(1, "GitHub Actions", 5), doc(2, "GitLab Actions", 20))
+
+    assert index.suggest("act") == ["GitLab Actions", "GitHub Actions"]
+
+
+def test_renamed_tool_is_suggested_under_its_new_name_only():
+    # "build" is also a word suffix of the other tool, so the key outlives the rename
+    index = build(doc(1, "Build", 50), doc(2, "Google Cloud Build", 10))
+    index.upsert([doc(1, "Buildkite", 50)])
+
+    assert index.suggest("bui") == ["Buildkite", "Google Cloud Build"]
+    assert "Build" not in index.suggest("build")
+
+
+def test_warm_prefix_lists_follow_weight_changes():
+    index = build(*[doc(i, f"Tool {i}", i) for i in range(1, 40)])
+    index.upsert([doc(1, "Tool 1", 1000)])
+    assert index.suggest("t", limit=1) == ["Tool 1"]
+
+    index.remove([1])
+    assert index.suggest("t", limit=1) == ["Tool 39"]
@@ -0,0 +1,37 @@
+# tests/test_services/test_tool_service.py
+import pytest
+
+from app.models import Tool, Feature
+from app.services.catalog_sync import load_tool_documents
+from app.services.feature_index import FeatureIndex
+from app.services import tool_service
+from app.services.tool_service import ToolService
+
+
+@pytest.fixture
+def tools(db):
+    tools = []
+    for i, feature in enumerate(["Docker", "docker  support", "SSO", " Docker\tSupport "]):
+        tool = Tool(name=f"Tool {i}", slug=f"tool-{i}", is_active=True)
+        db.add(tool)
+        db.flush()
+        db.add(Feature(tool_id=tool.id, feature_name=feature, is_available=True))
+        tools.append(tool)
+    db.commit()
+    return tools
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_feature_filter_ignores_case_with_and_without_the_index(db, tools, monkeypatch, indexed):
+    index = FeatureIndex()
+    if indexed:
+        index.rebuild(load_tool_documents(db))
+    monkeypatch.setattr(tool_service, "feature_index", index)
+
+    found, _ = ToolService.get_tools(db, features=["DOCKER"])
+
+    assert [tool.id for tool in found] == [tools[0].id]
+
+    found, _ = ToolService.get_tools(db, features=["Docker Support"])
+
+    assert [tool.id for tool in found] == [tools[1].id, tools[3].id]
@@ -0,0 +1,49 @@
+# tests/test_services/test_trending_sketch.py
+from datetime import datetime, timezone
+import math
+import os
+
+import pytest
+
+from app.models import Tool
+from app.services.trending_sketch import TrendingSketch
+from app.services.usage_service import view_weight
+
+
+@pytest.fixture
+def tools(db):
+    now = datetime.now(timezone.utc)
+    tools = []
+    for i in range(5):
+        # (i + 1) * 10 decayed views as of now
+        tool = Tool(name=f"Tool {i}", slug=f"tool-{i}", is_active=True,
+                    trending_score=view_weight(now) + math.log((i + 1) * 10))
+        db.add(tool)
+        tools.append(tool)
+    db.commit()
+    return tools
+
+
+def test_fresh_workers_rank_stored_views_once(db, tools, tmp_path, monkeypatch):
+    for pid in (1, 2):
+        # Two workers started after the same deploy
+        monkeypatch.setattr(os, "getpid", lambda pid=pid: pid)
+        sketch = TrendingSketch(str(tmp_path), snapshot_size=10)
+        sketch.seed(db)
+        sketch.record(tools[0].id)
+        sketch.publish(db)
+
+    top = sketch.top(5)
+
+    assert [item["id"] for item in top] == [tool.id for tool in reversed(tools)]
+    assert top[0]["views"] == pytest.approx(50, rel=0.01)
+    assert top[-1]["views"] == pytest.approx(12, rel=0.01)
+
+
+def test_short_snapshot_is_not_served(db, tools, tmp_path):
+    sketch = TrendingSketch(str(tmp_path), snapshot_size=10)
+    sketch.seed(db)
+    sketch.publish(db)
+
+    assert len(sketch.top(5)) == 5
+    assert sketch.top(6) is None
@@ -0,0 +1,87 @@
+# tests/test_services/test_usage_service.py
+import math
+from datetime import datetime, date, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.database.models.tool_usage import ToolUsageHourly, ToolUsageDaily
+from app.services.usage_service import UsageService, log_add, view_weight, decayed_views
+
+NOW = datetime(2026, 3, 10, 14, 20, tzinfo=timezone.utc)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("a, b", [(0.0, 0.0), (1.5, -2.0), (-3.0, 4.0), (10.0, 10.0)])
+def test_log_add_is_the_log_of_the_summed_exponentials(a, b):
+    assert log_add(a, b) == pytest.approx(math.log(math.exp(a) + math.exp(b)))
+    assert log_add(a, b) == log_add(b, a)
+
+
+def test_log_add_handles_empty_and_extreme_scores():
+    assert log_add(None, 2.5) == 2.5
+    # exp() of these overflows
+    assert log_add(5000.0, 5000.0) == pytest.approx(5000.0 + math.log(2))
+    assert log_add(5000.0, 3000.0) == 5000.0
+    assert log_add(-5000.0, 0.0) == pytest.approx(0.0)
+
+
+def test_decayed_views_halve_every_half_life():
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    score = log_add(view_weight(NOW), view_weight(NOW))
+
+    assert decayed_views(score, NOW) == pytest.approx(2.0)
+    assert decayed_views(score, NOW + half_life) == pytest.approx(1.0)
+    assert decayed_views(score, NOW + 2 * half_life) == pytest.approx(0.5)
+    # An older view weighs what is left of it
+    assert decayed_views(log_add(score, view_weight(NOW - half_life)), NOW) == pytest.approx(2.5)
+    assert decayed_views(None, NOW) == 0.0
+
+
+@pytest.fixture
+def usage(db):
+    engine = db.get_bind()
+    ToolUsageHourly.__table__.create(engine)
+    ToolUsageDaily.__table__.create(engine)
+    db.add_all([ToolUsageDaily(tool_id=1, day=day, views=views) for day, views in [
+        (date(2026, 2, 8), 1000),     # before 30d
+        (date(2026, 2, 9), 1),        # first day of 30d
+        (date(2026, 3, 3), 10),       # before 7d
+        (date(2026, 3, 4), 20),       # first day of 7d
+        (date(2026, 3, 6), 40),       # last day before the hourly retention
+        (date(2026, 3, 7), 5000),     # rolled up, but still counted from hourly buckets
+    ]])
+    db.add_all([ToolUsageHourly(tool_id=tool_id, bucket_start=start, views=views) for tool_id, start, views in [
+        (1, utc(2026, 3, 6, 23), 7000),   # in the daily bucket of 3/6
+        (1, utc(2026, 3, 7, 0), 100),
+        (1, utc(2026, 3, 9, 14), 200),    # 24 hours before the current hour
+        (1, utc(2026, 3, 9, 15), 300),
+        (1, utc(2026, 3, 10, 14), 400),   # the current hour
+        (2, utc(2026, 3, 10, 13), 3)
+    ]])
+    db.commit()
+    return db
+
+
+def views(db, period, now=NOW):
+    window = UsageService.window_views(db, period, now=now)
+    return {tool_id: count for tool_id, count in db.query(window.c.tool_id, window.c.views)}
+
+
+def test_window_views_sum_daily_buckets_up_to_the_hourly_retention(usage):
+    assert views(usage, "24h") == {1: 300 + 400, 2: 3}
+    assert views(usage, "7d") == {1: 20 + 40 + 100 + 200 + 300 + 400, 2: 3}
+    assert views(usage, "30d") == {1: 1 + 10 + 20 + 40 + 100 + 200 + 300 + 400, 2: 3}
+
+
+def test_window_views_read_only_hourly_buckets_when_they_cover_the_period(usage, monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_USAGE_HOURLY_RETENTION_HOURS", 24 * 10)
+
+    # The period starts on 3/4, after the retained hourly buckets do
+    assert views(usage, "7d") == {1: 7000 + 100 + 200 + 300 + 400, 2: 3}
+    # Daily buckets until 2/28, hourly ones from there on, so the days
+    # from 3/3 count only what their hourly buckets hold
+    assert views(usage, "30d") == {1: 1 + 7000 + 100 + 200 + 300 + 400, 2: 3}